@@ -5,7 +5,15 @@
 # Distributed under the terms of the Lesser GNU General Public License (LGPL)
 #-----------------------------------------------------------------------------
 from kayako.api import KayakoAPI
+from kayako.async_api import AsyncKayakoAPI
+from kayako.export import UserExport, TicketFanOut
+from kayako.core.cache import ResponseCache
+from kayako.core.hedge import HedgePolicy
 from kayako.core.lib import UnsetParameter, FOREVER
+from kayako.core.limiter import AIMDLimiter
+from kayako.core.parser import ParserPool
+from kayako.core.pool import HTTPConnectionPool
+from kayako.core.transport import Transport, UrllibTransport, RecordingTransport, ReplayTransport
 from kayako.objects import *
 
 __NAME__ = 'kayako'
@@ -12,23 +12,37 @@ Created on May 5, 2011
 '''
 
 import base64
+import collections
 import hashlib
 import hmac
+import inspect
 import logging
 import random
+import socket
 import urllib
 import urllib2
 import time
 from datetime import datetime
 
-from lxml import etree
-
-from kayako.exception import KayakoRequestError, KayakoResponseError, KayakoInitializationError
-from kayako.core.lib import FOREVER
-from kayako.objects.ticket import Ticket
+from kayako.exception import KayakoRequestError, KayakoResponseError, KayakoInitializationError, KayakoBulkRequestError
+from kayako.core.cache import CachedResponse, ResponseCache
+from kayako.core.flight import SingleFlight
+from kayako.core.form import Base64File, FormData
+from kayako.core.futures import WorkerPool, prefetched, wait
+from kayako.core.hedge import HedgePolicy
+from kayako.core.limiter import AIMDLimiter, LimitedResponse
+from kayako.core.lib import FOREVER, LazyList
+from kayako.core.parser import ParserPool
+from kayako.core.pool import HTTPConnectionPool
+from kayako.core.transport import RecordingTransport, ReplayTransport
+from kayako.objects.ticket import Ticket, TicketAttachment
+from kayako.objects.user import User
 
 log = logging.getLogger('kayako')
 
+_Blueprint = collections.namedtuple('_Blueprint', 'cls kwargs')
+''' The class and keyword arguments to rebuild an unpickled KayakoAPI member with. '''
+
 class KayakoAPI(object):
     ''' 
     Python API wrapper for Kayako 4.01.240
@@ -215,6 +229,11 @@ class KayakoAPI(object):
                 Return all ``Tickets`` filtered by the required argument 
                 ``departmentid`` and by the optional keyword arguments.
                 
+            ``api.get_all(TicketFrame, departmentid, ticketstatusid=-1, ownerstaffid=-1, userid=-1)``
+                Returns only one object: a ``TicketFrame`` holding the ids, times and
+                replies of the same ``Tickets`` as typed column arrays (NumPy arrays
+                if NumPy is installed.)
+                
             ``api.get_all(TicketAttachment, ticketid)``
                 Return all ``TicketAttachments`` for a ``Ticket`` with the given ID.
                 
@@ -236,6 +255,11 @@ class KayakoAPI(object):
     
                 >>> api.filter(Department, args=(2), module='tickets')
                 [<Department module='tickets'...>, <Department module='tickets'...>, ...]
+            
+            A list value matches any of its items. For ``Ticket``, the
+            ``departmentid``, ``statusid`` (or ``ticketstatusid``),
+            ``ownerstaffid`` and ``userid`` keys are sent as ``ListAll``
+            parameters and filtered on the server. ``api.first`` does the same.
                 
     ``api.first(Object, args=(), kwargs={}, **filter)``
     
@@ -270,6 +294,31 @@ class KayakoAPI(object):
                 Return a ``TicketNote`` for a ticket with the given ``Ticket`` ID and
                 ``TicketNote`` ID.
                 
+    ``api.get_many(Object, ids, workers=4, timeout=None)``
+    
+        *Get many ``KayakoObjects`` concurrently, in the order of ``ids``.*
+        Give tuples of IDs for the special cases of ``api.get`` above, e.x.
+        ``api.get_many(TicketPost, [(ticketid, 1), (ticketid, 2)])``.
+        Raises ``KayakoBulkRequestError`` with ``results`` and ``errors`` if any
+        get failed or missed the ``timeout`` deadline.
+                
+    ``api.iter_users(start=1, page_size=1000, prefetch=2)``
+    
+        *Iterate over every ``User``, page by page.*
+        The next ``prefetch`` pages are requested in the background while the
+        current one is used.
+                
+    ``api.export_users(start=1, end=None, partitions=8, workers=4, page_size=1000, prefetch=2, ordered=True)``
+    
+        *Export every ``User`` with windows of the userid range fetched concurrently.*
+        See ``UserExport``.
+                
+    ``api.ticket_fan_out(departmentids, ticketstatusid=-1, ownerstaffid=-1, userid=-1, workers=4, max_tickets=5000, max_seconds=60.0, lazy=False)``
+    
+        *List the ``Tickets`` of many departments with concurrent calls, split
+        by status and owner when a call fails, and from the next run on when
+        it is too large or slow.* See ``TicketFanOut``.
+                
     **Object persistence methods**
     
     ``kayakoobject.add()``
@@ -297,6 +346,18 @@ class KayakoAPI(object):
         
     ``api.ticket_search_full(query)``
         *Shorthand for ``api.ticket_search.`` Searches all fields.
+
+    **Asynchronous API**
+
+    ``AsyncKayakoAPI(api_url, api_key, secret_key, workers=10)`` mirrors
+    ``create``, ``get``, ``get_all``, ``filter``, ``first`` and ``ticket_search``
+    but returns a ``KayakoFuture`` for every call, running the requests on a
+    pool of worker threads::
+
+        >>> from kayako import AsyncKayakoAPI
+        >>> async_api = AsyncKayakoAPI(API_URL, API_KEY, SECRET_KEY)
+        >>> future = async_api.get(Ticket, 1)
+        >>> future.add_done_callback(lambda f: log.info(f.result()))
             
     **Changes**
     
@@ -337,10 +398,43 @@ class KayakoAPI(object):
     ================= ====================================================================== ========================= ======= ======= =====================
     '''
 
-    def __init__(self, api_url, api_key, secret_key):
+    def __init__(self, api_url, api_key, secret_key, pool_size=4, compress=True, hedge=None, limiter=None, coalesce=False, cache=None, transport=None, huge_tree=False):
         ''' 
         Creates a new wrapper that will make requests to the given URL using
         the authentication provided.
+
+        ``transport`` is the ``Transport`` that sends requests. By default an
+        ``HTTPConnectionPool`` keeping ``pool_size`` idle keep-alive
+        connections per host is used; ``api.pool.hits`` and
+        ``api.pool.misses`` show how often a connection was reused. With
+        ``compress`` it asks for gzip or deflate encoded responses, which are
+        decompressed while they are parsed. Like ``urllib2``, it follows
+        redirects and uses the proxies set in the environment.
+        ``ReplayTransport`` serves recorded responses from disk, for tests and
+        benchmarks.
+
+        ``hedge`` takes a ``HedgePolicy`` to send a duplicate of any GET that
+        is slower than usual for its controller, using whichever answers
+        first. ``api.hedge.tracker.stats()`` shows the p50/p99 response times.
+
+        ``limiter`` takes an ``AIMDLimiter`` to cap how many requests this
+        wrapper has in flight at once; the cap backs off when the server
+        answers with 5xx/429 or slows down, and grows while it keeps up. A
+        request holds its slot until its response body has been read or
+        closed; requests the reading thread makes meanwhile do not wait for
+        a slot. ``limiter=True`` uses a default ``AIMDLimiter``.
+
+        With ``coalesce``, identical ``get`` and ``get_all`` calls made at the
+        same time from different threads share one request and one parsed
+        result; the callers then hold the very same objects.
+
+        ``cache`` takes a ``ResponseCache`` to keep GET responses of rarely
+        changing objects (``TicketStatus``, ``Department``, ...) for a while.
+
+        Responses are parsed with pooled, reused ``XMLParser`` instances from
+        ``api.parsers``; ``api.parsers.stats()`` shows the time spent parsing
+        per object type. Pass ``huge_tree`` for ticket listings too large for
+        libxml2's default limits.
         '''
 
         if not api_url:
@@ -355,15 +449,90 @@ class KayakoAPI(object):
             raise KayakoInitializationError('Secret Key not specified.')
         self.api_key = api_key
 
+        if transport is None:
+            transport = HTTPConnectionPool(maxsize=pool_size, compress=compress)
+        self.transport = transport
+        self.hedge = hedge
+        if limiter is True:
+            limiter = AIMDLimiter()
+        self.limiter = limiter or None
+        self.flight = SingleFlight() if coalesce else None
+        self.cache = cache
+        self.parsers = ParserPool(huge_tree=huge_tree)
+
+    _REBUILT = ('transport', 'parsers', 'flight', 'cache', 'limiter', 'hedge')
+    ''' Members holding locks or connections, pickled as their settings. '''
+
+    @classmethod
+    def _blueprint(cls, member):
+        '''
+        Returns a ``_Blueprint`` to build an empty copy of ``member`` with,
+        or ``member`` itself if it is not one of the known lock holders.
+        '''
+        if isinstance(member, HTTPConnectionPool):
+            kwargs = dict(maxsize=member.maxsize, compress=member.compress, proxies=member.proxies)
+            if member.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                kwargs['timeout'] = member.timeout
+            return _Blueprint(HTTPConnectionPool, kwargs)
+        elif isinstance(member, RecordingTransport):
+            return _Blueprint(RecordingTransport, dict(transport=cls._blueprint(member.transport), directory=member.directory))
+        elif isinstance(member, ReplayTransport):
+            return _Blueprint(ReplayTransport, dict(directory=member.directory))
+        elif isinstance(member, ParserPool):
+            return _Blueprint(ParserPool, dict(maxsize=member.maxsize, huge_tree=member.options['huge_tree']))
+        elif isinstance(member, SingleFlight):
+            return _Blueprint(SingleFlight, {})
+        elif isinstance(member, ResponseCache):
+            return _Blueprint(ResponseCache, dict(ttls=member.ttls, max_bytes=member.max_bytes))
+        elif isinstance(member, AIMDLimiter):
+            return _Blueprint(AIMDLimiter, dict(initial=member.limit, minimum=member.minimum, maximum=member.maximum,
+                                                increase=member.increase, decrease=member.decrease,
+                                                tolerance=member.tolerance, smoothing=member.smoothing))
+        elif isinstance(member, HedgePolicy):
+            return _Blueprint(HedgePolicy, dict(percentile=member.percentile, min_samples=member.min_samples,
+                                                initial_delay=member.initial_delay, min_delay=member.min_delay,
+                                                max_delay=member.max_delay, window=member.tracker.window))
+        return member
+
+    @classmethod
+    def _rebuild(cls, member):
+        if isinstance(member, _Blueprint):
+            return member.cls(**dict((name, cls._rebuild(value)) for name, value in member.kwargs.iteritems()))
+        return member
+
+    def __getstate__(self):
+        '''
+        The transport, parser pool, cache, limiter and so on hold locks and
+        open connections. They are pickled (and deep-copied) as their
+        settings, and rebuilt empty when unpickled.
+        '''
+        state = dict(self.__dict__)
+        for name in self._REBUILT:
+            state[name] = self._blueprint(state[name])
+        return state
+
+    def __setstate__(self, state):
+        for name in self._REBUILT:
+            state[name] = self._rebuild(state[name])
+        self.__dict__.update(state)
+
     ## { Communication Layer
 
-    def _sanitize_parameter(self, parameter):
+    @property
+    def pool(self):
+        ''' The ``HTTPConnectionPool`` used as transport, if any. '''
+        if isinstance(self.transport, HTTPConnectionPool):
+            return self.transport
+
+    @classmethod
+    def _sanitize_parameter(cls, parameter):
         '''
         Sanitize a specific object.
         
         - Convert None types to empty strings
         - Convert FOREVER to '0'
         - Convert lists/tuples into sanitized lists
+        - Keep Base64File values as they are, to be streamed
         - Convert objects to strings
         '''
 
@@ -378,46 +547,39 @@ class KayakoAPI(object):
         elif isinstance(parameter, datetime):
             return str(int(time.mktime(parameter.timetuple())))
         elif isinstance(parameter, (list, tuple, set)):
-            return [self._sanitize_parameter(item) for item in parameter if item not in ['', None]]
+            return [cls._sanitize_parameter(item) for item in parameter if item not in ['', None]]
+        elif isinstance(parameter, Base64File):
+            return parameter
         else:
             return str(parameter)
 
-    def _sanitize_parameters(self, **parameters):
+    @classmethod
+    def _sanitize_parameters(cls, **parameters):
         '''
         Sanitize a dictionary of parameters for a request.
         '''
         result = dict()
         for key, value in parameters.iteritems():
-            result[key] = self._sanitize_parameter(value)
+            result[key] = cls._sanitize_parameter(value)
         return result
 
     def _post_data(self, **parameters):
         '''
         Turns parameters into application/x-www-form-urlencoded format.
         '''
-        data = None
-        first = True
-        for key, value in parameters.iteritems():
-            if isinstance(value, list):
-                if len(value):
-                    for sub_value in value:
-                        if first:
-                            data = '%s[]=%s' % (key, urllib2.quote(sub_value))
-                            first = False
-                        else:
-                            data = '%s&%s[]=%s' % (data, key, urllib2.quote(sub_value))
-                else:
-                    if first:
-                        data = '%s[]=' % key
-                        first = False
-                    else:
-                        data = '%s&%s[]=' % (data, key)
-            elif first:
-                data = '%s=%s' % (key, urllib2.quote(value))
-                first = False
-            else:
-                data = '%s&%s=%s' % (data, key, urllib2.quote(value))
-        return data
+        if parameters:
+            return ''.join(FormData(parameters))
+
+    def _form_data(self, **parameters):
+        '''
+        Like ``_post_data``, but bodies longer than ``FormData.STREAM_SIZE``
+        are returned as a ``FormData`` to be streamed by the transport.
+        '''
+        if parameters:
+            data = FormData(parameters)
+            if len(data) > data.STREAM_SIZE:
+                return data
+            return ''.join(data)
 
     def _generate_signature(self):
         '''
@@ -440,10 +602,18 @@ class KayakoAPI(object):
 
         salt, b64signature = self._generate_signature()
 
+        cache_key = None
         if method == 'GET':
-            url = '%s?e=%s&apikey=%s&salt=%s&signature=%s' % (self.api_url, urllib.quote(controller), urllib.quote(self.api_key), salt, urllib.quote(b64signature))
             # Append additional query args if necessary
             data = self._post_data(**self._sanitize_parameters(**parameters)) if parameters else None
+            if self.cache is not None and self.cache.ttl(controller):
+                cache_key = (controller, data)
+                body = self.cache.get(cache_key)
+                if body is not None:
+                    log.debug('REQUEST CACHED: %s' % controller)
+                    return CachedResponse(body)
+                generation = self.cache.generation(controller)
+            url = '%s?e=%s&apikey=%s&salt=%s&signature=%s' % (self.api_url, urllib.quote(controller), urllib.quote(self.api_key), salt, urllib.quote(b64signature))
             if data:
                 url = '%s&%s' % (url, data)
             request = urllib2.Request(url)
@@ -453,30 +623,57 @@ class KayakoAPI(object):
             parameters['apikey'] = self.api_key
             parameters['salt'] = salt
             parameters['signature'] = b64signature
-            data = self._post_data(**self._sanitize_parameters(**parameters))
+            data = self._form_data(**self._sanitize_parameters(**parameters))
             request = urllib2.Request(url, data=data, headers={'Content-length' : len(data) if data else 0})
             request.get_method = lambda: method
         elif method == 'DELETE': # DELETE
             url = '%s?e=%s&apikey=%s&salt=%s&signature=%s' % (self.api_url, urllib.quote(controller), urllib.quote(self.api_key), salt, urllib.quote(b64signature))
-            data = self._post_data(**self._sanitize_parameters(**parameters))
+            data = self._form_data(**self._sanitize_parameters(**parameters))
             request = urllib2.Request(url, data=data, headers={'Content-length' : len(data) if data else 0})
             request.get_method = lambda: method
         else:
             raise KayakoRequestError('Invalid request method: %s not supported.' % method)
 
         log.debug('REQUEST URL: %s' % url)
-        log.debug('REQUEST DATA: %s' % data)
+        if isinstance(data, FormData):
+            log.debug('REQUEST DATA: <%s bytes streamed>' % len(data))
+        else:
+            log.debug('REQUEST DATA: %s' % data)
 
+        if self.limiter is not None:
+            owner = self.limiter.acquire()
+        started = time.time()
+        overloaded = False
+        response = None
         try:
-            response = urllib2.urlopen(request)
+            if method == 'GET' and self.hedge is not None:
+                response = self.hedge.urlopen(self.transport.urlopen, request, controller, getattr(self.transport, 'cancel', None))
+            else:
+                response = self.transport.urlopen(request)
+            if self.limiter is not None:
+                # The slot is held until the body has been read
+                latency = time.time() - started
+                response = LimitedResponse(response, lambda: self.limiter.release(latency, False, controller, owner))
         except urllib2.HTTPError, error:
-            response_error = KayakoResponseError('%s: %s' % (error, error.read()))
+            overloaded = error.code >= 500 or error.code == 429
+            response_error = KayakoResponseError('%s: %s' % (error, error.read()), code=error.code)
             log.error(response_error)
             raise response_error
         except urllib2.URLError, error:
+            overloaded = True
             request_error = KayakoRequestError(error)
             log.error(request_error)
             raise request_error
+        finally:
+            if self.limiter is not None and response is None:
+                self.limiter.release(time.time() - started, overloaded, controller, owner)
+            if self.cache is not None and method != 'GET':
+                self.cache.invalidate(controller)
+
+        if cache_key is not None:
+            body = response.read()
+            self.cache.set(cache_key, body, generation)
+            response = CachedResponse(body, url)
         return response
 
     ## { Persistence Layer
@@ -506,6 +703,13 @@ class KayakoAPI(object):
               ownerstaffid= -1, userid= -1)
                 Return all Tickets filtered by the required argument
                 ``departmentid`` and by the optional keyword arguments.
+                With ``lazy=True``, LazyTickets are returned, which parse each
+                field from the response the first time it is read.
+                
+            api.get_all(TicketFrame, departmentid, ticketstatusid= -1,
+              ownerstaffid= -1, userid= -1)
+                Return one TicketFrame holding the id, status, owner and
+                time fields of the same Tickets as typed column arrays.
                 
             api.get_all(TicketAttachment, ticketid)
                 Return all TicketAttachments for a Ticket with the given ID.
@@ -514,22 +718,92 @@ class KayakoAPI(object):
                 Return all TicketPosts for a Ticket with the given ID.
                 
         '''
+        if self.flight is not None:
+            return self.flight.do(self._flight_key('GET ALL', object, args, kwargs), object.get_all, self, *args, **kwargs)
         return object.get_all(self, *args, **kwargs)
 
+    def iter_all(self, object, *args, **kwargs):
+        '''
+        Like ``get_all``, but returns a generator yielding the Kayako Objects
+        one at a time while the response is read and parsed. Memory stays
+        flat however many objects there are, and the first one is available
+        before the download finishes. Nothing is requested until the first
+        object is asked for.
+        
+        e.x.
+            >>> for ticket in api.iter_all(Ticket, departmentid):
+            ...     archive(ticket)
+        '''
+        return object.iter_all(self, *args, **kwargs)
+
+    def _flight_key(self, method, object, args, kwargs):
+        '''
+        Returns a hashable key identifying a call for request coalescing.
+        '''
+        def freeze(value):
+            if isinstance(value, (list, tuple, set)):
+                return tuple(freeze(item) for item in value)
+            elif isinstance(value, dict):
+                return tuple(sorted((key, freeze(item)) for key, item in value.iteritems()))
+            return value
+        return (method, object, getattr(object, 'controller', None), freeze(args), freeze(kwargs))
+
     def _match_filter(self, object, **filter):
         '''
         Returns whether or not every given attribute of an object is equal
-        to the given values.
+        to the given values. A list or tuple value matches any of its items.
         '''
         for key, value in filter.iteritems():
             attr = getattr(object, key)
-            if isinstance(attr, list):
-                if value not in attr:
+            values = value if isinstance(value, (list, tuple)) else [value]
+            if isinstance(attr, (list, LazyList)):
+                if not any(item in attr for item in values):
                     return False
-            elif attr != value:
+            elif attr not in values:
                 return False
         return True
 
+    def _normalize_filter(self, filter):
+        '''
+        Returns a copy of the filter with sets and other iterators turned
+        into lists (sets sorted), so they are sent in the comma form and
+        matched as any of their items. Returns None if a value is empty,
+        as an empty any-of value matches nothing.
+        '''
+        filter = dict(filter)
+        for key, value in filter.iteritems():
+            if isinstance(value, (set, frozenset)):
+                filter[key] = sorted(value)
+            elif isinstance(value, collections.Iterator):
+                filter[key] = list(value)
+            if isinstance(filter[key], (list, tuple)) and not filter[key]:
+                return None
+        return filter
+
+    def _pushdown_filter(self, object, args, kwargs, filter):
+        '''
+        Moves the filter keys listed in the object's ``__filter_pushdown__``
+        into the get_all keyword arguments, so the server does the filtering.
+        Keys whose argument is already given in ``args`` or ``kwargs`` are
+        left alone. Returns the new kwargs and the filter left to match.
+        
+        The filter is expected to be normalized by ``_normalize_filter``.
+        '''
+        pushdown = getattr(object, '__filter_pushdown__', None)
+        if not pushdown:
+            return kwargs, filter
+        # Skip cls and api
+        positional = inspect.getargspec(object.get_all).args[2:2 + len(args)]
+        kwargs = dict(kwargs)
+        leftover = {}
+        for key, value in filter.iteritems():
+            name = pushdown.get(key)
+            if name is None or name in kwargs or name in positional:
+                leftover[key] = value
+            else:
+                kwargs[name] = value
+        return kwargs, leftover
+
     def filter(self, object, args=(), kwargs={}, **filter):
         '''
         Gets all KayakoObjects matching a filter.
@@ -537,7 +811,18 @@ class KayakoAPI(object):
         e.x.
             >>> api.filter(Department, args=(2), module='tickets')
             [<Department module='tickets'...>, <Department module='tickets'...>, ...]
+        
+        A list value matches any of its items. Filter keys the get_all
+        request can filter on are sent with it, see ``__filter_pushdown__``.
+        
+        e.x.
+            >>> api.filter(Ticket, departmentid=[1, 2], statusid=open.id, ownerstaffid=staff.id)
+            [<Ticket...>, ...]
         '''
+        filter = self._normalize_filter(filter)
+        if filter is None:
+            return []
+        kwargs, filter = self._pushdown_filter(object, args, kwargs, filter)
         objects = self.get_all(object, *args, **kwargs)
         results = []
         for result in objects:
@@ -553,12 +838,16 @@ class KayakoAPI(object):
             >>> api.filter(Department, args=(2), module='tickets')
             <Department module='tickets'>
         '''
+        filter = self._normalize_filter(filter)
+        if filter is None:
+            return None
+        kwargs, filter = self._pushdown_filter(object, args, kwargs, filter)
         objects = self.get_all(object, *args, **kwargs)
         for result in objects:
             if self._match_filter(result, **filter):
                 return result
 
-    def get(self, object, *args):
+    def get(self, object, *args, **kwargs):
         '''
         Get a Kayako Object of the given type by ID.
         
@@ -573,6 +862,11 @@ class KayakoAPI(object):
                 and TicketAttachment ID.  Getting a specific TicketAttachment
                 gets a TicketAttachment with the actual attachment contents.
             
+            api.get(TicketAttachment, ticketid, attachmentid, lazy=True)
+                Decode the contents into a temporary buffer or file instead of
+                keeping them in memory; ``get_contents`` then returns a
+                memoryview or mmap of them.
+            
             api.get(TicketPost, ticketid, ticketpostid)
                 Return a TicketPost for a ticket with the given Ticket ID and
                 TicketPost ID.
@@ -584,7 +878,125 @@ class KayakoAPI(object):
         '''
 
 
-        return object.get(self, *args)
+        if self.flight is not None:
+            return self.flight.do(self._flight_key('GET', object, args, kwargs), object.get, self, *args, **kwargs)
+        return object.get(self, *args, **kwargs)
+
+    def download_attachment(self, ticketid, attachmentid, sink):
+        '''
+        Write the decoded contents of a TicketAttachment to the file-like
+        ``sink`` as the response arrives, with bounded memory. Returns the
+        TicketAttachment (without contents), or None if it does not exist.
+        
+        e.x.
+            >>> with open('patch.diff', 'wb') as sink:
+            ...     api.download_attachment(ticketid, attachmentid, sink)
+            <TicketAttachment (7): patch.diff>
+        '''
+        return TicketAttachment.download(self, ticketid, attachmentid, sink)
+
+    def get_many(self, object, ids, workers=4, timeout=None):
+        '''
+        Get many Kayako Objects of the given type concurrently, using up to
+        ``workers`` threads. Results are returned in the order of ``ids``.
+        Objects that do not exist are None, as with ``get``.
+        
+        e.x.
+            >>> api.get_many(Ticket, [1, 2, 3])
+            [<Ticket (1)...>, None, <Ticket (3)...>]
+        
+        For objects whose ``get`` takes more than one ID, give tuples:
+        
+            >>> api.get_many(TicketPost, [(ticketid, 1), (ticketid, 2)])
+        
+        ``timeout`` is an overall deadline in seconds. If any get fails or
+        is still running at the deadline, ``KayakoBulkRequestError`` is raised
+        with the partial ``results`` and an ``errors`` dictionary of id to
+        exception.
+        '''
+        ids = list(ids)
+        calls = [id if isinstance(id, tuple) else (id,) for id in ids]
+        pool = WorkerPool(max(1, min(workers, len(calls))))
+        futures = [pool.submit(self.get, object, *args) for args in calls]
+        wait(futures, timeout)
+        pool.shutdown(wait=False)
+
+        results = []
+        errors = {}
+        for id, future in zip(ids, futures):
+            if not future.done() or future.cancelled():
+                future.cancel()
+                errors[id] = KayakoRequestError('Deadline of %s seconds exceeded.' % timeout)
+                results.append(None)
+            elif future.exception() is not None:
+                errors[id] = future.exception()
+                results.append(None)
+            else:
+                results.append(future.result())
+        if errors:
+            raise KayakoBulkRequestError('GET %s failed for %s of %s ids.' % (object.__name__, len(errors), len(ids)), results, errors)
+        return results
+
+    def iter_users(self, start=1, page_size=1000, prefetch=2):
+        '''
+        Iterates over every User from userid ``start`` on, requesting them
+        ``page_size`` at a time (max 1000.) Each page starts after the last
+        ID of the page before it, until a page comes back empty.
+        
+        Up to ``prefetch`` pages are requested and parsed on a background
+        thread while the caller works through the current one; with
+        ``prefetch=0`` each page is only requested once it is needed.
+        
+        e.x.
+            >>> for user in api.iter_users():
+            ...     export(user)
+        '''
+        def pages():
+            marker = start
+            while True:
+                users = User.get_all(self, marker, page_size)
+                if not users:
+                    return
+                yield users
+                marker = users[-1].id + 1
+
+        for users in (prefetched(pages(), prefetch) if prefetch else pages()):
+            for user in users:
+                yield user
+
+    def export_users(self, start=1, end=None, partitions=8, workers=4, page_size=1000, prefetch=2, ordered=True):
+        '''
+        Returns a ``UserExport`` iterating over every User, with the userid
+        range split into ``partitions`` windows fetched by ``workers``
+        threads at once. Each window keeps up to ``prefetch`` pages ready,
+        so about ``workers * (prefetch + 1)`` pages are held in memory at
+        most. Per window statistics are in ``export.stats``.
+        
+        e.x.
+            >>> export = api.export_users(partitions=16, workers=8, ordered=False)
+            >>> for user in export:
+            ...     write(user)
+        '''
+        from kayako.export import UserExport
+        return UserExport(self, start=start, end=end, partitions=partitions, workers=workers, page_size=page_size, prefetch=prefetch, ordered=ordered)
+
+    def ticket_fan_out(self, departmentids, ticketstatusid= -1, ownerstaffid= -1, userid= -1, workers=4, max_tickets=5000, max_seconds=60.0, lazy=False):
+        '''
+        Returns a ``TicketFanOut`` listing the Tickets of ``departmentids``
+        with concurrent calls per department, split further by status and
+        owner when a call fails with a 5xx or 429 response or a timeout. A
+        call returning more than ``max_tickets`` tickets, or slower than
+        ``max_seconds``, is only split from the next ``run`` on, so reuse the
+        TicketFanOut for repeated listings; the first run never adapts to
+        size or speed.
+        
+        e.x.
+            >>> fan_out = api.ticket_fan_out([1, 2, 3], workers=8)
+            >>> tickets = fan_out.run()
+            >>> tickets = fan_out.run() # Lists with the adapted plan
+        '''
+        from kayako.export import TicketFanOut
+        return TicketFanOut(self, departmentids, ticketstatusid=ticketstatusid, ownerstaffid=ownerstaffid, userid=userid, workers=workers, max_tickets=max_tickets, max_seconds=max_seconds, lazy=lazy)
 
     def ticket_search(self, query, ticketid=False, contents=False, author=False, email=False, creatoremail=False, fullname=False, notes=False, usergroup=False, userorganization=False, user=False, tags=False):
         ''' Search tickets in certain parameters for a given query.
@@ -602,7 +1014,7 @@ class KayakoAPI(object):
         tags=False          If True, then search the Ticket Tags
         '''
         response = self._request('/Tickets/TicketSearch', 'POST', query=query, ticketid=ticketid, contents=contents, author=author, email=email, creatoremail=creatoremail, fullname=fullname, notes=notes, usergroup=usergroup, userorganization=userorganization, user=user, tags=tags)
-        ticket_xml = etree.parse(response)
+        ticket_xml = Ticket._parse(self, response)
         return [Ticket(self, **Ticket._parse_ticket(self, ticket_tree)) for ticket_tree in ticket_xml.findall('ticket')]
 
     def ticket_search_full(self, query):
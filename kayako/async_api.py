@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.api import KayakoAPI
+from kayako.core.futures import WorkerPool
+
+class AsyncKayakoAPI(object):
+    '''
+    Non-blocking front end for ``KayakoAPI``.
+
+    Every call runs on a bounded pool of worker threads sharing one
+    ``KayakoAPI`` (and its keep-alive connection pool) and returns a
+    ``KayakoFuture`` immediately, so many requests can be in flight at once.
+    Other keyword arguments are passed on to ``KayakoAPI``::
+
+        >>> from kayako import AsyncKayakoAPI, Ticket
+        >>> api = AsyncKayakoAPI(API_URL, API_KEY, SECRET_KEY, workers=20)
+        >>> futures = [api.get(Ticket, id) for id in ticket_ids]
+        >>> tickets = [future.result() for future in futures]
+
+    Objects returned by the futures are bound to the synchronous ``api.api``,
+    so ``add``, ``save`` and ``delete`` on them block as usual; pass them to
+    ``api.submit`` to run them in the background instead.
+    '''
+
+    def __init__(self, api_url, api_key, secret_key, workers=10, pool_size=None, **options):
+        self.api = KayakoAPI(api_url, api_key, secret_key, pool_size=pool_size or workers, **options)
+        self.workers = WorkerPool(workers)
+
+    def submit(self, function, *args, **kwargs):
+        ''' Run any callable on the worker pool and return a ``KayakoFuture``. '''
+        return self.workers.submit(function, *args, **kwargs)
+
+    def create(self, object, *args, **kwargs):
+        '''
+        Create a new KayakoObject of the type given, passing in args and kwargs.
+        Does not make a request, so the object is returned directly.
+        '''
+        return self.api.create(object, *args, **kwargs)
+
+    def get_all(self, object, *args, **kwargs):
+        ''' Future of ``KayakoAPI.get_all``. '''
+        return self.submit(self.api.get_all, object, *args, **kwargs)
+
+    def filter(self, object, args=(), kwargs={}, **filter):
+        ''' Future of ``KayakoAPI.filter``. '''
+        return self.submit(self.api.filter, object, args, kwargs, **filter)
+
+    def first(self, object, args=(), kwargs={}, **filter):
+        ''' Future of ``KayakoAPI.first``. '''
+        return self.submit(self.api.first, object, args, kwargs, **filter)
+
+    def get(self, object, *args, **kwargs):
+        ''' Future of ``KayakoAPI.get``. '''
+        return self.submit(self.api.get, object, *args, **kwargs)
+
+    def ticket_search(self, query, **fields):
+        ''' Future of ``KayakoAPI.ticket_search``. '''
+        return self.submit(self.api.ticket_search, query, **fields)
+
+    def ticket_search_full(self, query):
+        ''' Future of ``KayakoAPI.ticket_search_full``. '''
+        return self.submit(self.api.ticket_search_full, query)
+
+    def close(self, wait=True):
+        ''' Stop the worker threads and close idle connections. '''
+        self.workers.shutdown(wait=wait)
+        self.api.transport.close()
+
+    def __str__(self):
+        return '<AsyncKayakoAPI: %s>' % self.api.api_url
+
+    def __repr__(self):
+        return 'AsyncKayakoAPI(%s, "some_key", "some_secret")' % (self.api.api_url)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import threading
+import time
+from collections import OrderedDict
+from StringIO import StringIO
+
+__all__ = [
+    'CachedResponse',
+    'ResponseCache',
+]
+
+class CachedResponse(StringIO):
+    ''' A response body served from the cache. '''
+
+    def __init__(self, body, url=None):
+        StringIO.__init__(self, body)
+        self.code = 200
+        self.url = url
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return {}
+
+class ResponseCache(object):
+    '''
+    TTL and LRU cache of GET response bodies, for data that rarely changes.
+
+    ttls       A dictionary of KayakoObject class (or controller path) to the
+               seconds its responses stay fresh. Defaults to five minutes for
+               TicketStatus, TicketPriority, TicketType, Department,
+               StaffGroup and UserGroup. Other controllers are not cached.
+    max_bytes  Least recently used responses are evicted once the cached
+               bodies add up to more than this.
+
+    Any POST, PUT or DELETE made through the API to a cached controller
+    drops that controller's entries, so ``add``, ``save`` and ``delete``
+    invalidate the cache on their own. ``invalidate(Object)`` and ``clear()``
+    do it by hand. A GET that was sent before an invalidation is not cached
+    when it answers after it, see ``generation``.
+    '''
+
+    DEFAULT_TTLS = {
+        '/Tickets/TicketStatus': 300,
+        '/Tickets/TicketPriority': 300,
+        '/Tickets/TicketType': 300,
+        '/Base/Department': 300,
+        '/Base/StaffGroup': 300,
+        '/Base/UserGroup': 300,
+    }
+
+    def __init__(self, ttls=None, max_bytes=4 * 1024 * 1024):
+        if ttls is None:
+            ttls = self.DEFAULT_TTLS
+        self.ttls = dict((self._controller(object), ttl) for object, ttl in ttls.iteritems())
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _controller(object):
+        if isinstance(object, basestring):
+            return object.rstrip('/')
+        return object.controller.rstrip('/')
+
+    def _prefix(self, controller):
+        ''' Returns the configured controller that ``controller`` belongs to, or None. '''
+        best = None
+        for prefix in self.ttls:
+            if controller == prefix or controller.startswith(prefix + '/'):
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        return best
+
+    def ttl(self, controller):
+        prefix = self._prefix(controller)
+        return self.ttls[prefix] if prefix else 0
+
+    def get(self, key):
+        ''' Returns the cached body for ``(controller, query)`` or None. '''
+        self._lock.acquire()
+        try:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    self.size -= len(entry[1])
+                self.misses += 1
+                return None
+            # Re-insert to mark as most recently used
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+        finally:
+            self._lock.release()
+
+    def generation(self, controller):
+        '''
+        Returns a counter of the invalidations of ``controller``'s entries.
+        Read it before sending a GET and pass it to ``set``, so that a
+        response from before a concurrent change is not stored.
+        '''
+        return self._generations.get(self._prefix(controller), 0)
+
+    def set(self, key, body, generation=None):
+        controller = key[0]
+        ttl = self.ttl(controller)
+        if ttl <= 0 or len(body) > self.max_bytes:
+            return
+        prefix = self._prefix(controller)
+        self._lock.acquire()
+        try:
+            if generation is not None and self._generations.get(prefix, 0) != generation:
+                # Invalidated while the response was on its way
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self._entries[key] = (time.time() + ttl, body, prefix)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[1])
+        finally:
+            self._lock.release()
+
+    def invalidate(self, object):
+        '''
+        Drop every entry for a KayakoObject class, or for the class a
+        controller path belongs to.
+        '''
+        prefix = self._prefix(self._controller(object))
+        if prefix is None:
+            return
+        self._lock.acquire()
+        try:
+            self._generations[prefix] = self._generations.get(prefix, 0) + 1
+            for key, entry in self._entries.items():
+                if entry[2] == prefix:
+                    del self._entries[key]
+                    self.size -= len(entry[1])
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            for prefix in self.ttls:
+                self._generations[prefix] = self._generations.get(prefix, 0) + 1
+            self._entries.clear()
+            self.size = 0
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return '<ResponseCache entries=%s size=%s hits=%s misses=%s>' % (len(self._entries), self.size, self.hits, self.misses)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import sys
+import threading
+
+__all__ = [
+    'SingleFlight',
+]
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+class SingleFlight(object):
+    '''
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, callers arriving while it runs wait for it and get the same
+    result (or exception.)
+
+    ``calls`` counts functions actually run, ``coalesced`` counts callers
+    that shared another caller's result.
+    '''
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args, **kwargs):
+        self._lock.acquire()
+        call = self._in_flight.get(key)
+        if call is not None:
+            self.coalesced += 1
+            self._lock.release()
+            call.event.wait()
+        else:
+            call = self._in_flight[key] = _Call()
+            self.calls += 1
+            self._lock.release()
+            try:
+                call.result = function(*args, **kwargs)
+            except BaseException:
+                call.exc_info = sys.exc_info()
+            self._lock.acquire()
+            del self._in_flight[key]
+            self._lock.release()
+            call.event.set()
+        if call.exc_info:
+            raise call.exc_info[0], call.exc_info[1], call.exc_info[2]
+        return call.result
+
+    def __str__(self):
+        return '<SingleFlight calls=%s coalesced=%s>' % (self.calls, self.coalesced)
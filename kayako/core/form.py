@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import base64
+import os
+import string
+import urllib
+
+__all__ = [
+    'FormData',
+    'Base64File',
+]
+
+# Characters urllib.quote leaves alone with its default safe='/'
+_SAFE = string.ascii_letters + string.digits + '_.-/'
+
+def quoted_length(value):
+    ''' Returns ``len(urllib.quote(value))`` without building the quoted string. '''
+    if isinstance(value, str):
+        return len(value) + 2 * len(value.translate(None, _SAFE))
+    return len(urllib.quote(value))
+
+class Base64File(object):
+    '''
+    A form value holding the Base 64 encoding of a seekable file, encoded
+    and quoted ``CHUNK_SIZE`` bytes at a time whenever the body is sent, so
+    the file is never held in memory.
+
+    The encoded length is measured with one pass over the file when it is
+    first needed, and the file is read from its current position again for
+    every send (a retried request reads it once more.)
+    '''
+
+    CHUNK_SIZE = 3 * 16384
+    ''' Bytes read at a time, a multiple of 3 so chunks encode without padding. '''
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.start = fileobj.tell()
+        self._quoted_length = None
+
+    def _read_chunks(self):
+        self.fileobj.seek(self.start)
+        while True:
+            chunk = self.fileobj.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def iter_encoded(self):
+        ''' Yields the Base 64 encoding of the file in chunks. '''
+        for chunk in self._read_chunks():
+            yield base64.b64encode(chunk)
+
+    def iter_quoted(self):
+        ''' Yields the URL quoted Base 64 encoding of the file in chunks. '''
+        for encoded in self.iter_encoded():
+            yield urllib.quote(encoded)
+
+    def quoted_length(self):
+        if self._quoted_length is None:
+            self._quoted_length = sum(quoted_length(encoded) for encoded in self.iter_encoded())
+        return self._quoted_length
+
+    def read(self):
+        ''' Returns the unencoded contents of the file. '''
+        return ''.join(self._read_chunks())
+
+    def size(self):
+        ''' Returns the unencoded size of the file in bytes. '''
+        self.fileobj.seek(0, os.SEEK_END)
+        return self.fileobj.tell() - self.start
+
+    def __len__(self):
+        return 4 * ((self.size() + 2) // 3)
+
+    def __nonzero__(self):
+        return True
+
+    def __str__(self):
+        return ''.join(self.iter_encoded())
+
+class FormData(object):
+    '''
+    An application/x-www-form-urlencoded body built from sanitized
+    parameters (strings, lists of strings, or ``Base64File`` values.)
+
+    Iterating yields the encoded body in chunks, quoting long values
+    ``CHUNK_SIZE`` characters at a time, so a body can be sent without
+    ever being joined into one string. ``len`` gives the encoded length
+    for the Content-length header, and ``str`` the whole body.
+    '''
+
+    CHUNK_SIZE = 16384
+
+    STREAM_SIZE = 65536
+    ''' Bodies longer than this are worth streaming rather than joining. '''
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+
+    def _fields(self):
+        ''' Yields (name, value) pairs, expanding lists into ``name[]`` fields. '''
+        for key, value in self.parameters.iteritems():
+            if isinstance(value, list):
+                if len(value):
+                    for sub_value in value:
+                        yield '%s[]' % key, sub_value
+                else:
+                    yield '%s[]' % key, ''
+            else:
+                yield key, value
+
+    def __iter__(self):
+        first = True
+        for name, value in self._fields():
+            if first:
+                yield '%s=' % name
+                first = False
+            else:
+                yield '&%s=' % name
+            if isinstance(value, Base64File):
+                for chunk in value.iter_quoted():
+                    yield chunk
+            elif len(value) <= self.CHUNK_SIZE:
+                yield urllib.quote(value)
+            else:
+                for start in xrange(0, len(value), self.CHUNK_SIZE):
+                    yield urllib.quote(value[start:start + self.CHUNK_SIZE])
+
+    def __len__(self):
+        length = 0
+        for name, value in self._fields():
+            if isinstance(value, Base64File):
+                length += len(name) + 2 + value.quoted_length()
+            else:
+                length += len(name) + 2 + quoted_length(value)
+        # No '&' before the first field
+        return max(length - 1, 0)
+
+    def __nonzero__(self):
+        return bool(self.parameters)
+
+    def __str__(self):
+        return ''.join(self)
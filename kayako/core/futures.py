@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import Queue
+import sys
+import threading
+import time
+
+__all__ = [
+    'KayakoFuture',
+    'WorkerPool',
+    'wait',
+    'prefetched',
+]
+
+class KayakoFuture(object):
+    '''
+    The pending result of a call running on a ``WorkerPool``.
+    '''
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._done = False
+        self._running = False
+        self._cancelled = False
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def _set_running(self):
+        ''' Returns False if the future was cancelled before it could start. '''
+        self._condition.acquire()
+        try:
+            if self._cancelled:
+                return False
+            self._running = True
+            return True
+        finally:
+            self._condition.release()
+
+    def _finish(self, result=None, exc_info=None):
+        self._condition.acquire()
+        try:
+            self._result = result
+            self._exc_info = exc_info
+            self._done = True
+            self._condition.notifyAll()
+            callbacks, self._callbacks = self._callbacks, []
+        finally:
+            self._condition.release()
+        for callback in callbacks:
+            callback(self)
+
+    def cancel(self):
+        '''
+        Cancel the call if it has not started yet. Returns whether or not the
+        call was cancelled.
+        '''
+        self._condition.acquire()
+        try:
+            if self._running or self._done:
+                return self._cancelled
+            self._cancelled = True
+        finally:
+            self._condition.release()
+        self._finish()
+        return True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._done
+
+    def _wait(self, timeout):
+        self._condition.acquire()
+        try:
+            if not self._done:
+                self._condition.wait(timeout)
+            return self._done
+        finally:
+            self._condition.release()
+
+    def result(self, timeout=None):
+        '''
+        Wait for the call to finish and return its result, re-raising its
+        exception if it failed.
+        Raises ``KayakoRequestError`` if ``timeout`` seconds pass first.
+        '''
+        if not self._wait(timeout):
+            from kayako.exception import KayakoRequestError
+            raise KayakoRequestError('Timed out after %s seconds waiting for a result.' % timeout)
+        if self._cancelled:
+            from kayako.exception import KayakoRequestError
+            raise KayakoRequestError('The call was cancelled.')
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        ''' Wait for the call to finish and return its exception, or None. '''
+        self._wait(timeout)
+        if self._exc_info:
+            return self._exc_info[1]
+
+    def add_done_callback(self, callback):
+        '''
+        Call ``callback(future)`` when the call finishes, or right away if it
+        already has.
+        '''
+        self._condition.acquire()
+        try:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        finally:
+            self._condition.release()
+        callback(self)
+
+    def __str__(self):
+        state = 'cancelled' if self._cancelled else 'finished' if self._done else 'running' if self._running else 'pending'
+        return '<KayakoFuture at %s: %s>' % (hex(id(self)), state)
+
+class WorkerPool(object):
+    '''
+    A bounded pool of daemon threads running submitted calls.
+    Threads are started on demand, up to ``workers``.
+    '''
+
+    def __init__(self, workers=4):
+        if workers < 1:
+            raise ValueError('A WorkerPool needs at least one worker.')
+        self.workers = workers
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._idle = 0
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def _work(self):
+        while True:
+            self._lock.acquire()
+            self._idle += 1
+            self._lock.release()
+            item = self._queue.get()
+            self._lock.acquire()
+            self._idle -= 1
+            self._lock.release()
+            if item is None:
+                return
+            future, function, args, kwargs = item
+            if not future._set_running():
+                continue
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                future._finish(exc_info=sys.exc_info())
+            else:
+                future._finish(result)
+
+    def submit(self, function, *args, **kwargs):
+        ''' Run ``function(*args, **kwargs)`` on the pool and return a ``KayakoFuture``. '''
+        if self._shutdown:
+            raise RuntimeError('Cannot submit to a WorkerPool that has been shut down.')
+        future = KayakoFuture()
+        self._queue.put((future, function, args, kwargs))
+        self._lock.acquire()
+        try:
+            if self._idle < self._queue.qsize() and len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        finally:
+            self._lock.release()
+        return future
+
+    def map(self, function, iterable):
+        ''' Submit ``function(item)`` for every item, returning the futures in order. '''
+        return [self.submit(function, item) for item in iterable]
+
+    def shutdown(self, wait=True):
+        ''' Stop the workers once the queued calls have run. '''
+        self._shutdown = True
+        for thread in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __str__(self):
+        return '<WorkerPool at %s: %s workers>' % (hex(id(self)), self.workers)
+
+def wait(futures, timeout=None):
+    '''
+    Wait for every future to finish, or for ``timeout`` seconds to pass.
+    Returns a tuple of (done, not_done) lists.
+    '''
+    deadline = None if timeout is None else time.time() + timeout
+    for future in futures:
+        remaining = None if deadline is None else max(0, deadline - time.time())
+        future._wait(remaining)
+    done = [future for future in futures if future.done()]
+    not_done = [future for future in futures if not future.done()]
+    return done, not_done
+
+_DONE = object()
+
+def prefetched(iterable, size=1):
+    '''
+    Iterates ``iterable`` on a daemon thread, keeping up to ``size`` items
+    ready ahead of the caller, so producing the next items overlaps with
+    processing the current one. An exception raised by ``iterable`` is
+    re-raised by the caller once the items before it have been used.
+    Closing the returned generator stops the thread after its current item.
+    '''
+    queue = Queue.Queue(size)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException:
+            put((None, sys.exc_info()))
+        else:
+            put((_DONE, None))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, exc_info = queue.get()
+            if exc_info:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import Queue
+import copy
+import math
+import re
+import sys
+import threading
+import time
+import urllib2
+from collections import deque
+
+__all__ = [
+    'LatencyTracker',
+    'HedgePolicy',
+]
+
+_ID_SEGMENT = re.compile(r'/-?\d+(?:,-?\d+)*(?=/|$)')
+
+def controller_key(controller):
+    '''
+    Normalize a controller path so every request to the same endpoint shares
+    one key, e.g. ``/Tickets/Ticket/123/`` becomes ``/Tickets/Ticket/*/``.
+    '''
+    return _ID_SEGMENT.sub('/*', controller)
+
+class LatencyTracker(object):
+    '''
+    Keeps the last ``window`` response times per controller and answers
+    percentile queries about them.
+    '''
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, controller, seconds):
+        key = controller_key(controller)
+        self._lock.acquire()
+        try:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+        finally:
+            self._lock.release()
+
+    def count(self, controller):
+        samples = self._samples.get(controller_key(controller))
+        return len(samples) if samples else 0
+
+    def percentile(self, controller, percentile):
+        '''
+        Returns the given percentile (0-100) of response times in seconds, or
+        None if nothing has been recorded for the controller.
+        '''
+        self._lock.acquire()
+        try:
+            samples = sorted(self._samples.get(controller_key(controller), ()))
+        finally:
+            self._lock.release()
+        if not samples:
+            return None
+        # Nearest-rank percentile
+        index = int(math.ceil(len(samples) * percentile / 100.0)) - 1
+        return samples[max(0, index)]
+
+    def stats(self):
+        '''
+        Returns a dictionary of controller key to ``dict(count=.., p50=.., p99=..)``.
+        '''
+        return dict((key, dict(count=len(self._samples[key]), p50=self.percentile(key, 50), p99=self.percentile(key, 99)))
+                    for key in self._samples.keys())
+
+class HedgePolicy(object):
+    '''
+    Hedged requests for idempotent GETs.
+
+    If a GET has not answered after the ``percentile`` response time of its
+    controller, a duplicate request is sent; whichever answers first is used
+    and the other is cancelled, or closed when it arrives if the transport
+    cannot cancel it.
+
+    The percentile is taken from the response times of original requests
+    only. An original that loses to its duplicate still counts: with the
+    time it took, or, if it was cancelled, with the time it had run for.
+
+    percentile    Response time percentile (0-100) to wait before hedging.
+    min_samples   Requests to observe for a controller before its percentile
+                  is trusted; ``initial_delay`` is used until then.
+    min_delay     Lower bound on the delay, in seconds.
+    max_delay     Upper bound on the delay, in seconds (None for no bound.)
+
+    ``hedged`` counts duplicate requests sent, ``wins`` counts how often a
+    duplicate answered first.
+    '''
+
+    def __init__(self, percentile=95, min_samples=20, initial_delay=1.0, min_delay=0.01, max_delay=None, window=200):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.tracker = LatencyTracker(window)
+        self.hedged = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def delay(self, controller):
+        ''' Seconds to wait for a response before sending a duplicate. '''
+        if self.tracker.count(controller) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = self.tracker.percentile(controller, self.percentile)
+        delay = max(delay, self.min_delay)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay
+
+    def _count(self, name):
+        self._lock.acquire()
+        try:
+            setattr(self, name, getattr(self, name) + 1)
+        finally:
+            self._lock.release()
+
+    def _attempt(self, urlopen, request, outcomes, attempt):
+        started = time.time()
+        try:
+            response = urlopen(request)
+        except Exception:
+            outcomes.put((attempt, False, sys.exc_info(), time.time() - started))
+        else:
+            outcomes.put((attempt, True, response, time.time() - started))
+
+    def _start(self, urlopen, request, outcomes, attempt):
+        thread = threading.Thread(target=self._attempt, args=(urlopen, request, outcomes, attempt))
+        thread.daemon = True
+        thread.start()
+
+    @staticmethod
+    def _close(ok, result):
+        ''' Close the response (or the body of an HTTPError) of an unused attempt. '''
+        if ok:
+            result.close()
+        elif isinstance(result[1], urllib2.HTTPError) and result[1].fp is not None:
+            result[1].close()
+
+    def _discard(self, outcomes, pending, controller, record):
+        '''
+        Close the responses of attempts that lost the race, recording the
+        time of the original if ``record``.
+        '''
+        for i in range(pending):
+            attempt, ok, result, seconds = outcomes.get()
+            if attempt == 0 and record and ok:
+                self.tracker.record(controller, seconds)
+            self._close(ok, result)
+
+    def urlopen(self, urlopen, request, controller, cancel=None):
+        '''
+        Open ``request`` with ``urlopen``, hedging it if it is slow.
+        ``cancel`` is called with the request of the attempt that lost, and
+        returns whether it was aborted, see ``Transport.cancel``.
+        '''
+        requests = [request, copy.copy(request)]
+        outcomes = Queue.Queue()
+        started = time.time()
+        self._start(urlopen, requests[0], outcomes, 0)
+        pending = 1
+        try:
+            outcome = outcomes.get(timeout=self.delay(controller))
+        except Queue.Empty:
+            self._count('hedged')
+            self._start(urlopen, requests[1], outcomes, 1)
+            pending += 1
+            outcome = outcomes.get()
+        pending -= 1
+
+        attempt, ok, result, seconds = outcome
+        if not ok and pending:
+            # The first answer was an error, give the other attempt a chance.
+            self._close(ok, result)
+            attempt, ok, result, seconds = outcomes.get()
+            pending -= 1
+
+        record = True
+        if attempt == 0 and ok:
+            self.tracker.record(controller, seconds)
+        if pending and cancel is not None:
+            elapsed = time.time() - started
+            if cancel(requests[1 - attempt]) and attempt == 1:
+                # The original lost and was cancelled, it took at least this long
+                self.tracker.record(controller, elapsed)
+                record = False
+        if pending:
+            cleanup = threading.Thread(target=self._discard, args=(outcomes, pending, controller, record))
+            cleanup.daemon = True
+            cleanup.start()
+
+        if not ok:
+            raise result[0], result[1], result[2]
+        if attempt:
+            self._count('wins')
+        return result
+
+    def __str__(self):
+        return '<HedgePolicy p%s hedged=%s wins=%s>' % (self.percentile, self.hedged, self.wins)
@@ -10,12 +10,15 @@ Created on May 5, 2011
 @author: evan
 '''
 
+from collections import MutableSequence
 from datetime import datetime
 
 __all__ = [
     'UnsetParameter',
     'FOREVER',
     'ParameterObject',
+    'LazyList',
+    'LazyCall',
     'NodeParser',
 ]
 
@@ -55,15 +58,19 @@ class ParameterObject(object):
     __parameters__ = []
     ''' Parameters that this ParameterObject can have. '''
 
+    __compact__ = False
+    ''' If True, unset parameters are not stored, __getattr__ supplies them. '''
+
     def __init__(self, **parameters):
         '''
         Creates this parameter object setting parameter values as given by
         keyword arguments.
         '''
         self._update_parameters(**parameters)
-        for parameter in self.__parameters__:
-            if parameter not in parameters:
-                setattr(self, parameter, UnsetParameter)
+        if not self.__compact__:
+            for parameter in self.__parameters__:
+                if parameter not in parameters:
+                    setattr(self, parameter, UnsetParameter)
 
     @property
     def parameters(self):
@@ -90,6 +97,88 @@ class ParameterObject(object):
     def __str__(self):
         return '<ParamterObject at %s>' % (hex(id(self)))
 
+class LazyCall(object):
+    '''
+    A picklable ``getattr(owner, name)(*args)``, the loader of a LazyList
+    whose items are requested from the API.
+    '''
+
+    def __init__(self, owner, name, *args):
+        self.owner = owner
+        self.name = name
+        self.args = args
+
+    def __call__(self):
+        return getattr(self.owner, self.name)(*self.args)
+
+    def __repr__(self):
+        return '<LazyCall %s.%s%r>' % (self.owner.__name__, self.name, self.args)
+
+class LazyList(MutableSequence):
+    '''
+    A list whose items are only built, by calling ``load``, the first time
+    it is used. Otherwise it behaves like the list ``load`` returns, and it
+    pickles as one; except that an unloaded list with a ``LazyCall`` loader
+    is pickled (and copied) unloaded, so that pickling sends no request.
+    Comparing with anything but a list does not load it either.
+    '''
+
+    def __init__(self, load):
+        self._load = load
+        self._items = None
+
+    @property
+    def loaded(self):
+        return self._items is not None
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = list(self._load())
+            self._load = None
+        return self._items
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __setitem__(self, index, value):
+        self.items[index] = value
+
+    def __delitem__(self, index):
+        del self.items[index]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def insert(self, index, value):
+        self.items.insert(index, value)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyList):
+            other = other.items
+        elif not isinstance(other, list):
+            return NotImplemented
+        return self.items == other
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __reduce__(self):
+        if self._items is None and isinstance(self._load, LazyCall):
+            return LazyList, (self._load,)
+        return list, (self.items,)
+
+    def __repr__(self):
+        if self._items is None:
+            return '<LazyList (not loaded)>'
+        return repr(self._items)
+
 class NodeParser(object):
     ''' Methods to parse text data from an lxml etree object. '''
 
@@ -125,6 +214,26 @@ class NodeParser(object):
         else:
             return datetime.fromtimestamp(value)
 
+    @staticmethod
+    def _parse_boolean(data, required=True, strict=True):
+        '''
+        Returns the boolean value of integer data. See _parse_int for
+        information on required and strict.
+        '''
+        value = NodeParser._parse_int(data, required=required, strict=strict)
+        if value is None:
+            return None
+        else:
+            if not strict:
+                return bool(value)
+            else:
+                if value == 0:
+                    return False
+                elif value == 1:
+                    return True
+                else:
+                    raise ValueError('Value for node not 1 or 0')
+
     @staticmethod
     def _get_int(node, required=True, strict=True):
         '''
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import threading
+import time
+
+from kayako.core.hedge import controller_key
+
+__all__ = [
+    'AIMDLimiter',
+    'LimitedResponse',
+]
+
+class AIMDLimiter(object):
+    '''
+    Caps the number of requests in flight, adapting the cap with
+    additive-increase/multiplicative-decrease.
+
+    While the cap is in use and response times stay near their usual level,
+    the cap grows by ``increase`` per round of ``limit`` requests. On an
+    error, or a response slower than ``tolerance`` times the usual response
+    time, it is multiplied by ``decrease`` (at most once per usual response
+    time, so one burst of failures only counts once.)
+
+    The usual response time is kept per controller (see
+    ``hedge.controller_key``), so a large listing after a run of small GETs
+    is not taken for a spike. ``baselines`` holds them.
+
+    initial    Starting cap.
+    minimum    The cap never goes below this.
+    maximum    The cap never goes above this.
+    increase   Additive step per round of requests.
+    decrease   Multiplicative factor on errors and latency spikes.
+    tolerance  How many times the usual response time counts as a spike.
+    smoothing  Weight of each new sample in the usual response time (EWMA.)
+
+    A thread that already holds a slot, because it is still reading a
+    streamed response, gets another one without waiting: a request made
+    while iterating over a listing would otherwise wait for itself.
+    '''
+
+    def __init__(self, initial=10, minimum=1, maximum=100, increase=1.0, decrease=0.5, tolerance=2.0, smoothing=0.1):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.baselines = {}
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = 0
+        self._holders = {}
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        '''
+        Wait for a free slot. Returns the ident of the thread holding it, to
+        pass to ``release`` if another thread frees the slot.
+        '''
+        owner = threading.current_thread().ident
+        self._condition.acquire()
+        try:
+            while self.in_flight >= int(self.limit) and not self._holders.get(owner):
+                self._condition.wait()
+            self.in_flight += 1
+            self._holders[owner] = self._holders.get(owner, 0) + 1
+        finally:
+            self._condition.release()
+        return owner
+
+    def release(self, latency, error=False, controller=None, owner=None):
+        '''
+        Free a slot of ``owner`` (by default the current thread), feeding
+        back how long the request to ``controller`` took in seconds and
+        whether the server was overloaded.
+        '''
+        key = controller_key(controller or '')
+        if owner is None:
+            owner = threading.current_thread().ident
+        self._condition.acquire()
+        try:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            held = self._holders.get(owner, 0) - 1
+            if held > 0:
+                self._holders[owner] = held
+            else:
+                self._holders.pop(owner, None)
+            baseline = self.baselines.get(key)
+            spike = baseline is not None and latency > baseline * self.tolerance
+            if error or spike:
+                now = time.time()
+                if now - self._last_decrease >= (baseline or 0):
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                if baseline is None:
+                    self.baselines[key] = latency
+                else:
+                    self.baselines[key] = baseline + self.smoothing * (latency - baseline)
+                if saturated and self.limit < self.maximum:
+                    self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+                    self.increases += 1
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+    def __str__(self):
+        return '<AIMDLimiter limit=%.1f in_flight=%s>' % (self.limit, self.in_flight)
+
+class LimitedResponse(object):
+    '''
+    File-like wrapper around a response that holds a limiter slot until the
+    body has been read to the end, or the response is closed or dropped, so
+    a streamed listing counts as in flight while it downloads. ``release``
+    is called once, without arguments.
+    '''
+
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+
+    def _done(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def read(self, size=-1):
+        data = self._response.read(size)
+        if not data or size is None or size < 0:
+            self._done()
+        return data
+
+    def readline(self, size=-1):
+        line = self._response.readline(size)
+        if not line:
+            self._done()
+        return line
+
+    def close(self):
+        try:
+            self._response.close()
+        finally:
+            self._done()
+
+    def __getattr__(self, name):
+        # getcode, geturl, info, headers, ...
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._response, name)
+
+    def __del__(self):
+        self._done()
+
+    def __str__(self):
+        return '<LimitedResponse %s>' % self._response
@@ -56,6 +56,17 @@ class KayakoRequestParser(NodeParser):
     def __str__(self):
         return '<KayakoRequestParser at %s>' % (hex(id(self)))
 
+def _compact_instance(cls, state):
+    ''' Unpickles an instance of ``cls.compact()`` from its attributes. '''
+    compact = cls.compact()
+    instance = compact.__new__(compact)
+    if hasattr(compact, '__setstate__'):
+        instance.__setstate__(state)
+    else:
+        for name, value in state.iteritems():
+            setattr(instance, name, value)
+    return instance
+
 class KayakoObject(ParameterObject, KayakoRequestParser):
     ''' Kayako Object class meant to built from a factory. '''
 
@@ -73,10 +84,74 @@ class KayakoObject(ParameterObject, KayakoRequestParser):
     __save_parameters__ = []
     ''' Parameters sent when saving this object. '''
 
+    __filter_pushdown__ = {}
+    ''' Filter keys get_all can filter on the server, mapped to its argument names. '''
+
     def __init__(self, api, **parameters):
         ParameterObject.__init__(self, **parameters)
         self.api = api
 
+    _compact_classes = {}
+
+    @classmethod
+    def compact(cls):
+        '''
+        Returns a subclass of this class storing its parameters in
+        ``__slots__`` instead of an instance dictionary. Unset parameters are
+        not stored at all and read as UnsetParameter, so objects with many
+        parameters (Tickets, Users) take a fraction of the memory. Other
+        attributes can still be set on them. Pass it anywhere the class is
+        accepted:
+
+            >>> tickets = api.get_all(Ticket.compact(), departmentid)
+            >>> isinstance(tickets[0], Ticket)
+            True
+        '''
+        if cls.__compact__:
+            return cls
+        compact = KayakoObject._compact_classes.get(cls)
+        if compact is None:
+            slots = []
+            for name in ['api'] + list(cls.__parameters__):
+                # Leave out names the class already defines as descriptors
+                attribute = getattr(cls, name, None)
+                if name not in slots and not hasattr(attribute, '__get__'):
+                    slots.append(name)
+            parameters = frozenset(cls.__parameters__)
+            base_getattr = getattr(cls, '__getattr__', None)
+
+            def __getattr__(self, name):
+                if base_getattr is not None:
+                    return base_getattr(self, name)
+                if name in parameters:
+                    return UnsetParameter
+                raise AttributeError("'%s' object has no attribute '%s'" % (cls.__name__, name))
+
+            def __reduce__(self):
+                # The class is built at runtime, so pickle the base class and
+                # the set attributes, and look the compact class up again.
+                if hasattr(cls, '__getstate__'):
+                    state = self.__getstate__()
+                else:
+                    state = dict(getattr(self, '__dict__', {}))
+                for name in slots:
+                    try:
+                        state[name] = object.__getattribute__(self, name)
+                    except AttributeError:
+                        pass
+                return _compact_instance, (cls, state)
+
+            compact = type(cls)(cls.__name__, (cls,), dict(
+                __slots__=tuple(slots),
+                __compact__=True,
+                __module__=cls.__module__,
+                __doc__=cls.__doc__,
+                __getattr__=__getattr__,
+                __reduce__=__reduce__,
+            ))
+            KayakoObject._compact_classes[cls] = compact
+        return compact
+
     ## ParameterObject
 
     @property
@@ -107,6 +182,40 @@ class KayakoObject(ParameterObject, KayakoRequestParser):
         ''' Get all instances of this object from Kayako. '''
         raise KayakoMethodNotImplementedError('GET ALL %s is not implemented for this object.' % cls.__name__)
 
+    @classmethod
+    def iter_all(cls, api, *args, **kwargs):
+        '''
+        Generator version of ``get_all``: yields each instance as soon as its
+        element has been parsed from the response, without building the whole
+        document or a list.
+        '''
+        raise KayakoMethodNotImplementedError('GET ALL %s is not implemented for this object.' % cls.__name__)
+
+    @classmethod
+    def _parse(cls, api, response):
+        '''
+        Parses a response with one of the api's pooled parsers, counting the
+        time under this class name in ``api.parsers.stats()``.
+        '''
+        return api.parsers.parse(response, cls.__name__)
+
+    @classmethod
+    def _iterparse(cls, api, response, tag):
+        '''
+        Incrementally parses a response, yielding each ``tag`` element
+        directly under the root once it is complete. Yielded elements, and
+        the siblings before them, are cleared when the caller asks for the
+        next one, so memory does not grow with the length of the list.
+        '''
+        for event, element in api.parsers.iterparse(response, cls.__name__):
+            parent = element.getparent()
+            if element.tag != tag or parent is None or parent.getparent() is not None:
+                continue
+            yield element
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
     @classmethod
     def get(cls, api, *args):
         ''' Get an instance of this object by ID '''
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import re
+import threading
+import time
+
+from lxml import etree
+
+__all__ = [
+    'PrefixSkippingReader',
+    'ParserPool',
+]
+
+class PrefixSkippingReader(object):
+    '''
+    Wraps a response, skipping any text the server wrote before the XML
+    document (PHP notices, for instance) while the rest is read through
+    unchanged and in chunks.
+
+    Text already starting the document (an XML declaration, a doctype or
+    an element other than the ``PREFIX_TAGS`` HTML a notice starts with)
+    is read as it is. Otherwise the document is expected to start with an
+    XML declaration, searched for within the first ``PEEK_SIZE`` bytes.
+    Without one, a first line starting with ``<div`` is dropped. ``prefix``
+    holds the skipped text.
+    '''
+
+    PEEK_SIZE = 65536
+    PREFIX_TAGS = ('br', 'div', 'b')
+    ELEMENT = re.compile(r'\s*<([A-Za-z_:][-\w.:]*)')
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.prefix = None
+        self._buffer = None
+
+    def _starts_document(self, text):
+        stripped = text.lstrip()
+        if stripped.startswith('<?xml') or stripped.startswith('<!'):
+            return True
+        match = self.ELEMENT.match(stripped)
+        return match is not None and match.group(1).lower() not in self.PREFIX_TAGS
+
+    def _skip_prefix(self):
+        head = ''
+        while len(head) < self.PEEK_SIZE:
+            chunk = self.fileobj.read(self.PEEK_SIZE - len(head))
+            if not chunk:
+                break
+            head += chunk
+            if self._starts_document(head):
+                # A '<?xml' further on is part of the document's content
+                self.prefix = ''
+                return head
+            if head.startswith('<div') and '\n' in head:
+                start = head.index('\n') + 1
+                if self._starts_document(head[start:]):
+                    self.prefix = head[:start]
+                    return head[start:]
+            start = head.find('<?xml')
+            if start > 0:
+                self.prefix = head[:start]
+                return head[start:]
+        if head.startswith('<div') and '\n' in head:
+            start = head.index('\n') + 1
+            self.prefix = head[:start]
+            return head[start:]
+        self.prefix = ''
+        return head
+
+    def read(self, size=-1):
+        if self._buffer is None:
+            self._buffer = self._skip_prefix()
+        if self._buffer:
+            if size < 0:
+                data, self._buffer = self._buffer + self.fileobj.read(), ''
+            else:
+                data, self._buffer = self._buffer[:size], self._buffer[size:]
+            return data
+        return self.fileobj.read(size)
+
+    def close(self):
+        self.fileobj.close()
+
+class ParserPool(object):
+    '''
+    Keeps configured ``etree.XMLParser`` instances for reuse, so a response
+    does not pay for a new parser context. A parser is only ever used by
+    one thread at a time.
+
+    Parsers drop whitespace between nodes, never access the network and
+    neither load DTDs nor resolve entities.
+
+    maxsize    The number of idle parsers kept.
+    huge_tree  Lift libxml2's limits on tree depth and text node size, for
+               very large ticket listings.
+
+    ``iterparse`` feeds pooled ``etree.XMLPullParser`` instances, kept per
+    set of events, in the same way.
+
+    The time spent reading and parsing responses is counted per name
+    (usually the KayakoObject class), see ``stats``.
+    '''
+
+    CHUNK_SIZE = 65536
+
+    def __init__(self, maxsize=8, huge_tree=False):
+        self.maxsize = maxsize
+        self.options = dict(remove_blank_text=True, no_network=True, load_dtd=False, resolve_entities=False, huge_tree=huge_tree)
+        self._idle = []
+        self._idle_pull = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _get_parser(self):
+        self._lock.acquire()
+        try:
+            if self._idle:
+                return self._idle.pop()
+        finally:
+            self._lock.release()
+        return etree.XMLParser(**self.options)
+
+    def _put_parser(self, parser):
+        self._lock.acquire()
+        try:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(parser)
+        finally:
+            self._lock.release()
+
+    def _get_pull_parser(self, events):
+        self._lock.acquire()
+        try:
+            idle = self._idle_pull.get(events)
+            if idle:
+                return idle.pop()
+        finally:
+            self._lock.release()
+        return etree.XMLPullParser(events=events, **self.options)
+
+    def _put_pull_parser(self, events, parser):
+        self._lock.acquire()
+        try:
+            idle = self._idle_pull.setdefault(events, [])
+            if len(idle) < self.maxsize:
+                idle.append(parser)
+        finally:
+            self._lock.release()
+
+    def record(self, name, seconds):
+        ''' Counts a parse of ``seconds`` under ``name``. '''
+        self._lock.acquire()
+        try:
+            stats = self._stats.setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+        finally:
+            self._lock.release()
+
+    def parse(self, source, name=None):
+        '''
+        ``etree.parse`` with a pooled parser. File-like sources are read
+        through a ``PrefixSkippingReader``.
+        '''
+        if hasattr(source, 'read'):
+            source = PrefixSkippingReader(source)
+        parser = self._get_parser()
+        start = time.time()
+        try:
+            return etree.parse(source, parser)
+        finally:
+            self.record(name, time.time() - start)
+            self._put_parser(parser)
+
+    def fromstring(self, text, name=None):
+        ''' ``etree.fromstring`` with a pooled parser. '''
+        parser = self._get_parser()
+        start = time.time()
+        try:
+            return etree.fromstring(text, parser)
+        finally:
+            self.record(name, time.time() - start)
+            self._put_parser(parser)
+
+    def iterparse(self, source, name=None, events=('end',)):
+        '''
+        Like ``etree.iterparse``, feeding the file-like ``source`` to a
+        pooled pull parser in ``CHUNK_SIZE`` reads through a
+        ``PrefixSkippingReader``. Events are yielded once their chunk has
+        been parsed. The time spent reading and parsing, but not in the
+        caller's loop, is counted once the parse ends.
+
+        A parser is only handed back to the pool when the document was
+        parsed to its end.
+        '''
+        events = tuple(events)
+        source = PrefixSkippingReader(source)
+        parser = self._get_pull_parser(events)
+        seconds = 0.0
+        finished = False
+        try:
+            while not finished:
+                start = time.time()
+                try:
+                    data = source.read(self.CHUNK_SIZE)
+                    if data:
+                        parser.feed(data)
+                    else:
+                        parser.close()
+                        finished = True
+                    items = list(parser.read_events())
+                finally:
+                    seconds += time.time() - start
+                for item in items:
+                    yield item
+        finally:
+            self.record(name, seconds)
+            if finished:
+                self._put_pull_parser(events, parser)
+
+    def stats(self):
+        '''
+        Returns a dictionary of name to ``dict(count=.., seconds=..)``.
+        '''
+        self._lock.acquire()
+        try:
+            return dict((name, dict(count=count, seconds=seconds)) for name, (count, seconds) in self._stats.iteritems())
+        finally:
+            self._lock.release()
+
+    def reset_stats(self):
+        self._lock.acquire()
+        try:
+            self._stats = {}
+        finally:
+            self._lock.release()
+
+    def __str__(self):
+        return '<ParserPool maxsize=%s idle=%s>' % (self.maxsize, len(self._idle))
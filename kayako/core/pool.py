@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import base64
+import errno
+import httplib
+import socket
+import threading
+import urllib
+import urllib2
+import urlparse
+import zlib
+
+from kayako.core.transport import Transport
+
+__all__ = [
+    'HTTPConnectionPool',
+    'PooledResponse',
+]
+
+class PooledResponse(object):
+    '''
+    File-like wrapper around an ``httplib.HTTPResponse`` that hands its
+    connection back to the pool once the body has been read completely.
+
+    gzip and deflate encoded bodies are decompressed as they are read, so
+    the whole compressed body is never held in memory, and ``read(size)``
+    only decompresses about as much as it returns.
+    '''
+
+    CHUNK_SIZE = 16384
+
+    def __init__(self, pool, key, connection, response, url):
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self._url = url
+        self.code = response.status
+        self.msg = response.reason
+        self.headers = response.msg
+        self._decoder = None
+        self._buffer = ''
+        self._offset = 0
+        self._probe_raw_deflate = False
+        encoding = (response.getheader('content-encoding') or '').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._decoder = zlib.decompressobj()
+            self._probe_raw_deflate = True
+
+    def _read_raw(self, size):
+        if self._response is None:
+            return ''
+        if size is None or size < 0:
+            data = self._response.read()
+        else:
+            data = self._response.read(size)
+        if not data or self._response.isclosed():
+            self._release()
+        return data
+
+    def _decompress(self, data, limit):
+        try:
+            decoded = self._decoder.decompress(data, limit)
+        except zlib.error:
+            # Some servers send raw deflate data without the zlib header.
+            if not self._probe_raw_deflate:
+                raise
+            self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            decoded = self._decoder.decompress(data, limit)
+        self._probe_raw_deflate = False
+        return decoded
+
+    def _more(self, size):
+        '''
+        Returns the next part of the (decoded) body, at most
+        ``max(size, CHUNK_SIZE)`` bytes, or '' at its end.
+        '''
+        limit = max(size, self.CHUNK_SIZE)
+        if self._decoder is None:
+            return self._read_raw(limit)
+        while True:
+            # Input left over from the last limited call comes first
+            raw = self._decoder.unconsumed_tail or self._read_raw(self.CHUNK_SIZE)
+            if not raw:
+                return self._decoder.flush()
+            decoded = self._decompress(raw, limit)
+            if decoded:
+                return decoded
+
+    def _available(self):
+        return len(self._buffer) - self._offset
+
+    def _take(self, size):
+        ''' Returns up to ``size`` bytes from the buffer. '''
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += len(data)
+        if self._offset >= len(self._buffer):
+            self._buffer, self._offset = '', 0
+        return data
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = [self._take(self._available())]
+            if self._decoder is None:
+                parts.append(self._read_raw(-1))
+            else:
+                data = self._more(self.CHUNK_SIZE)
+                while data:
+                    parts.append(data)
+                    data = self._more(self.CHUNK_SIZE)
+            return ''.join(parts)
+        if not self._available() and self._decoder is None:
+            return self._read_raw(size)
+        parts = [self._take(size)]
+        needed = size - len(parts[0])
+        while needed > 0:
+            data = self._more(needed)
+            if not data:
+                break
+            if len(data) > needed:
+                # Keep the rest for the next read
+                self._buffer, self._offset = data, needed
+                data = data[:needed]
+            parts.append(data)
+            needed -= len(data)
+        return ''.join(parts)
+
+    def readline(self, size=-1):
+        parts = []
+        length = 0
+        while size < 0 or length < size:
+            if not self._available():
+                data = self._more(0)
+                if not data:
+                    break
+                self._buffer, self._offset = data, 0
+            end = self._buffer.find('\n', self._offset)
+            stop = len(self._buffer) if end < 0 else end + 1
+            if size >= 0:
+                stop = min(stop, self._offset + size - length)
+            line = self._take(stop - self._offset)
+            parts.append(line)
+            length += len(line)
+            if line.endswith('\n'):
+                break
+        return ''.join(parts)
+
+    def _release(self):
+        ''' Return the connection to the pool, or drop it if it cannot be reused. '''
+        if self._connection is None:
+            return
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool._put_connection(self._key, self._connection)
+        else:
+            self._connection.close()
+        self._connection = None
+
+    def close(self):
+        if self._connection is not None:
+            if not self._response.isclosed():
+                # Unread data is still on the wire, the connection is unusable.
+                self._connection.close()
+                self._connection = None
+            else:
+                self._release()
+        self._response = None
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self._url
+
+    def info(self):
+        return self.headers
+
+    def __str__(self):
+        return '<PooledResponse %s: %s>' % (self.code, self._url)
+
+class HTTPConnectionPool(Transport):
+    '''
+    The default ``Transport``. Keeps idle HTTP/1.1 keep-alive connections
+    around, per host, so that consecutive requests do not pay for a new TCP
+    (and TLS) handshake.
+
+    maxsize    The number of idle connections kept per host.
+    timeout    Socket timeout for new connections.
+    compress   Ask for gzip or deflate encoded responses.
+    proxies    A dictionary of scheme to proxy URL, like ``urllib2.ProxyHandler``
+               takes. By default the proxies are read from the environment
+               (``http_proxy``, ``https_proxy`` and ``no_proxy``.)
+
+    ``hits`` and ``misses`` count how many requests reused an idle connection
+    and how many had to open a new one.
+    '''
+
+    CONNECTION_CLASSES = {
+        'http': httplib.HTTPConnection,
+        'https': httplib.HTTPSConnection,
+    }
+
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    ''' Methods sent again if a reused connection drops before the response. '''
+
+    DROPPED_ERRNOS = (errno.ECONNRESET, errno.EPIPE, errno.EBADF)
+
+    REDIRECT_CODES = (301, 302, 303, 307)
+    MAX_REDIRECTS = 10
+
+    def __init__(self, maxsize=4, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, compress=True, proxies=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.compress = compress
+        self.proxies = urllib.getproxies() if proxies is None else proxies
+        self.hits = 0
+        self.misses = 0
+        self._host_stats = {}
+        self._idle = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _count(self, key, hit):
+        self._lock.acquire()
+        try:
+            stats = self._host_stats.setdefault(key, [0, 0])
+            if hit:
+                self.hits += 1
+                stats[0] += 1
+            else:
+                self.misses += 1
+                stats[1] += 1
+        finally:
+            self._lock.release()
+
+    def _get_connection(self, key):
+        '''
+        Returns a tuple of (connection, reused).
+        '''
+        self._lock.acquire()
+        try:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        finally:
+            self._lock.release()
+        scheme, host, port = key
+        if scheme not in self.CONNECTION_CLASSES:
+            raise urllib2.URLError('unknown url type: %s' % scheme)
+        proxy = self._proxy(key)
+        if proxy is None:
+            return self.CONNECTION_CLASSES[scheme](host, port, timeout=self.timeout), False
+        proxy_scheme, proxy_host, proxy_port, authorization = proxy
+        connection = self.CONNECTION_CLASSES[scheme](proxy_host, proxy_port, timeout=self.timeout)
+        if scheme == 'https':
+            # Tunnel through the proxy with CONNECT
+            connection.set_tunnel(host, port, {'Proxy-Authorization': authorization} if authorization else None)
+        return connection, False
+
+    def _proxy(self, key):
+        '''
+        Returns ``(scheme, host, port, authorization)`` of the proxy to send
+        requests for ``key`` through, or None to connect directly.
+        '''
+        scheme, host, port = key
+        proxy = self.proxies.get(scheme)
+        if not proxy or urllib.proxy_bypass(host):
+            return None
+        if '://' not in proxy:
+            proxy = 'http://%s' % proxy
+        parts = urlparse.urlsplit(proxy)
+        authorization = None
+        if parts.username is not None:
+            credentials = '%s:%s' % (urllib.unquote(parts.username), urllib.unquote(parts.password or ''))
+            authorization = 'Basic %s' % base64.b64encode(credentials)
+        return parts.scheme, parts.hostname, parts.port or 80, authorization
+
+    def _put_connection(self, key, connection):
+        self._lock.acquire()
+        try:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(connection)
+                return
+        finally:
+            self._lock.release()
+        connection.close()
+
+    def stats(self):
+        '''
+        Returns a dictionary of ``(scheme, host, port)`` to ``dict(hits=.., misses=.., idle=..)``.
+        '''
+        self._lock.acquire()
+        try:
+            return dict((key, dict(hits=hits, misses=misses, idle=len(self._idle.get(key, []))))
+                        for key, (hits, misses) in self._host_stats.iteritems())
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        ''' Close every idle connection. '''
+        self._lock.acquire()
+        try:
+            idle, self._idle = self._idle, {}
+        finally:
+            self._lock.release()
+        for connections in idle.itervalues():
+            for connection in connections:
+                connection.close()
+
+    def close(self):
+        self.clear()
+
+    def _begin(self, request, connection):
+        ''' Marks ``request`` as in flight on ``connection``, unless it was cancelled. '''
+        self._lock.acquire()
+        try:
+            if request in self._in_flight and self._in_flight[request] is None:
+                return False
+            self._in_flight[request] = connection
+            return True
+        finally:
+            self._lock.release()
+
+    def _cancelled(self, request):
+        self._lock.acquire()
+        try:
+            return request in self._in_flight and self._in_flight[request] is None
+        finally:
+            self._lock.release()
+
+    def _end(self, request):
+        self._lock.acquire()
+        try:
+            self._in_flight.pop(request, None)
+        finally:
+            self._lock.release()
+
+    def cancel(self, request):
+        '''
+        Shut down the connection ``request`` is being sent or waiting on,
+        so that its ``urlopen`` raises ``urllib2.URLError``. A request whose
+        response has arrived, or that has not been started, is left alone
+        and False is returned.
+        '''
+        self._lock.acquire()
+        try:
+            if request not in self._in_flight:
+                return False
+            connection, self._in_flight[request] = self._in_flight[request], None
+        finally:
+            self._lock.release()
+        if connection is not None and connection.sock is not None:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        return True
+
+    def _dropped(self, error):
+        '''
+        Returns whether ``error`` shows an idle connection closed by the
+        server (not a timeout, which means the server has the request.)
+        '''
+        if isinstance(error, httplib.BadStatusLine):
+            return True
+        if isinstance(error, socket.timeout):
+            return False
+        return isinstance(error, socket.error) and error.errno in self.DROPPED_ERRNOS
+
+    def _send(self, request, key, selector, method, body, headers):
+        '''
+        Sends one request over a pooled connection for ``key`` and returns
+        the ``httplib.HTTPResponse`` and the connection it arrived on.
+        '''
+        try:
+            while True:
+                connection, reused = self._get_connection(key)
+                if not self._begin(request, connection):
+                    self._put_connection(key, connection)
+                    raise urllib2.URLError('Request cancelled')
+                try:
+                    if body is None or isinstance(body, basestring):
+                        connection.request(method, selector, body, headers)
+                    else:
+                        # Stream an iterable body (e.g. FormData) chunk by chunk
+                        headers.setdefault('Content-length', str(len(body)))
+                        connection.request(method, selector, None, headers)
+                        for chunk in body:
+                            connection.send(chunk)
+                except (socket.error, httplib.HTTPException), error:
+                    connection.close()
+                    if reused and self._dropped(error) and not self._cancelled(request):
+                        # The server dropped an idle keep-alive connection, try a fresh one.
+                        continue
+                    raise urllib2.URLError(error)
+                try:
+                    response = connection.getresponse()
+                except (socket.error, httplib.HTTPException), error:
+                    connection.close()
+                    # The request went out, so only send it again if that is safe
+                    if reused and method in self.IDEMPOTENT_METHODS and self._dropped(error) and not self._cancelled(request):
+                        continue
+                    raise urllib2.URLError(error)
+                break
+        finally:
+            self._end(request)
+        self._count(key, reused)
+        return response, connection
+
+    def _redirect(self, method, status):
+        '''
+        Returns the method to follow a ``status`` redirect with, or None if
+        it is not followed; the same rules as ``urllib2.HTTPRedirectHandler``.
+        '''
+        if status not in self.REDIRECT_CODES:
+            return None
+        if method in ('GET', 'HEAD'):
+            return method
+        if method == 'POST' and status != 307:
+            # The body is dropped, like browsers do
+            return 'GET'
+        return None
+
+    def urlopen(self, request):
+        '''
+        Send a ``urllib2.Request`` over a pooled connection.
+
+        Behaves like ``urllib2.urlopen``: follows redirects, goes through
+        the configured proxies, raises ``urllib2.HTTPError`` for other non
+        2xx responses and ``urllib2.URLError`` when the server cannot be
+        reached.
+        '''
+        url = request.get_full_url()
+        method = request.get_method()
+        body = request.get_data()
+        headers = dict(request.header_items())
+        if body is not None and 'Content-type' not in headers:
+            headers['Content-type'] = 'application/x-www-form-urlencoded'
+        headers.setdefault('User-agent', 'Python-urllib/%s' % urllib2.__version__)
+        if self.compress:
+            headers.setdefault('Accept-encoding', 'gzip, deflate')
+
+        visited = set()
+        while True:
+            parts = urlparse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            port = parts.port or (443 if scheme == 'https' else 80)
+            key = (scheme, parts.hostname, port)
+            proxy = self._proxy(key)
+            if proxy is not None and scheme == 'http':
+                # Plain HTTP proxies take the whole URL
+                selector = urlparse.urlunsplit((scheme, parts.netloc, parts.path or '/', parts.query, ''))
+                if proxy[3]:
+                    headers['Proxy-authorization'] = proxy[3]
+            else:
+                selector = parts.path or '/'
+                if parts.query:
+                    selector = '%s?%s' % (selector, parts.query)
+
+            response, connection = self._send(request, key, selector, method, body, headers)
+            pooled = PooledResponse(self, key, connection, response, url)
+            location = response.getheader('location') or response.getheader('uri')
+            redirect = self._redirect(method, response.status) if location else None
+            if redirect is None:
+                break
+            location = urlparse.urljoin(url, location)
+            if urlparse.urlsplit(location).scheme.lower() not in self.CONNECTION_CLASSES:
+                break
+            if location in visited or len(visited) >= self.MAX_REDIRECTS:
+                raise urllib2.HTTPError(url, response.status, 'HTTP Error %s: redirect loop' % response.status, response.msg, pooled)
+            visited.add(location)
+            # Read the rest of the body so the connection can be reused
+            pooled.read()
+            pooled.close()
+            if redirect != method:
+                method, body = redirect, None
+                for header in ('Content-type', 'Content-length'):
+                    headers.pop(header, None)
+            headers.pop('Proxy-authorization', None)
+            url = location
+
+        if not 200 <= response.status < 300:
+            raise urllib2.HTTPError(url, response.status, response.reason, response.msg, pooled)
+        return pooled
+
+    def __str__(self):
+        return '<HTTPConnectionPool maxsize=%s hits=%s misses=%s>' % (self.maxsize, self.hits, self.misses)
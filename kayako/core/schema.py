@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from functools import partial
+
+from kayako.core.lib import NodeParser
+from kayako.exception import KayakoResponseError
+
+__all__ = [
+    'Field',
+    'Schema',
+]
+
+class Field(object):
+    '''
+    A parameter parsed from the text of a child node of a response element.
+
+    name      The parameter name.
+    kind      'str', 'int', 'date', 'bool', or 'list' for the texts of every
+              child with the tag.
+    tag       The tag of the child node, if it differs from ``name``.
+    required  See NodeParser._get_int.
+    strict    See NodeParser._get_int.
+    '''
+
+    KINDS = ('str', 'int', 'date', 'bool', 'list')
+
+    def __init__(self, name, kind='str', tag=None, required=True, strict=True):
+        if kind not in self.KINDS:
+            raise ValueError('Unknown field kind: %s' % kind)
+        self.name = name
+        self.kind = kind
+        self.tag = tag or name
+        self.required = required
+        self.strict = strict
+
+    def converter(self):
+        '''
+        Returns a function converting the node text (None when the node is
+        missing) the way the matching NodeParser._get_* method converts the
+        node, or None if the text is used as it is.
+        '''
+        if self.kind in ('str', 'list'):
+            return None
+        elif self.kind == 'int' and self.required:
+            return int
+        parse = dict(int=NodeParser._parse_int, date=NodeParser._parse_date, bool=NodeParser._parse_boolean)[self.kind]
+        return partial(parse, required=self.required, strict=self.strict)
+
+    def __repr__(self):
+        return 'Field(%r, %r, tag=%r, required=%r, strict=%r)' % (self.name, self.kind, self.tag, self.required, self.strict)
+
+class Schema(object):
+    '''
+    Parses the parameters described by a list of Fields from a response
+    element in one pass over its children, instead of one ``find`` per
+    field. Results are the same as the NodeParser._get_* methods would
+    give: like ``find``, only the first child with a tag is used, and
+    conversion errors are raised as KayakoResponseError.
+    '''
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self._converters = [(field.name, field.tag, field.converter()) for field in self.fields if field.kind != 'list']
+        self._single = frozenset(field.tag for field in self.fields if field.kind != 'list')
+        self._lists = [(field.name, field.tag) for field in self.fields if field.kind == 'list']
+        self._list_tags = frozenset(tag for name, tag in self._lists)
+        self._by_name = dict((field.name, field) for field in self.fields)
+
+    def parse(self, element):
+        ''' Returns a dictionary of parameter values parsed from ``element``. '''
+        single = self._single
+        list_tags = self._list_tags
+        texts = {}
+        lists = {}
+        for child in element:
+            tag = child.tag
+            if tag in single and tag not in texts:
+                texts[tag] = child.text
+            if tag in list_tags:
+                lists.setdefault(tag, []).append(child.text)
+
+        params = {}
+        for name, tag in self._lists:
+            params[name] = lists.get(tag, [])
+        name = tag = None
+        try:
+            for name, tag, convert in self._converters:
+                if convert is None:
+                    params[name] = texts.get(tag)
+                else:
+                    params[name] = convert(texts.get(tag))
+        except Exception, error:
+            raise KayakoResponseError('There was an error parsing the response (%s %s: %r):\n\t%s' % (element.tag, name, texts.get(tag), error))
+        return params
+
+    def parse_field(self, element, name):
+        ''' Parses the single parameter ``name`` from ``element``. '''
+        field = self._by_name[name]
+        if field.kind == 'list':
+            return [child.text for child in element.iterchildren(field.tag)]
+        node = element.find(field.tag)
+        text = node.text if node is not None else None
+        convert = field.converter()
+        if convert is None:
+            return text
+        try:
+            return convert(text)
+        except Exception, error:
+            raise KayakoResponseError('There was an error parsing the response (%s %s: %r):\n\t%s' % (element.tag, name, text, error))
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self.fields)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+import abc
+import hashlib
+import os
+import re
+import threading
+import urllib
+import urllib2
+import urlparse
+
+from kayako.core.cache import CachedResponse
+from kayako.core.form import FormData
+
+__all__ = [
+    'Transport',
+    'UrllibTransport',
+    'RecordingTransport',
+    'ReplayTransport',
+]
+
+class Transport(object):
+    '''
+    The wire layer used by ``KayakoAPI._request``. Subclasses implement
+    ``urlopen``, and may implement ``cancel`` and ``close``.
+    '''
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def urlopen(self, request):
+        '''
+        Sends a ``urllib2.Request`` and returns a file-like response with
+        ``read`` and ``getcode``. Like ``urllib2.urlopen``, raises
+        ``urllib2.HTTPError`` for error responses and ``urllib2.URLError``
+        when the server cannot be reached.
+        '''
+
+    def cancel(self, request):
+        '''
+        Abort ``request`` if it is being sent or waiting for its response,
+        so the pending ``urlopen`` raises ``urllib2.URLError``. Returns
+        whether it was aborted; transports that cannot abort a request leave
+        it to finish.
+        '''
+        return False
+
+    def close(self):
+        ''' Release any resources held by this transport. '''
+        pass
+
+    def __str__(self):
+        return '<%s at %s>' % (self.__class__.__name__, hex(id(self)))
+
+class UrllibTransport(Transport):
+    ''' Sends every request with ``urllib2.urlopen``, one connection each. '''
+
+    def urlopen(self, request):
+        data = request.get_data()
+        if data is not None and not isinstance(data, basestring):
+            # urllib2 can only send string bodies
+            request.add_data(''.join(data))
+        return urllib2.urlopen(request)
+
+AUTH_PARAMETERS = ('apikey', 'salt', 'signature')
+
+def request_key(request):
+    '''
+    Returns a stable key for a ``urllib2.Request``: the method, controller
+    and parameters, leaving out the per-request authentication salt and
+    signature.
+    '''
+    parts = urlparse.urlsplit(request.get_full_url())
+    query = urlparse.parse_qsl(parts.query, keep_blank_values=True)
+    data = request.get_data()
+    if data:
+        query.extend(urlparse.parse_qsl(str(data), keep_blank_values=True))
+    controller = ''
+    parameters = []
+    for key, value in query:
+        if key == 'e':
+            controller = value
+        elif key not in AUTH_PARAMETERS:
+            parameters.append((key, value))
+    parameters.sort()
+    return '%s %s?%s' % (request.get_method(), controller, urllib.urlencode(parameters))
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+def request_filename(key):
+    ''' Returns a file name for a request key, readable with a short hash. '''
+    method, rest = key.split(' ', 1)
+    controller = rest.split('?', 1)[0]
+    slug = _UNSAFE.sub('_', controller).strip('_')[:80]
+    return '%s_%s_%s.xml' % (method, slug, hashlib.sha1(key).hexdigest()[:10])
+
+class RecordingTransport(Transport):
+    '''
+    Wraps another transport and saves every successful response body into
+    ``directory``, to be served later by a ``ReplayTransport``.
+    '''
+
+    def __init__(self, transport, directory):
+        self.transport = transport
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def urlopen(self, request):
+        response = self.transport.urlopen(request)
+        body = response.read()
+        with open(os.path.join(self.directory, request_filename(request_key(request))), 'wb') as recording:
+            recording.write(body)
+        return CachedResponse(body, request.get_full_url())
+
+    def cancel(self, request):
+        return self.transport.cancel(request)
+
+    def close(self):
+        self.transport.close()
+
+class ReplayTransport(Transport):
+    '''
+    Serves response bodies recorded by a ``RecordingTransport`` (or written
+    by hand, see ``filename``) from ``directory`` without any network access.
+    Requests that were not recorded get an HTTP 404.
+
+    Bodies are kept in memory after the first read, so repeated requests
+    only cost the parsing.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.requests = []
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def filename(method, controller, **parameters):
+        '''
+        Returns the file name a request is recorded under, e.g.
+        ``ReplayTransport.filename('GET', '/Base/Department')``. The
+        parameters are sanitized and encoded as ``KayakoAPI`` sends them.
+        '''
+        # KayakoAPI imports this module
+        from kayako.api import KayakoAPI
+        data = ''.join(FormData(KayakoAPI._sanitize_parameters(**parameters))) if parameters else ''
+        query = sorted(urlparse.parse_qsl(data, keep_blank_values=True))
+        return request_filename('%s %s?%s' % (method, controller, urllib.urlencode(query)))
+
+    def _body(self, filename):
+        self._lock.acquire()
+        try:
+            body = self._bodies.get(filename)
+            if body is None:
+                path = os.path.join(self.directory, filename)
+                if not os.path.exists(path):
+                    return None
+                with open(path, 'rb') as recording:
+                    body = self._bodies[filename] = recording.read()
+            return body
+        finally:
+            self._lock.release()
+
+    def urlopen(self, request):
+        key = request_key(request)
+        self.requests.append(key)
+        body = self._body(request_filename(key))
+        url = request.get_full_url()
+        if body is None:
+            raise urllib2.HTTPError(url, 404, 'Not Recorded', {}, CachedResponse('No recording for %s' % key))
+        return CachedResponse(body, url)
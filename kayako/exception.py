@@ -47,7 +47,29 @@ class KayakoMethodNotImplementedError(KayakoRequestError):
     '''
     pass
 
+class KayakoBulkRequestError(KayakoRequestError):
+    '''
+    An exception for when some of the calls in a bulk request failed.
+
+    results  The results in input order, None where a call failed.
+    errors   A dictionary of the failed input to its exception.
+    '''
+
+    def __init__(self, message, results, errors):
+        KayakoRequestError.__init__(self, message)
+        self.results = results
+        self.errors = errors
+
 # RESPONSE ERROR
 
 class KayakoResponseError(KayakoIOError):
-    pass
+    '''
+    An exception for error responses, and responses that could not be
+    parsed.
+
+    code  The HTTP status of an error response, None otherwise.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        self.code = kwargs.pop('code', None)
+        KayakoIOError.__init__(self, *args, **kwargs)
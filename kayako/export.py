@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+
+'''
+Created on Oct 18, 2026
+'''
+
+import Queue
+import socket
+import ssl
+import threading
+import time
+
+from kayako.core.futures import WorkerPool
+from kayako.exception import KayakoRequestError, KayakoResponseError
+from kayako.objects.ticket import Ticket, TicketCount
+from kayako.objects.user import User
+
+__all__ = [
+    'UserExport',
+    'TicketFanOut',
+]
+
+class UserExport(object):
+    '''
+    Exports every User by splitting the userid range into disjoint
+    ``marker`` windows and paging through the windows concurrently::
+
+        >>> export = api.export_users(partitions=16, workers=8)
+        >>> for user in export:
+        ...     write(user)
+        >>> export.stats[0]
+        {'partition': 0, 'start': 1, 'end': 50001, 'users': 49213, 'pages': 50, 'seconds': 41.2, 'rate': 1194.5}
+
+    start       The first userid to export.
+    end         The userid to stop before. By default the highest userid is
+                found with a binary search of one-user requests.
+    partitions  The number of windows the range is split into.
+    workers     The number of windows fetched at once.
+    page_size   Users requested at a time within a window (max 1000.)
+    prefetch    Pages each window keeps ready ahead of the caller.
+    ordered     Yield users in id order. Otherwise pages are yielded from
+                whichever window has one ready.
+
+    Pages are handed over through bounded queues, so a window waits once
+    ``prefetch`` of its pages are ready and unused: at most about
+    ``workers * (prefetch + 1)`` pages are held in memory, however slow
+    the window being yielded is. ``stats`` holds a dictionary per window
+    once it is done.
+    '''
+
+    def __init__(self, api, start=1, end=None, partitions=8, workers=4, page_size=1000, prefetch=2, ordered=True):
+        self.api = api
+        self.start = start
+        self.end = end
+        self.partitions = partitions
+        self.workers = workers
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.ordered = ordered
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _first_id(self, marker):
+        ''' Returns the lowest userid from ``marker`` on, or None. '''
+        users = User.get_all(self.api, marker, 1)
+        if users:
+            return users[0].id
+
+    def probe_end(self):
+        '''
+        Returns one past the highest userid from ``start`` on, found by
+        doubling a marker until no user is left after it, then bisecting.
+        '''
+        low = self._first_id(self.start)
+        if low is None:
+            return self.start
+        # A user exists at ``low``, none at or after ``high``
+        high = None
+        marker = max(low * 2, low + 1)
+        while high is None:
+            found = self._first_id(marker)
+            if found is None:
+                high = marker
+            else:
+                low = found
+                marker = max(found * 2, found + 1)
+        while high - low > 1:
+            middle = (low + high) // 2
+            found = self._first_id(middle)
+            if found is None:
+                high = middle
+            else:
+                low = found
+        return low + 1
+
+    def windows(self):
+        ''' Returns a list of (start, end) userid windows covering the range. '''
+        if self.end is None:
+            self.end = self.probe_end()
+        size = max(1, -(-(self.end - self.start) // self.partitions))
+        return [(start, min(start + size, self.end)) for start in range(self.start, self.end, size)]
+
+    @staticmethod
+    def _put(queue, stop, entry):
+        ''' Waits for room in ``queue``, returning False if the export stopped first. '''
+        while not stop.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def _fetch(self, partition, start, end, queue, stop):
+        began = time.time()
+        count = 0
+        pages = 0
+        marker = start
+        try:
+            while marker < end:
+                # Userids are unique, so a window never holds more than end - marker users
+                page = User.get_all(self.api, marker, min(self.page_size, end - marker))
+                pages += 1
+                users = [user for user in page if user.id < end]
+                count += len(users)
+                if users and not self._put(queue, stop, (partition, users)):
+                    return
+                if not page or page[-1].id >= end:
+                    break
+                marker = page[-1].id + 1
+        finally:
+            # The caller checks the future for an exception once this arrives
+            self._put(queue, stop, (partition, None))
+        seconds = time.time() - began
+        self._lock.acquire()
+        try:
+            self.stats[partition] = dict(partition=partition, start=start, end=end, users=count, pages=pages, seconds=seconds, rate=count / seconds if seconds else None)
+        finally:
+            self._lock.release()
+
+    def __iter__(self):
+        windows = self.windows()
+        workers = max(1, min(self.workers, len(windows)))
+        size = max(1, self.prefetch)
+        if self.ordered:
+            queues = [Queue.Queue(size) for window in windows]
+        else:
+            queues = [Queue.Queue(size * workers)] * len(windows)
+        stop = threading.Event()
+        pool = WorkerPool(workers)
+        futures = [pool.submit(self._fetch, partition, start, end, queues[partition], stop) for partition, (start, end) in enumerate(windows)]
+        try:
+            remaining = len(futures)
+            current = 0
+            while remaining:
+                # Ordered, the windows' queues are used up one after the other
+                partition, users = queues[current].get()
+                if users is None:
+                    futures[partition].result()
+                    remaining -= 1
+                    if self.ordered:
+                        current += 1
+                    continue
+                for user in users:
+                    yield user
+        finally:
+            # Windows not started yet are dropped, and running ones stop, if
+            # the caller stops early
+            stop.set()
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def __str__(self):
+        return '<UserExport: %s partitions from userid %s>' % (self.partitions, self.start)
+
+class TicketFanOut(object):
+    '''
+    Lists the Tickets of many departments with concurrent ``ListAll``
+    calls instead of one, merging the results by ticket id::
+
+        >>> fan_out = api.ticket_fan_out([1, 2, 3], workers=8)
+        >>> tickets = fan_out.run()
+
+    The plan starts with one call per department. A call that fails as if
+    it were too large, with a 5xx or 429 response or a timeout, is split
+    into one call per ticket status of its department, then into one call
+    per owner (and unassigned), and the parts are listed in its place. Any
+    other error, such as a 403, is raised at once. A call that succeeds but
+    returns more than ``max_tickets`` tickets, or takes longer than
+    ``max_seconds``, is kept as it is for this run, but is split in
+    ``plan`` for the next ``run`` of the same TicketFanOut; the first run
+    only adapts to failures.
+
+    The statuses and owners to split by are the ones ``TicketCount`` lists
+    for the department, so statuses of other departments and owners no
+    longer on the staff are included. A call is only split when their
+    counts add up to the department's total; otherwise the parts could
+    miss tickets, and the call is kept (or its error raised) instead.
+
+    departmentids  The Department IDs to list.
+    ticketstatusid The Ticket Status ID(s) to list, -1 for all.
+    ownerstaffid   The Owner Staff ID(s) to list, -1 for all.
+    userid         The User ID(s) to list, -1 for all.
+    workers        The number of calls made at once.
+    lazy           List LazyTickets, see Ticket.get_all.
+
+    ``stats`` holds a dictionary per call of the last run.
+    '''
+
+    @staticmethod
+    def overloaded(error):
+        '''
+        Returns whether ``error`` shows a call the server could not cope
+        with, so that smaller calls may succeed: a 5xx or 429 response, or a
+        timeout sending the request or reading its listing.
+        '''
+        if isinstance(error, KayakoResponseError):
+            return error.code is not None and (error.code >= 500 or error.code == 429)
+        if isinstance(error, KayakoRequestError) and error.args:
+            # Wraps the urllib2.URLError of the transport
+            error = getattr(error.args[0], 'reason', error.args[0])
+        if isinstance(error, ssl.SSLError):
+            return 'timed out' in str(error)
+        return isinstance(error, socket.timeout)
+
+    def __init__(self, api, departmentids, ticketstatusid= -1, ownerstaffid= -1, userid= -1, workers=4, max_tickets=5000, max_seconds=60.0, lazy=False):
+        self.api = api
+        self.userid = userid
+        self.workers = workers
+        self.max_tickets = max_tickets
+        self.max_seconds = max_seconds
+        self.lazy = lazy
+        self.plan = [(departmentid, self._freeze(ticketstatusid), self._freeze(ownerstaffid)) for departmentid in departmentids]
+        self.stats = []
+        self._counts = None
+
+    @staticmethod
+    def _freeze(ids):
+        if isinstance(ids, (list, tuple)):
+            return tuple(ids)
+        return ids
+
+    def _department_count(self, departmentid):
+        ''' Returns the ``TicketCountDepartment`` of a department, or None. '''
+        if self._counts is None:
+            self._counts = TicketCount.get_all(self.api)
+        for department in self._counts.departments:
+            if department.id == departmentid:
+                return department
+
+    def _status_ids(self, departmentid):
+        '''
+        Returns the ids of the statuses the department's tickets have, or
+        an empty tuple if their counts do not add up to its total.
+        '''
+        department = self._department_count(departmentid)
+        if department is None or sum(status.totalitems for status in department.statuses) != department.totalitems:
+            return ()
+        return tuple(status.id for status in department.statuses)
+
+    def _owner_ids(self, departmentid):
+        '''
+        Returns the ids of the owners of the department's tickets, 0 for
+        unassigned, or an empty tuple if their counts do not add up to its
+        total.
+        '''
+        department = self._department_count(departmentid)
+        if department is None:
+            return ()
+        owners = dict((staff.id, staff.totalitems) for staff in department.staff)
+        if 0 not in owners:
+            owners[0] = sum(unassigned.totalitems for unassigned in self._counts.unassigned if unassigned.id == departmentid)
+        if sum(owners.values()) != department.totalitems:
+            return ()
+        return tuple(sorted(owners))
+
+    def split(self, call):
+        '''
+        Returns the calls listing the same tickets as ``call`` in smaller
+        parts, or an empty list if it cannot be split further.
+        '''
+        departmentid, ticketstatusid, ownerstaffid = call
+        statuses = self._status_ids(departmentid) if ticketstatusid == -1 else ticketstatusid
+        if isinstance(statuses, tuple) and len(statuses) > 1:
+            return [(departmentid, status, ownerstaffid) for status in statuses]
+        owners = self._owner_ids(departmentid) if ownerstaffid == -1 else ownerstaffid
+        if isinstance(owners, tuple) and len(owners) > 1:
+            return [(departmentid, ticketstatusid, owner) for owner in owners]
+        return []
+
+    def _list(self, call):
+        departmentid, ticketstatusid, ownerstaffid = call
+        start = time.time()
+        tickets = Ticket.get_all(self.api, departmentid, ticketstatusid, ownerstaffid, self.userid, self.lazy)
+        return tickets, time.time() - start
+
+    def run(self):
+        ''' Lists the tickets, returning them de-duplicated and sorted by id. '''
+        pool = WorkerPool(max(1, self.workers))
+        done = Queue.Queue()
+        calls = {}
+        tickets = {}
+        plan = []
+        self.stats = []
+        # Split by the counts of this run
+        self._counts = None
+
+        def submit(call):
+            future = pool.submit(self._list, call)
+            calls[future] = call
+            future.add_done_callback(done.put)
+
+        for call in self.plan:
+            submit(call)
+        pending = len(self.plan)
+        try:
+            while pending:
+                future = done.get()
+                pending -= 1
+                call = calls.pop(future)
+                error = future.exception()
+                if error is not None:
+                    parts = self.split(call) if self.overloaded(error) else []
+                    if not parts:
+                        future.result()
+                    self.stats.append(dict(call=call, tickets=None, seconds=None, error=error, split=len(parts)))
+                    for part in parts:
+                        submit(part)
+                    pending += len(parts)
+                    continue
+                results, seconds = future.result()
+                for ticket in results:
+                    tickets.setdefault(ticket.id, ticket)
+                parts = []
+                if len(results) > self.max_tickets or seconds > self.max_seconds:
+                    parts = self.split(call)
+                plan.extend(parts or [call])
+                self.stats.append(dict(call=call, tickets=len(results), seconds=seconds, error=None, split=len(parts)))
+        finally:
+            # Calls not started yet are dropped if a call failed
+            for future in calls:
+                future.cancel()
+            pool.shutdown(wait=False)
+        self.plan = plan
+        return [tickets[id] for id in sorted(tickets)]
+
+    def __str__(self):
+        return '<TicketFanOut: %s calls>' % len(self.plan)
@@ -10,9 +10,8 @@ Created on May 5, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.object import KayakoObject
+from kayako.core.schema import Field, Schema
 
 __all__ = [
     'Department',
@@ -42,6 +41,16 @@ class Department(KayakoObject):
     __save_parameters__ = ['title', 'type', 'displayorder', 'parentdepartmentid', 'uservisibilitycustom', 'usergroupid']
 
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('title'),
+        Field('type'),
+        Field('module'),
+        Field('displayorder', 'int'),
+        Field('parentdepartmentid', 'int', required=False),
+        Field('uservisibilitycustom', 'bool'),
+    ])
+
     @classmethod
     def _parse_department(cls, department_tree):
         usergroups = []
@@ -51,16 +60,8 @@ class Department(KayakoObject):
                 id = cls._get_int(id_node)
                 usergroups.append(id)
 
-        params = dict(
-            id=cls._get_int(department_tree.find('id')),
-            title=cls._get_string(department_tree.find('title')),
-            type=cls._get_string(department_tree.find('type')),
-            module=cls._get_string(department_tree.find('module')),
-            displayorder=cls._get_int(department_tree.find('displayorder')),
-            parentdepartmentid=cls._get_int(department_tree.find('parentdepartmentid'), required=False),
-            uservisibilitycustom=cls._get_boolean(department_tree.find('uservisibilitycustom')),
-            usergroupid=usergroups,
-        )
+        params = cls.__schema__.parse(department_tree)
+        params['usergroupid'] = usergroups
         return params
 
     def _update_from_response(self, department_tree):
@@ -89,29 +90,33 @@ class Department(KayakoObject):
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [Department(api, **cls._parse_department(department_tree)) for department_tree in tree.findall('department')]
+        for department_tree in cls._iterparse(api, response, 'department'):
+            yield cls(api, **cls._parse_department(department_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('department')
         if node is None:
             return None
         params = cls._parse_department(node)
-        return Department(api, **params)
+        return cls(api, **params)
 
     def add(self):
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('department')
         self._update_from_response(node)
 
     def save(self):
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('department')
         self._update_from_response(node)
 
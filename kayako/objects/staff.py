@@ -10,9 +10,8 @@ Created on May 9, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.object import KayakoObject
+from kayako.core.schema import Field, Schema
 
 __all__ = [
     'Staff',
@@ -63,25 +62,26 @@ class Staff(KayakoObject):
     __required_save_parameters__ = ['firstname', 'lastname']
     __save_parameters__ = ['firstname', 'lastname', 'username', 'email', 'password', 'staffgroupid', 'designation', 'mobilenumber', 'signature', 'isenabled', 'greeting', 'timezone', 'enabledst']
 
+    __schema__ = Schema([
+        Field('id', 'int', required=False),
+        Field('firstname'),
+        Field('lastname'),
+        Field('username'),
+        #password is never present in the response
+        Field('staffgroupid', 'int'),
+        Field('email'),
+        Field('designation'),
+        Field('mobilenumber'),
+        Field('signature'),
+        Field('isenabled', 'bool'),
+        Field('greeting'),
+        Field('timezone'),
+        Field('enabledst', 'bool'),
+    ])
+
     @classmethod
     def _parse_staff(cls, staff_tree):
-        params = dict(
-            id=cls._get_int(staff_tree.find('id'), required=False),
-            firstname=cls._get_string(staff_tree.find('firstname')),
-            lastname=cls._get_string(staff_tree.find('lastname')),
-            username=cls._get_string(staff_tree.find('username')),
-            #password is never present in the response
-            staffgroupid=cls._get_int(staff_tree.find('staffgroupid')),
-            email=cls._get_string(staff_tree.find('email')),
-            designation=cls._get_string(staff_tree.find('designation')),
-            mobilenumber=cls._get_string(staff_tree.find('mobilenumber')),
-            signature=cls._get_string(staff_tree.find('signature')),
-            isenabled=cls._get_boolean(staff_tree.find('isenabled')),
-            greeting=cls._get_string(staff_tree.find('greeting')),
-            timezone=cls._get_string(staff_tree.find('timezone')),
-            enabledst=cls._get_boolean(staff_tree.find('enabledst')),
-        )
-        return params
+        return cls.__schema__.parse(staff_tree)
 
     def _update_from_response(self, staff_tree):
         for int_node in ['id', 'staffgroupid']:
@@ -101,29 +101,33 @@ class Staff(KayakoObject):
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [Staff(api, **cls._parse_staff(staff_tree)) for staff_tree in tree.findall('staff')]
+        for staff_tree in cls._iterparse(api, response, 'staff'):
+            yield cls(api, **cls._parse_staff(staff_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('staff')
         if node is None:
             return None
         params = cls._parse_staff(node)
-        return Staff(api, **params)
+        return cls(api, **params)
 
     def add(self):
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('staff')
         self._update_from_response(node)
 
     def save(self):
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('staff')
         self._update_from_response(node)
 
@@ -154,14 +158,15 @@ class StaffGroup(KayakoObject):
     __save_parameters__ = ['title', 'isadmin']
 
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('title'),
+        Field('isadmin', 'bool'),
+    ])
+
     @classmethod
     def _parse_staff_group(cls, staff_group_tree):
-        params = dict(
-            id=cls._get_int(staff_group_tree.find('id')),
-            title=cls._get_string(staff_group_tree.find('title')),
-            isadmin=cls._get_boolean(staff_group_tree.find('isadmin')),
-        )
-        return params
+        return cls.__schema__.parse(staff_group_tree)
 
     def _update_from_response(self, staff_group_tree):
         for int_node in ['id']:
@@ -181,29 +186,33 @@ class StaffGroup(KayakoObject):
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [StaffGroup(api, **cls._parse_staff_group(staff_group_tree)) for staff_group_tree in tree.findall('staffgroup')]
+        for staff_group_tree in cls._iterparse(api, response, 'staffgroup'):
+            yield cls(api, **cls._parse_staff_group(staff_group_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('staffgroup')
         if node is None:
             return None
         params = cls._parse_staff_group(node)
-        return StaffGroup(api, **params)
+        return cls(api, **params)
 
     def add(self):
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('staffgroup')
         self._update_from_response(node)
 
     def save(self):
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('staffgroup')
         self._update_from_response(node)
 
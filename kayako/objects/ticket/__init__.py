@@ -5,4 +5,5 @@ from ticket_enums import TicketPriority, TicketStatus, TicketType
 from ticket_note import TicketNote
 from ticket_post import TicketPost
 from ticket_time_track import TicketTimeTrack
-from ticket import Ticket
+from ticket import Ticket, LazyTicket
+from ticket_frame import TicketFrame
@@ -12,8 +12,9 @@ Created on Jun 8, 2011
 
 from lxml import etree
 
-from kayako.core.lib import UnsetParameter
+from kayako.core.lib import LazyCall, LazyList, UnsetParameter
 from kayako.core.object import KayakoObject
+from kayako.core.schema import Field, Schema
 from kayako.objects.ticket.ticket_note import TicketNote
 from kayako.objects.ticket.ticket_post import TicketPost
 from kayako.objects.ticket.ticket_time_track import TicketTimeTrack
@@ -89,63 +90,104 @@ class Ticket(KayakoObject):
 
     __save_parameters__ = ['subject', 'fullname', 'email', 'departmentid', 'ticketstatusid', 'ticketpriorityid', 'ownerstaffid', 'userid', ]
 
-    @classmethod
-    def _parse_ticket(cls, api, ticket_tree):
+    __schema__ = Schema([
+        Field('subject'),
+        Field('fullname'),
+        Field('email'),
+        Field('departmentid', 'int'),
+        Field('ticketstatusid', 'int', required=False),
+        Field('ticketpriorityid', 'int', tag='priorityid'), # Note the difference, request param is ticketpriorityid, response is priorityid
+        Field('tickettypeid', 'int', required=False),
+        Field('userid', 'int'),
+        Field('ownerstaffid', 'int'),
+        Field('displayid'),
+        Field('statusid', 'int'),
+        Field('typeid', 'int'),
+        Field('userorganization'),
+        Field('userorganizationid', 'int', required=False),
+        Field('ownerstaffname'),
+        Field('lastreplier'),
+        Field('creationtime', 'date'),
+        Field('lastactivity', 'date'),
+        Field('laststaffreply', 'date'),
+        Field('lastuserreply', 'date'),
+        Field('slaplanid', 'int'),
+        Field('nextreplydue', 'date'),
+        Field('resolutiondue', 'date'),
+        Field('replies', 'int'),
+        Field('ipaddress'),
+        Field('creator', 'int'),
+        Field('creationmode', 'int'),
+        Field('creationtype', 'int'),
+        Field('isescalated', 'bool'),
+        Field('escalationruleid', 'int'),
+        Field('tags'),
+    ])
+    ''' Ticket parameters parsed from a single child node of the response. '''
 
-        ticketid = cls._parse_int(ticket_tree.get('id'))
+    __ticket_children__ = ['watchers', 'workflows', 'notes', 'posts', 'timetracks']
+    ''' Ticket parameters parsed from repeated or nested child nodes. '''
+
+    __filter_pushdown__ = {
+        'departmentid': 'departmentid',
+        'statusid': 'ticketstatusid', # Listed tickets have a statusid, the request filters on ticketstatusid
+        'ticketstatusid': 'ticketstatusid',
+        'ownerstaffid': 'ownerstaffid',
+        'userid': 'userid',
+    }
+    ''' Filter keys sent as ListAll path parameters, see KayakoAPI.filter. '''
+
+    @classmethod
+    def _parse_ticket_children(cls, api, ticket_tree, ticketid):
+        '''
+        Notes, posts and timetracks are LazyLists, parsed from their nodes
+        when they are first used. If the response had no posts node, the
+        posts are requested then instead; pickling or copying the ticket
+        before that keeps them unloaded.
+        '''
 
         workflows = [dict(id=workflow_node.get('id'), title=workflow_node.get('title')) for workflow_node in ticket_tree.findall('workflow')]
         watchers = [dict(staffid=watcher_node.get('staffid'), name=watcher_node.get('name')) for watcher_node in ticket_tree.findall('watcher')]
-        notes = [TicketNote(api, **TicketNote._parse_ticket_note(ticket_note_tree, ticketid)) for ticket_note_tree in ticket_tree.findall('note') if ticket_note_tree.get('type') == 'ticket']
-        timetracks = [TicketTimeTrack(api, **TicketTimeTrack._parse_ticket_time_track(ticket_time_track_tree, ticketid)) for ticket_time_track_tree in ticket_tree.findall('note') if ticket_note_tree.get('type') == 'timetrack']
-
-        posts = []
+        note_nodes = ticket_tree.findall('note')
         posts_node = ticket_tree.find('posts')
-        if posts_node is not None:
-            posts = [TicketPost(api, **TicketPost._parse_ticket_post(ticket_post_tree, ticketid)) for ticket_post_tree in posts_node.findall('post')]
-
-        params = dict(
-            id=ticketid,
-            subject=cls._get_string(ticket_tree.find('subject')),
-            fullname=cls._get_string(ticket_tree.find('fullname')),
-            email=cls._get_string(ticket_tree.find('email')),
-            departmentid=cls._get_int(ticket_tree.find('departmentid')),
-            ticketstatusid=cls._get_int(ticket_tree.find('ticketstatusid'), required=False),
-            ticketpriorityid=cls._get_int(ticket_tree.find('priorityid')), # Note the difference, request param is ticketpriorityid, response is priorityid
-            tickettypeid=cls._get_int(ticket_tree.find('tickettypeid'), required=False),
-            userid=cls._get_int(ticket_tree.find('userid')),
-            ownerstaffid=cls._get_int(ticket_tree.find('ownerstaffid')),
-            flagtype=cls._parse_int(ticket_tree.get('flagtype'), 'flagtype'),
-            displayid=cls._get_string(ticket_tree.find('displayid')),
-            statusid=cls._get_int(ticket_tree.find('statusid')),
-            typeid=cls._get_int(ticket_tree.find('typeid')),
-            userorganization=cls._get_string(ticket_tree.find('userorganization')),
-            userorganizationid=cls._get_int(ticket_tree.find('userorganizationid'), required=False),
-            ownerstaffname=cls._get_string(ticket_tree.find('ownerstaffname')),
-            lastreplier=cls._get_string(ticket_tree.find('lastreplier')),
-            creationtime=cls._get_date(ticket_tree.find('creationtime')),
-            lastactivity=cls._get_date(ticket_tree.find('lastactivity')),
-            laststaffreply=cls._get_date(ticket_tree.find('laststaffreply')),
-            lastuserreply=cls._get_date(ticket_tree.find('lastuserreply')),
-            slaplanid=cls._get_int(ticket_tree.find('slaplanid')),
-            nextreplydue=cls._get_date(ticket_tree.find('nextreplydue')),
-            resolutiondue=cls._get_date(ticket_tree.find('resolutiondue')),
-            replies=cls._get_int(ticket_tree.find('replies')),
-            ipaddress=cls._get_string(ticket_tree.find('ipaddress')),
-            creator=cls._get_int(ticket_tree.find('creator')),
-            creationmode=cls._get_int(ticket_tree.find('creationmode')),
-            creationtype=cls._get_int(ticket_tree.find('creationtype')),
-            isescalated=cls._get_boolean(ticket_tree.find('isescalated')),
-            escalationruleid=cls._get_int(ticket_tree.find('escalationruleid')),
-            tags=cls._get_string(ticket_tree.find('tags')),
+
+        def load_notes():
+            return [TicketNote(api, **TicketNote._parse_ticket_note(ticket_note_tree, ticketid)) for ticket_note_tree in note_nodes if ticket_note_tree.get('type') == 'ticket']
+
+        def load_timetracks():
+            return [TicketTimeTrack(api, **TicketTimeTrack._parse_ticket_time_track(ticket_time_track_tree, ticketid)) for ticket_time_track_tree in note_nodes if ticket_time_track_tree.get('type') == 'timetrack']
+
+        if posts_node is None:
+            load_posts = LazyCall(TicketPost, 'get_all', api, ticketid)
+        else:
+            def load_posts():
+                return [TicketPost(api, **TicketPost._parse_ticket_post(ticket_post_tree, ticketid)) for ticket_post_tree in posts_node.findall('post')]
+
+        return dict(
             watchers=watchers,
             workflows=workflows,
-            notes=notes,
-            posts=posts,
-            timetracks=timetracks,
+            notes=LazyList(load_notes),
+            posts=LazyList(load_posts),
+            timetracks=LazyList(load_timetracks),
         )
+
+    @classmethod
+    def _parse_ticket(cls, api, ticket_tree):
+
+        ticketid = cls._parse_int(ticket_tree.get('id'))
+
+        params = cls.__schema__.parse(ticket_tree)
+        params.update(cls._parse_ticket_children(api, ticket_tree, ticketid))
+        params['id'] = ticketid
+        params['flagtype'] = cls._parse_int(ticket_tree.get('flagtype'), 'flagtype')
         return params
 
+    @classmethod
+    def _from_tree(cls, api, ticket_tree, lazy=False):
+        if lazy:
+            return (LazyTicket.compact() if cls.__compact__ else LazyTicket)(api, ticket_tree)
+        return cls(api, **cls._parse_ticket(api, ticket_tree))
+
     def _update_from_response(self, ticket_tree):
 
         ticketid = self._parse_int(ticket_tree.get('id'))
@@ -177,7 +219,7 @@ class Ticket(KayakoObject):
                 setattr(self, date_node, self._get_date(node, required=False))
 
     @classmethod
-    def get_all(cls, api, departmentid, ticketstatusid= -1, ownerstaffid= -1, userid= -1):
+    def get_all(cls, api, departmentid, ticketstatusid= -1, ownerstaffid= -1, userid= -1, lazy=False):
         '''
         Get all of the tickets filtered by the parameters:
         Lists are converted to comma-separated values.
@@ -187,8 +229,20 @@ class Ticket(KayakoObject):
             ticketstatusid   Filter the tickets by the specified ticket status id, you can specify multiple id's by separating the values using a comma. Example: 1,2,3
             ownerstaffid     Filter the tickets by the specified owner staff id, you can specify multiple id's by separating the values using a comma. Example: 1,2,3
             userid           Filter the tickets by the specified user id, you can specify multiple id's by separating the values using a comma. Example: 1,2,3 
+            lazy             If True, return LazyTickets, which parse each field
+                             from the response on first access.
         '''
+        return list(cls.iter_all(api, departmentid, ticketstatusid, ownerstaffid, userid, lazy))
+
+    @classmethod
+    def iter_all(cls, api, departmentid, ticketstatusid= -1, ownerstaffid= -1, userid= -1, lazy=False):
+        response = cls._list_all(api, departmentid, ticketstatusid, ownerstaffid, userid)
+        for ticket_tree in cls._iterparse(api, response, 'ticket'):
+            yield cls._from_tree(api, ticket_tree, lazy)
 
+    @classmethod
+    def _list_all(cls, api, departmentid, ticketstatusid= -1, ownerstaffid= -1, userid= -1):
+        ''' Requests the ticket listing, returning the unparsed response. '''
         if isinstance(departmentid, (list, tuple)):
             departmentid = ','.join([str(id_item) for id_item in departmentid])
         if isinstance(ticketstatusid, (list, tuple)):
@@ -198,12 +252,10 @@ class Ticket(KayakoObject):
         if isinstance(userid, (list, tuple)):
             userid = ','.join([str(id_item) for id_item in userid])
 
-        response = api._request('%s/ListAll/%s/%s/%s/%s/' % (cls.controller, departmentid, ticketstatusid, ownerstaffid, userid), 'GET')
-        tree = etree.parse(response)
-        return [Ticket(api, **cls._parse_ticket(api, ticket_tree)) for ticket_tree in tree.findall('ticket')]
+        return api._request('%s/ListAll/%s/%s/%s/%s/' % (cls.controller, departmentid, ticketstatusid, ownerstaffid, userid), 'GET')
 
     @classmethod
-    def get(cls, api, id):
+    def get(cls, api, id, lazy=False):
         try:
             response = api._request('%s/%s/' % (cls.controller, id), 'GET')
         except KayakoResponseError, error:
@@ -211,12 +263,11 @@ class Ticket(KayakoObject):
                 return None
             else:
                 raise
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('ticket')
         if node is None:
             return None
-        params = cls._parse_ticket(api, node)
-        return Ticket(api, **params)
+        return cls._from_tree(api, node, lazy)
 
     def add(self):
         '''
@@ -250,7 +301,7 @@ class Ticket(KayakoObject):
             raise KayakoRequestError('To add a Ticket, at least one of the following parameters must be set: userid, staffid. (id: %s)' % self.id)
 
         response = self.api._request(self.controller, 'POST', **parameters)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('ticket')
         self._update_from_response(node)
 
@@ -270,7 +321,7 @@ class Ticket(KayakoObject):
             userid           The User ID, if you want to change the user for this ticket 
         '''
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('ticket')
         self._update_from_response(node)
 
@@ -279,3 +330,51 @@ class Ticket(KayakoObject):
 
     def __str__(self):
         return '<Ticket (%s): %s - %s>' % (self.id, 'UNSUBMITTED' if not self.displayid else self.displayid, self.subject)
+
+class LazyTicket(Ticket):
+    '''
+    A Ticket which keeps its response node and parses each parameter from it
+    the first time the parameter is read, for listings where only a few
+    fields of each ticket are used. Parsed values, and values set on the
+    ticket, are kept as ordinary attributes.
+    '''
+
+    def __init__(self, api, ticket_tree):
+        self.api = api
+        # Move the children to a node of our own, so clearing the response
+        # tree while it is being iterated does not clear this ticket.
+        self._ticket_tree = etree.Element(ticket_tree.tag, ticket_tree.attrib)
+        self._ticket_tree.extend(list(ticket_tree))
+        self.id = self._parse_int(ticket_tree.get('id'))
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.__parameters__:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
+        ticket_tree = self._ticket_tree
+        if name in self.__ticket_children__:
+            for parameter, value in self._parse_ticket_children(self.api, ticket_tree, self.id).iteritems():
+                try:
+                    object.__getattribute__(self, parameter)
+                except AttributeError:
+                    setattr(self, parameter, value)
+        elif name == 'flagtype':
+            self.flagtype = self._parse_int(ticket_tree.get('flagtype'), 'flagtype')
+        elif name in self.__schema__:
+            setattr(self, name, self.__schema__.parse_field(ticket_tree, name))
+        else:
+            # Request only parameters are unset on parsed tickets
+            setattr(self, name, UnsetParameter)
+        # Parameters may be slots on LazyTicket.compact() instances
+        return object.__getattribute__(self, name)
+
+    def __getstate__(self):
+        # lxml elements do not survive pickling, keep the node as XML
+        state = dict(self.__dict__)
+        state['_ticket_tree'] = etree.tostring(self._ticket_tree)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            if name == '_ticket_tree':
+                value = etree.fromstring(value)
+            setattr(self, name, value)
@@ -10,11 +10,169 @@ Created on Jun 8, 2011
 @author: evan
 '''
 
+from kayako.core.form import Base64File
 from kayako.core.lib import UnsetParameter
 from kayako.core.object import KayakoObject
+from kayako.core.parser import PrefixSkippingReader
+from kayako.core.schema import Field, Schema
 from kayako.exception import KayakoRequestError, KayakoResponseError
 from lxml import etree
 import base64
+import binascii
+import mmap
+import os
+import tempfile
+from cStringIO import StringIO
+
+class _Base64Writer(object):
+    '''
+    Decodes Base 64 text fed in arbitrary pieces and writes the decoded bytes
+    to a file-like sink as soon as whole 4 character groups are available.
+    '''
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = ''
+        self.size = 0
+
+    def write(self, text):
+        self.pending += str(text).translate(None, ' \t\r\n')
+        usable = len(self.pending) - len(self.pending) % 4
+        if usable:
+            self._write(self.pending[:usable])
+            self.pending = self.pending[usable:]
+
+    def _write(self, text):
+        data = binascii.a2b_base64(text)
+        self.size += len(data)
+        self.sink.write(data)
+
+    def close(self):
+        if self.pending:
+            self._write(self.pending)
+            self.pending = ''
+
+class AttachmentPayload(object):
+    '''
+    Decoded attachment contents kept out of the Python heap: in a buffer
+    while smaller than ``max_memory`` bytes, spilled to a temporary file at
+    ``path`` after that. The file is only open while it is written (until
+    ``finish``) or read, so holding many payloads does not hold as many
+    file descriptors. ``close``, or garbage collection, deletes it. ``view``
+    maps the data without copying it.
+    '''
+
+    def __init__(self, max_memory=65536):
+        self.max_memory = max_memory
+        self.size = 0
+        self.path = None
+        self._buffer = StringIO()
+        self._file = None
+
+    def write(self, data):
+        if self._buffer is not None and self.size + len(data) > self.max_memory:
+            descriptor, self.path = tempfile.mkstemp(prefix='kayako-attachment-')
+            self._file = os.fdopen(descriptor, 'wb')
+            self._file.write(self._buffer.getvalue())
+            self._buffer = None
+        elif self._buffer is None and self._file is None:
+            self._file = open(self.path, 'ab')
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer.write(data)
+        self.size += len(data)
+
+    def finish(self):
+        ''' Close the temporary file once the contents are written. '''
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def view(self):
+        '''
+        Returns the contents as a read-only mmap when spilled to disk, or a
+        memoryview of the buffer otherwise.
+        '''
+        if self.path is None or not self.size:
+            return memoryview(self._buffer.getvalue() if self._buffer else '')
+        self.finish()
+        with open(self.path, 'rb') as spill:
+            return mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self):
+        ''' Returns the contents as a string. '''
+        if self.path is None:
+            return self._buffer.getvalue() if self._buffer else ''
+        self.finish()
+        with open(self.path, 'rb') as spill:
+            return spill.read()
+
+    def close(self):
+        self.finish()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.path = self._buffer = None
+        self.size = 0
+
+    def __del__(self):
+        self.close()
+
+    def __getstate__(self):
+        # Each copy gets a temporary file of its own
+        return dict(max_memory=self.max_memory, contents=self.read())
+
+    def __setstate__(self, state):
+        self.__init__(state['max_memory'])
+        self.write(state['contents'])
+        self.finish()
+
+class _AttachmentTarget(object):
+    '''
+    lxml parser target for a TicketAttachment response. Decodes the text of
+    ``contents`` into a ``_Base64Writer`` as it arrives and collects the text
+    of the other fields into ``fields``.
+    '''
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.fields = {}
+        self.found = False
+        self.path = []
+        self.text = None
+
+    def start(self, tag, attrib):
+        self.path.append(tag)
+        if len(self.path) == 2 and tag == 'attachment':
+            if self.found:
+                # Only the first attachment is read
+                self.path[-1] = None
+            self.found = True
+        elif len(self.path) == 3 and self.path[1] == 'attachment':
+            self.text = []
+
+    def data(self, data):
+        if self.text is None:
+            return
+        if self.path[2] == 'contents':
+            self.writer.write(data)
+        else:
+            self.text.append(data)
+
+    def end(self, tag):
+        if len(self.path) == 3 and self.text is not None:
+            if tag == 'contents':
+                self.writer.close()
+            else:
+                self.fields[tag] = ''.join(self.text)
+            self.text = None
+        self.path.pop()
+
+    def close(self):
+        return self.fields
 
 class TicketAttachment(KayakoObject):
     '''
@@ -31,6 +189,9 @@ class TicketAttachment(KayakoObject):
 
     controller = '/Tickets/TicketAttachment'
 
+    payload = None
+    ''' The AttachmentPayload of an attachment got with ``lazy=True``. '''
+
     __parameters__ = [
         'id',
         'ticketid',
@@ -45,20 +206,20 @@ class TicketAttachment(KayakoObject):
     __required_add_parameters__ = ['ticketid', 'ticketpostid', 'filename', 'contents']
     __add_parameters__ = ['ticketid', 'ticketpostid', 'filename', 'contents']
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('ticketid', 'int'),
+        Field('ticketpostid', 'int'),
+        Field('filename'),
+        Field('filesize', 'int'),
+        Field('filetype'),
+        Field('contents'),
+        Field('dateline', 'date'),
+    ])
+
     @classmethod
     def _parse_ticket_attachment(cls, ticket_attachment_tree):
-
-        params = dict(
-            id=cls._get_int(ticket_attachment_tree.find('id')),
-            ticketid=cls._get_int(ticket_attachment_tree.find('ticketid')),
-            ticketpostid=cls._get_int(ticket_attachment_tree.find('ticketpostid')),
-            filename=cls._get_string(ticket_attachment_tree.find('filename')),
-            filesize=cls._get_int(ticket_attachment_tree.find('filesize')),
-            filetype=cls._get_string(ticket_attachment_tree.find('filetype')),
-            contents=cls._get_string(ticket_attachment_tree.find('contents')),
-            dateline=cls._get_date(ticket_attachment_tree.find('dateline')),
-        )
-        return params
+        return cls.__schema__.parse(ticket_attachment_tree)
 
     def _update_from_response(self, ticket_attachment_tree):
         for int_node in ['id', 'ticketid', 'ticketpostid', 'filesize']:
@@ -83,12 +244,30 @@ class TicketAttachment(KayakoObject):
         Required:
             ticketid     The unique numeric identifier of the ticket. 
         '''
+        return list(cls.iter_all(api, ticketid))
+
+    @classmethod
+    def iter_all(cls, api, ticketid):
         response = api._request('%s/ListAll/%s' % (cls.controller, ticketid), 'GET')
-        tree = etree.parse(response)
-        return [TicketAttachment(api, **cls._parse_ticket_attachment(ticket_attachment_tree)) for ticket_attachment_tree in tree.findall('attachment')]
+        for ticket_attachment_tree in cls._iterparse(api, response, 'attachment'):
+            yield cls(api, **cls._parse_ticket_attachment(ticket_attachment_tree))
 
     @classmethod
-    def get(cls, api, ticketid, attachmentid):
+    def get(cls, api, ticketid, attachmentid, lazy=False):
+        '''
+        Get a TicketAttachment with its contents.
+
+        With ``lazy`` the contents are decoded while the response streams in,
+        into an AttachmentPayload rather than the ``contents`` string, and
+        ``get_contents`` returns a memoryview or mmap of them.
+        '''
+        if lazy:
+            payload = AttachmentPayload()
+            attachment = cls.download(api, ticketid, attachmentid, payload)
+            payload.finish()
+            if attachment is not None:
+                attachment.payload = payload
+            return attachment
         try:
             response = api._request('%s/%s/%s/' % (cls.controller, ticketid, attachmentid), 'GET')
         except KayakoResponseError, error:
@@ -96,12 +275,44 @@ class TicketAttachment(KayakoObject):
                 return None
             else:
                 raise
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('attachment')
         if node is None:
             return None
         params = cls._parse_ticket_attachment(node)
-        return TicketAttachment(api, **params)
+        return cls(api, **params)
+
+    @classmethod
+    def download(cls, api, ticketid, attachmentid, sink, chunk_size=65536):
+        '''
+        Get a TicketAttachment, writing its decoded contents to the file-like
+        ``sink`` while the response is read and parsed, so the contents are
+        never held in memory. Returns the TicketAttachment without contents,
+        or None if it does not exist.
+        '''
+        try:
+            response = api._request('%s/%s/%s/' % (cls.controller, ticketid, attachmentid), 'GET')
+        except KayakoResponseError, error:
+            if 'HTTP Error 404' in str(error):
+                return None
+            else:
+                raise
+        response = PrefixSkippingReader(response)
+        target = _AttachmentTarget(_Base64Writer(sink))
+        parser = etree.XMLParser(target=target, **api.parsers.options)
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+        fields = parser.close()
+        if not target.found:
+            return None
+        node = etree.Element('attachment')
+        for tag, text in fields.iteritems():
+            etree.SubElement(node, tag).text = text
+        params = cls._parse_ticket_attachment(node)
+        return cls(api, **params)
 
     def add(self):
         '''
@@ -114,7 +325,7 @@ class TicketAttachment(KayakoObject):
             contents     The BASE64 encoded attachment contents 
         '''
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('attachment')
         self._update_from_response(node)
 
@@ -124,7 +335,15 @@ class TicketAttachment(KayakoObject):
         self._delete('%s/%s/%s/' % (self.controller, self.ticketid, self.id))
 
     def get_contents(self):
-        ''' Return the unencoded contents of this TicketAttachment. '''
+        '''
+        Return the unencoded contents of this TicketAttachment. For an
+        attachment got with ``lazy=True`` this is a memoryview or read-only
+        mmap of the contents.
+        '''
+        if self.payload is not None:
+            return self.payload.view()
+        if isinstance(self.contents, Base64File):
+            return self.contents.read()
         if self.contents:
             return base64.b64decode(self.contents)
 
@@ -133,10 +352,23 @@ class TicketAttachment(KayakoObject):
         Set this TicketAttachment's contents to Base 64 encoded data, or set the
         contents to nothing.
         '''
+        self.payload = None
         if contents:
             self.contents = base64.b64encode(contents)
         else:
             self.contents = None
 
+    def set_contents_from_file(self, fileobj):
+        '''
+        Set this TicketAttachment's contents to those of a seekable file
+        object, from its current position. The file is Base 64 encoded and
+        sent in chunks by ``add``, so it is never read into memory; keep it
+        open until then.
+        '''
+        self.payload = None
+        self.contents = Base64File(fileobj)
+        if self.filesize is UnsetParameter:
+            self.filesize = self.contents.size()
+
     def __str__(self):
         return '<TicketAttachment (%s): %s>' % (self.id, self.filename)
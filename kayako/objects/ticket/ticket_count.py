@@ -5,8 +5,6 @@ Created on Jun 10, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.object import KayakoObject
 
 __all__ = [
@@ -151,7 +149,7 @@ class TicketCount(KayakoObject):
     @classmethod
     def get_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         return TicketCount(**cls._parse_ticket_count(tree))
 
     def __str__(self):
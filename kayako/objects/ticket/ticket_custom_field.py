@@ -9,7 +9,6 @@ Created on Jun 8, 2011
 
 @author: evan
 '''
-from lxml import etree
 
 from kayako.core.object import KayakoObject
 from kayako.exception import KayakoResponseError
@@ -124,12 +123,8 @@ class TicketCustomField(KayakoObject):
             else:
                 raise
 
-        # Strip possible error text.
-        response = response.read()
-        if response.startswith('<div'):
-            response = '\n'.join(response.split('\n')[1:])
-
-        tree = etree.fromstring(response)
+        # Possible error text before the document is skipped while parsing
+        tree = cls._parse(api, response)
 
         groups = []
         for group_tree in tree.findall('group'):
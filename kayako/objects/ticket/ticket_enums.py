@@ -10,9 +10,8 @@ Created on Jun 8, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.object import KayakoObject
+from kayako.core.schema import Field, Schema
 
 class TicketPriority(KayakoObject):
     '''
@@ -44,37 +43,41 @@ class TicketPriority(KayakoObject):
         'usergroupid',
     ]
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('title'),
+        Field('displayorder', 'int'),
+        Field('frcolorcode'),
+        Field('bgcolorcode'),
+        Field('displayicon'),
+        Field('type'),
+        Field('uservisibilitycustom', 'bool'),
+        Field('usergroupid', 'int', required=False),
+    ])
+
     @classmethod
     def _parse_ticket_priority(cls, ticket_priority_tree):
-
-        params = dict(
-            id=cls._get_int(ticket_priority_tree.find('id')),
-            title=cls._get_string(ticket_priority_tree.find('title')),
-            displayorder=cls._get_int(ticket_priority_tree.find('displayorder')),
-            frcolorcode=cls._get_string(ticket_priority_tree.find('frcolorcode')),
-            bgcolorcode=cls._get_string(ticket_priority_tree.find('bgcolorcode')),
-            displayicon=cls._get_string(ticket_priority_tree.find('displayicon')),
-            type=cls._get_string(ticket_priority_tree.find('type')),
-            uservisibilitycustom=cls._get_boolean(ticket_priority_tree.find('uservisibilitycustom')),
-            usergroupid=cls._get_int(ticket_priority_tree.find('usergroupid'), required=False),
-        )
-        return params
+        return cls.__schema__.parse(ticket_priority_tree)
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [TicketPriority(api, **cls._parse_ticket_priority(ticket_priority_tree)) for ticket_priority_tree in tree.findall('ticketpriority')]
+        for ticket_priority_tree in cls._iterparse(api, response, 'ticketpriority'):
+            yield cls(api, **cls._parse_ticket_priority(ticket_priority_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('ticketpriority')
         if node is None:
             return None
         params = cls._parse_ticket_priority(tree.find('ticketpriority'))
-        return TicketPriority(api, **params)
+        return cls(api, **params)
 
     def __str__(self):
         return '<TicketPriority (%s): %s>' % (self.id, self.title)
@@ -119,42 +122,46 @@ class TicketStatus(KayakoObject):
         'staffvisibilitycustom',
     ]
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('title'),
+        Field('displayorder', 'int'),
+        Field('departmentid', 'int'),
+        Field('displayicon'),
+        Field('type'),
+        Field('displayinmainlist', 'bool'),
+        Field('markasresolved', 'bool'),
+        Field('displaycount', 'int'),
+        Field('statuscolor'),
+        Field('statusbgcolor'),
+        Field('resetduetime', 'bool'),
+        Field('triggersurvey', 'bool'),
+        Field('staffvisibilitycustom', 'bool'),
+    ])
+
     @classmethod
     def _parse_ticket_status(cls, ticket_status_tree):
-
-        params = dict(
-            id=cls._get_int(ticket_status_tree.find('id')),
-            title=cls._get_string(ticket_status_tree.find('title')),
-            displayorder=cls._get_int(ticket_status_tree.find('displayorder')),
-            departmentid=cls._get_int(ticket_status_tree.find('departmentid')),
-            displayicon=cls._get_string(ticket_status_tree.find('displayicon')),
-            type=cls._get_string(ticket_status_tree.find('type')),
-            displayinmainlist=cls._get_boolean(ticket_status_tree.find('displayinmainlist')),
-            markasresolved=cls._get_boolean(ticket_status_tree.find('markasresolved')),
-            displaycount=cls._get_int(ticket_status_tree.find('displaycount')),
-            statuscolor=cls._get_string(ticket_status_tree.find('statuscolor')),
-            statusbgcolor=cls._get_string(ticket_status_tree.find('statusbgcolor')),
-            resetduetime=cls._get_boolean(ticket_status_tree.find('resetduetime')),
-            triggersurvey=cls._get_boolean(ticket_status_tree.find('triggersurvey')),
-            staffvisibilitycustom=cls._get_boolean(ticket_status_tree.find('staffvisibilitycustom')),
-        )
-        return params
+        return cls.__schema__.parse(ticket_status_tree)
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [TicketStatus(api, **cls._parse_ticket_status(ticket_status_tree)) for ticket_status_tree in tree.findall('ticketstatus')]
+        for ticket_status_tree in cls._iterparse(api, response, 'ticketstatus'):
+            yield cls(api, **cls._parse_ticket_status(ticket_status_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('ticketstatus')
         if node is None:
             return None
         params = cls._parse_ticket_status(node)
-        return TicketStatus(api, **params)
+        return cls(api, **params)
 
     def __str__(self):
         return '<TicketStatus (%s): %s>' % (self.id, self.title)
@@ -185,35 +192,39 @@ class TicketType(KayakoObject):
         'uservisibilitycustom',
     ]
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('title'),
+        Field('displayorder', 'int'),
+        Field('departmentid', 'int'),
+        Field('displayicon'),
+        Field('type'),
+        Field('uservisibilitycustom', 'bool'),
+    ])
+
     @classmethod
     def _parse_ticket_type(cls, ticket_type_tree):
-
-        params = dict(
-            id=cls._get_int(ticket_type_tree.find('id')),
-            title=cls._get_string(ticket_type_tree.find('title')),
-            displayorder=cls._get_int(ticket_type_tree.find('displayorder')),
-            departmentid=cls._get_int(ticket_type_tree.find('departmentid')),
-            displayicon=cls._get_string(ticket_type_tree.find('displayicon')),
-            type=cls._get_string(ticket_type_tree.find('type')),
-            uservisibilitycustom=cls._get_boolean(ticket_type_tree.find('uservisibilitycustom')),
-        )
-        return params
+        return cls.__schema__.parse(ticket_type_tree)
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [TicketType(api, **cls._parse_ticket_type(ticket_type_tree)) for ticket_type_tree in tree.findall('tickettype')]
+        for ticket_type_tree in cls._iterparse(api, response, 'tickettype'):
+            yield cls(api, **cls._parse_ticket_type(ticket_type_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('tickettype')
         if node is None:
             return None
         params = cls._parse_ticket_type(node)
-        return TicketType(api, **params)
+        return cls(api, **params)
 
     def __str__(self):
         return '<TicketType (%s): %s>' % (self.id, self.title)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from kayako.objects.ticket.ticket import Ticket
+from kayako.exception import KayakoResponseError
+
+__all__ = [
+    'TicketFrame',
+]
+
+class TicketFrame(object):
+    '''
+    A ticket listing held as typed columns instead of Ticket objects, for
+    reports over whole departments. Each column is a NumPy int64 array
+    when NumPy is installed, or an ``array.array`` of longs otherwise, with
+    one value per ticket in the order of the listing::
+
+        >>> frame = api.get_all(TicketFrame, departmentid)
+        >>> overdue = (frame.resolutiondue > 0) & (frame.resolutiondue < time.time())
+
+    id               The Ticket ID
+    departmentid     The Department ID
+    statusid         The Ticket Status ID
+    priorityid       The Ticket Priority ID
+    ownerstaffid     The Owner Staff ID, 0 if unassigned
+    userid           The User ID
+    replies          The number of replies
+    creationtime     Times as seconds since the epoch, 0 if not set
+    lastactivity
+    nextreplydue
+    resolutiondue
+
+    Nodes missing from the response are read as 0.
+    '''
+
+    COLUMNS = ['id', 'departmentid', 'statusid', 'priorityid', 'ownerstaffid', 'userid', 'replies', 'creationtime', 'lastactivity', 'nextreplydue', 'resolutiondue']
+
+    TYPECODE = 'l'
+    ''' The ``array`` typecode columns are collected in. '''
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def _collect(cls, ticket_trees):
+        '''
+        Reads the columns from ticket nodes in one pass over each node's
+        children, without creating any Ticket objects. Returns a dictionary
+        of ``array.array`` columns.
+        '''
+        columns = dict((name, array(cls.TYPECODE)) for name in cls.COLUMNS)
+        appends = dict((name, column.append) for name, column in columns.iteritems())
+        append_id = appends.pop('id')
+        for ticket_tree in ticket_trees:
+            values = {}
+            for child in ticket_tree:
+                if child.tag in appends and child.tag not in values:
+                    values[child.tag] = child.text
+            tag = None
+            try:
+                append_id(int(ticket_tree.get('id')))
+                for tag, append in appends.iteritems():
+                    append(int(values.get(tag) or 0))
+            except (ValueError, TypeError), error:
+                raise KayakoResponseError('There was an error parsing the response (%s %s: %r):\n\t%s' % (ticket_tree.tag, tag or 'id', values.get(tag, ticket_tree.get('id')), error))
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns):
+        ''' Creates a TicketFrame, converting ``array`` columns to NumPy arrays if NumPy is installed. '''
+        if numpy is not None:
+            columns = dict((name, numpy.array(column, dtype=numpy.int64)) for name, column in columns.iteritems())
+        return cls(columns)
+
+    @classmethod
+    def get_all(cls, api, departmentid, ticketstatusid= -1, ownerstaffid= -1, userid= -1):
+        '''
+        Get the columns of all of the tickets filtered by the parameters.
+        See Ticket.get_all.
+        '''
+        response = Ticket._list_all(api, departmentid, ticketstatusid, ownerstaffid, userid)
+        return cls.from_columns(cls._collect(Ticket._iterparse(api, response, 'ticket')))
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns', {})
+        if name not in columns:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
+        return columns[name]
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __str__(self):
+        return '<TicketFrame: %s tickets>' % len(self)
@@ -10,8 +10,6 @@ Created on Jun 8, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.lib import UnsetParameter
 from kayako.core.object import KayakoObject
 from kayako.exception import KayakoRequestError, KayakoResponseError
@@ -90,9 +88,13 @@ class TicketNote(KayakoObject):
         Required:
             ticketid     The unique numeric identifier of the ticket. 
         '''
+        return list(cls.iter_all(api, ticketid))
+
+    @classmethod
+    def iter_all(cls, api, ticketid):
         response = api._request('%s/ListAll/%s' % (cls.controller, ticketid), 'GET')
-        tree = etree.parse(response)
-        return [TicketNote(api, **cls._parse_ticket_note(ticket_note_tree, ticketid)) for ticket_note_tree in tree.findall('note')]
+        for ticket_note_tree in cls._iterparse(api, response, 'note'):
+            yield cls(api, **cls._parse_ticket_note(ticket_note_tree, ticketid))
 
     @classmethod
     def get(cls, api, ticketid, id):
@@ -103,12 +105,12 @@ class TicketNote(KayakoObject):
                 return None
             else:
                 raise
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('note')
         if node is None:
             return None
         params = cls._parse_ticket_note(node, ticketid)
-        return TicketNote(api, **params)
+        return cls(api, **params)
 
     def add(self):
         '''
@@ -137,7 +139,7 @@ class TicketNote(KayakoObject):
             raise KayakoRequestError('To add a TicketNote, just one of the following parameters must be set: fullname, staffid. (id: %s)' % self.id)
 
         response = self.api._request(self.controller, 'POST', **parameters)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('note')
         self._update_from_response(node)
 
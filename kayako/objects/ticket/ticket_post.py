@@ -10,10 +10,9 @@ Created on Jun 8, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.lib import UnsetParameter
 from kayako.core.object import KayakoObject
+from kayako.core.schema import Field, Schema
 from kayako.exception import KayakoRequestError, KayakoResponseError
 
 class TicketPost(KayakoObject):
@@ -63,28 +62,29 @@ class TicketPost(KayakoObject):
 
     controller = '/Tickets/TicketPost'
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        #Field('subject'), # Not updated
+        Field('contents'),
+        Field('userid', 'int'),
+        Field('staffid', 'int'),
+        Field('dateline', 'date'),
+        Field('fullname'),
+        Field('email'),
+        Field('emailto'),
+        Field('ipaddress'),
+        Field('hasattachments', 'bool'),
+        Field('creator', 'int'),
+        Field('isthirdparty', 'bool'),
+        Field('ishtml', 'bool'),
+        Field('isemailed', 'bool'),
+        Field('issurveycomment', 'bool'),
+    ])
+
     @classmethod
     def _parse_ticket_post(cls, ticket_post_tree, ticket_id):
-
-        params = dict(
-            id=cls._get_int(ticket_post_tree.find('id')),
-            ticketid=ticket_id,
-            #subject=cls._get_string(ticket_post_tree.find('subject')), # Not updated
-            contents=cls._get_string(ticket_post_tree.find('contents')),
-            userid=cls._get_int(ticket_post_tree.find('userid')),
-            staffid=cls._get_int(ticket_post_tree.find('staffid')),
-            dateline=cls._get_date(ticket_post_tree.find('dateline')),
-            fullname=cls._get_string(ticket_post_tree.find('fullname')),
-            email=cls._get_string(ticket_post_tree.find('email')),
-            emailto=cls._get_string(ticket_post_tree.find('emailto')),
-            ipaddress=cls._get_string(ticket_post_tree.find('ipaddress')),
-            hasattachments=cls._get_boolean(ticket_post_tree.find('hasattachments')),
-            creator=cls._get_int(ticket_post_tree.find('creator')),
-            isthirdparty=cls._get_boolean(ticket_post_tree.find('isthirdparty')),
-            ishtml=cls._get_boolean(ticket_post_tree.find('ishtml')),
-            isemailed=cls._get_boolean(ticket_post_tree.find('isemailed')),
-            issurveycomment=cls._get_boolean(ticket_post_tree.find('issurveycomment')),
-        )
+        params = cls.__schema__.parse(ticket_post_tree)
+        params['ticketid'] = ticket_id
         return params
 
     def _update_from_response(self, ticket_post_tree):
@@ -120,9 +120,13 @@ class TicketPost(KayakoObject):
         Required:
             ticketid     The unique numeric identifier of the ticket. 
         '''
+        return list(cls.iter_all(api, ticketid))
+
+    @classmethod
+    def iter_all(cls, api, ticketid):
         response = api._request('%s/ListAll/%s' % (cls.controller, ticketid), 'GET')
-        tree = etree.parse(response)
-        return [TicketPost(api, **cls._parse_ticket_post(ticket_post_tree, ticketid)) for ticket_post_tree in tree.findall('post')]
+        for ticket_post_tree in cls._iterparse(api, response, 'post'):
+            yield cls(api, **cls._parse_ticket_post(ticket_post_tree, ticketid))
 
     @classmethod
     def get(cls, api, ticketid, id):
@@ -133,12 +137,12 @@ class TicketPost(KayakoObject):
                 return None
             else:
                 raise
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('post')
         if node is None:
             return None
         params = cls._parse_ticket_post(node, ticketid)
-        return TicketPost(api, **params)
+        return cls(api, **params)
 
     def add(self):
         '''
@@ -165,7 +169,7 @@ class TicketPost(KayakoObject):
             raise KayakoRequestError('To add a TicketPost, just one of the following parameters must be set: userid, staffid. (id: %s)' % self.id)
 
         response = self.api._request(self.controller, 'POST', **parameters)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('post')
         self._update_from_response(node)
 
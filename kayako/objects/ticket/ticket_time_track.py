@@ -95,9 +95,13 @@ class TicketTimeTrack(KayakoObject):
         Required:
             ticketid     The unique numeric identifier of the ticket. 
         '''
+        return list(cls.iter_all(api, ticketid))
+
+    @classmethod
+    def iter_all(cls, api, ticketid):
         response = api._request('%s/ListAll/%s' % (cls.controller, ticketid), 'GET')
-        tree = etree.parse(response)
-        return [TicketTimeTrack(api, **cls._parse_ticket_time_track(ticket_time_track_tree, ticketid)) for ticket_time_track_tree in tree.findall('timetrack')]
+        for ticket_time_track_tree in cls._iterparse(api, response, 'timetrack'):
+            yield cls(api, **cls._parse_ticket_time_track(ticket_time_track_tree, ticketid))
 
     @classmethod
     def get(cls, api, ticketid, id):
@@ -108,7 +112,7 @@ class TicketTimeTrack(KayakoObject):
                 return None
             else:
                 raise
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
 
         print etree.tostring(tree, pretty_print=True)
 
@@ -116,7 +120,7 @@ class TicketTimeTrack(KayakoObject):
         if node is None:
             return None
         params = cls._parse_ticket_time_track(node, ticketid)
-        return TicketTimeTrack(api, **params)
+        return cls(api, **params)
 
     def add(self):
         '''
@@ -144,7 +148,7 @@ class TicketTimeTrack(KayakoObject):
                 raise KayakoRequestError('Cannot add %s: Missing required field: %s.' % (self.__class__.__name__, required_parameter))
 
         response = self.api._request(self.controller, 'POST', **parameters)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('timetrack')
         self._update_from_response(node)
 
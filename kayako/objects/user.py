@@ -10,9 +10,8 @@ Created on May 9, 2011
 @author: evan
 '''
 
-from lxml import etree
-
 from kayako.core.object import KayakoObject
+from kayako.core.schema import Field, Schema
 
 __all__ = [
     'User',
@@ -73,29 +72,29 @@ class User(KayakoObject):
     __required_save_parameters__ = ['fullname']
     __save_parameters__ = ['fullname', 'usergroupid', 'email', 'userorganizationid', 'salutation', 'designation', 'phone', 'isenabled', 'userrole', 'timezone', 'enabledst', 'slaplanid', 'slaplanexpiry', 'userexpiry']
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('fullname'),
+        Field('usergroupid', 'int'),
+        Field('email', 'list'),
+        Field('userorganizationid', 'int', required=False),
+        Field('salutation'),
+        Field('designation'),
+        Field('phone'),
+        Field('isenabled', 'bool'),
+        Field('userrole'),
+        Field('timezone'),
+        Field('enabledst', 'bool'),
+        Field('slaplanid', 'int'),
+        Field('slaplanexpiry', 'date'),
+        Field('userexpiry', 'date'),
+        Field('dateline', 'date'),
+        Field('lastvisit', 'date'),
+    ])
+
     @classmethod
     def _parse_user(cls, user_tree):
-        emails = [cls._get_string(email_node) for email_node in user_tree.findall('email')]
-        params = dict(
-            id=cls._get_int(user_tree.find('id')),
-            fullname=cls._get_string(user_tree.find('fullname')),
-            usergroupid=cls._get_int(user_tree.find('usergroupid')),
-            email=emails,
-            userorganizationid=cls._get_int(user_tree.find('userorganizationid'), required=False),
-            salutation=cls._get_string(user_tree.find('salutation')),
-            designation=cls._get_string(user_tree.find('designation')),
-            phone=cls._get_string(user_tree.find('phone')),
-            isenabled=cls._get_boolean(user_tree.find('isenabled')),
-            userrole=cls._get_string(user_tree.find('userrole')),
-            timezone=cls._get_string(user_tree.find('timezone')),
-            enabledst=cls._get_boolean(user_tree.find('enabledst')),
-            slaplanid=cls._get_int(user_tree.find('slaplanid')),
-            slaplanexpiry=cls._get_date(user_tree.find('slaplanexpiry')),
-            userexpiry=cls._get_date(user_tree.find('userexpiry')),
-            dateline=cls._get_date(user_tree.find('dateline')),
-            lastvisit=cls._get_date(user_tree.find('lastvisit')),
-        )
-        return params
+        return cls.__schema__.parse(user_tree)
 
     def _update_from_response(self, user_tree):
 
@@ -127,29 +126,33 @@ class User(KayakoObject):
         Returns the users starting at User ID ``marker`` pulling in a maximum
         ``maxitems`` number of Users.
         '''
+        return list(cls.iter_all(api, marker, maxitems))
+
+    @classmethod
+    def iter_all(cls, api, marker=0, maxitems=1000):
         response = api._request('%s/Filter/%s/%s/' % (cls.controller, marker, maxitems), 'GET')
-        tree = etree.parse(response)
-        return [User(api, **cls._parse_user(user_tree)) for user_tree in tree.findall('user')]
+        for user_tree in cls._iterparse(api, response, 'user'):
+            yield cls(api, **cls._parse_user(user_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('user')
         if node is None:
             return None
         params = cls._parse_user(node)
-        return User(api, **params)
+        return cls(api, **params)
 
     def add(self):
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('user')
         self._update_from_response(node)
 
     def save(self):
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('user')
         self._update_from_response(node)
 
@@ -183,15 +186,16 @@ class UserGroup(KayakoObject):
     __required_save_parameters__ = ['title']
     __save_parameters__ = ['title']
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('title'),
+        Field('grouptype'),
+        Field('ismaster', 'bool'),
+    ])
+
     @classmethod
     def _parse_user_group(cls, user_group_tree):
-        params = dict(
-            id=cls._get_int(user_group_tree.find('id')),
-            title=cls._get_string(user_group_tree.find('title')),
-            grouptype=cls._get_string(user_group_tree.find('grouptype')),
-            ismaster=cls._get_boolean(user_group_tree.find('ismaster')),
-        )
-        return params
+        return cls.__schema__.parse(user_group_tree)
 
     def _update_from_response(self, user_group_tree):
         for int_node in ['id']:
@@ -211,29 +215,33 @@ class UserGroup(KayakoObject):
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [UserGroup(api, **cls._parse_user_group(user_group_tree)) for user_group_tree in tree.findall('usergroup')]
+        for user_group_tree in cls._iterparse(api, response, 'usergroup'):
+            yield cls(api, **cls._parse_user_group(user_group_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('usergroup')
         if node is None:
             return None
         params = cls._parse_user_group(node)
-        return UserGroup(api, **params)
+        return cls(api, **params)
 
     def add(self):
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('usergroup')
         self._update_from_response(node)
 
     def save(self):
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('usergroup')
         self._update_from_response(node)
 
@@ -287,26 +295,27 @@ class UserOrganization(KayakoObject):
     __required_save_parameters__ = ['name']
     __save_parameters__ = ['name', 'organizationtype', 'address', 'city', 'state', 'postalcode', 'country', 'phone', 'fax', 'website', 'slaplanid', 'slaplanexpiry']
 
+    __schema__ = Schema([
+        Field('id', 'int'),
+        Field('name'),
+        Field('organizationtype'),
+        Field('address'),
+        Field('city'),
+        Field('state'),
+        Field('postalcode'),
+        Field('country'),
+        Field('phone'),
+        Field('fax'),
+        Field('website'),
+        Field('dateline', 'date'),
+        Field('lastupdate', 'date'),
+        Field('slaplanid', 'int'),
+        Field('slaplanexpiry', 'date'),
+    ])
+
     @classmethod
     def _parse_user_organization(cls, user_organization_tree):
-        params = dict(
-            id=cls._get_int(user_organization_tree.find('id')),
-            name=cls._get_string(user_organization_tree.find('name')),
-            organizationtype=cls._get_string(user_organization_tree.find('organizationtype')),
-            address=cls._get_string(user_organization_tree.find('address')),
-            city=cls._get_string(user_organization_tree.find('city')),
-            state=cls._get_string(user_organization_tree.find('state')),
-            postalcode=cls._get_string(user_organization_tree.find('postalcode')),
-            country=cls._get_string(user_organization_tree.find('country')),
-            phone=cls._get_string(user_organization_tree.find('phone')),
-            fax=cls._get_string(user_organization_tree.find('fax')),
-            website=cls._get_string(user_organization_tree.find('website')),
-            dateline=cls._get_date(user_organization_tree.find('dateline')),
-            lastupdate=cls._get_date(user_organization_tree.find('lastupdate')),
-            slaplanid=cls._get_int(user_organization_tree.find('slaplanid')),
-            slaplanexpiry=cls._get_date(user_organization_tree.find('slaplanexpiry')),
-        )
-        return params
+        return cls.__schema__.parse(user_organization_tree)
 
     def _update_from_response(self, user_tree):
         for int_node in ['id', 'slaplanid']:
@@ -326,29 +335,33 @@ class UserOrganization(KayakoObject):
 
     @classmethod
     def get_all(cls, api):
+        return list(cls.iter_all(api))
+
+    @classmethod
+    def iter_all(cls, api):
         response = api._request(cls.controller, 'GET')
-        tree = etree.parse(response)
-        return [UserOrganization(api, **cls._parse_user_organization(user_organization_tree)) for user_organization_tree in tree.findall('userorganization')]
+        for user_organization_tree in cls._iterparse(api, response, 'userorganization'):
+            yield cls(api, **cls._parse_user_organization(user_organization_tree))
 
     @classmethod
     def get(cls, api, id):
         response = api._request('%s/%s/' % (cls.controller, id), 'GET')
-        tree = etree.parse(response)
+        tree = cls._parse(api, response)
         node = tree.find('userorganization')
         if node is None:
             return node
         params = cls._parse_user_organization(node)
-        return UserOrganization(api, **params)
+        return cls(api, **params)
 
     def add(self):
         response = self._add(self.controller)
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('userorganization')
         self._update_from_response(node)
 
     def save(self):
         response = self._save('%s/%s/' % (self.controller, self.id))
-        tree = etree.parse(response)
+        tree = self._parse(self.api, response)
         node = tree.find('userorganization')
         self._update_from_response(node)
 
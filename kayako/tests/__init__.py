@@ -48,3 +48,70 @@ class KayakoAPITest(KayakoTest):
     def api(self):
         from kayako.api import KayakoAPI
         return KayakoAPI(self.API_URL, self.API_KEY, self.SECRET_KEY)
+
+class KayakoServerTest(KayakoTest):
+    '''
+    Runs a local HTTP/1.1 server for the duration of each test.  Set
+    ``self.responses`` to a dictionary of ``e=`` controller paths to
+    ``(status, body)`` or ``(status, body, headers)`` tuples, or callables
+    returning them; ``self.requests`` records every request served and
+    ``self.paths`` the path of each request line.
+    '''
+
+    def setUp(self):
+        import threading
+        from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+        from SocketServer import ThreadingMixIn
+
+        test = self
+        self.responses = {}
+        self.requests = []
+        self.paths = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _serve(self):
+                import urlparse
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else ''
+                query = urlparse.parse_qs(urlparse.urlsplit(self.path).query)
+                controller = query.get('e', [''])[0]
+                test.paths.append(self.path)
+                test.requests.append((self.command, controller, self.headers, body))
+                response = test.responses.get(controller, (404, 'Not Found'))
+                if callable(response):
+                    response = response()
+                status, data, headers = (response + ({},))[:3]
+                self.send_response(status)
+                for header, value in headers.iteritems():
+                    self.send_header(header, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                pass
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.API_URL = 'http://127.0.0.1:%s/api/index.php' % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def api(self):
+        from kayako.api import KayakoAPI
+        return KayakoAPI(self.API_URL, 'key', 'secret')
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+from kayako.tests.core.test_flight import STATUS_XML
+
+class TestResponseCache(KayakoTest):
+
+    def test_ttl(self):
+        from kayako.core.cache import ResponseCache
+        from kayako.objects import TicketStatus, User
+        cache = ResponseCache({TicketStatus: 60, '/Base/User': 10})
+        assert cache.ttl('/Tickets/TicketStatus') == 60
+        assert cache.ttl('/Tickets/TicketStatus/1/') == 60
+        assert cache.ttl('/Base/User/Filter/1/1000/') == 10
+        assert cache.ttl('/Base/UserGroup') == 0
+        assert cache.ttl('/Tickets/Ticket/1/') == 0
+
+    def test_default_ttls(self):
+        from kayako.core.cache import ResponseCache
+        cache = ResponseCache()
+        for controller in ['/Tickets/TicketStatus', '/Tickets/TicketPriority', '/Tickets/TicketType', '/Base/Department', '/Base/StaffGroup', '/Base/UserGroup']:
+            assert cache.ttl(controller) > 0, controller
+        assert cache.ttl('/Base/User') == 0
+
+    def test_expiry(self):
+        import time
+        from kayako.core.cache import ResponseCache
+        cache = ResponseCache({'/Base/Department': 0.05})
+        cache.set(('/Base/Department', None), 'body')
+        assert cache.get(('/Base/Department', None)) == 'body'
+        time.sleep(0.1)
+        assert cache.get(('/Base/Department', None)) is None
+        assert cache.size == 0
+
+    def test_lru_eviction(self):
+        from kayako.core.cache import ResponseCache
+        cache = ResponseCache({'/Base/Department': 60}, max_bytes=10)
+        cache.set(('/Base/Department/1/', None), 'aaaa')
+        cache.set(('/Base/Department/2/', None), 'bbbb')
+        cache.get(('/Base/Department/1/', None))
+        cache.set(('/Base/Department/3/', None), 'cccc')
+        assert cache.get(('/Base/Department/2/', None)) is None
+        assert cache.get(('/Base/Department/1/', None)) == 'aaaa'
+        assert cache.size == 8
+        cache.set(('/Base/Department/4/', None), 'x' * 11)
+        assert len(cache) == 2
+
+    def test_invalidate(self):
+        from kayako.core.cache import ResponseCache
+        from kayako.objects import Department
+        cache = ResponseCache()
+        cache.set(('/Base/Department', None), 'all')
+        cache.set(('/Base/Department/1/', None), 'one')
+        cache.set(('/Base/UserGroup', None), 'groups')
+        cache.invalidate(Department)
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0 and cache.size == 0
+
+    def test_generation(self):
+        from kayako.core.cache import ResponseCache
+        cache = ResponseCache()
+        generation = cache.generation('/Base/Department')
+        groups = cache.generation('/Base/UserGroup')
+        cache.invalidate('/Base/Department/1')
+        # A response older than the invalidation is not stored
+        cache.set(('/Base/Department', None), 'stale', generation)
+        assert len(cache) == 0
+        cache.set(('/Base/Department', None), 'fresh', cache.generation('/Base/Department'))
+        cache.set(('/Base/UserGroup', None), 'groups', groups)
+        assert len(cache) == 2
+        generation = cache.generation('/Base/UserGroup')
+        cache.clear()
+        cache.set(('/Base/UserGroup', None), 'groups', generation)
+        assert len(cache) == 0
+
+class TestAPICache(KayakoServerTest):
+
+    def test_first_cached(self):
+        from kayako.api import KayakoAPI
+        from kayako.core.cache import ResponseCache
+        from kayako.objects import TicketStatus
+        self.responses['/Tickets/TicketStatus'] = (200, STATUS_XML)
+        api = KayakoAPI(self.API_URL, 'key', 'secret', cache=ResponseCache())
+        for i in range(3):
+            assert api.first(TicketStatus, title='Open').id == 1
+        assert len(self.requests) == 1
+        assert api.cache.hits == 2
+
+    def test_write_invalidates(self):
+        from kayako.api import KayakoAPI
+        from kayako.core.cache import ResponseCache
+        from kayako.objects import TicketStatus
+        self.responses['/Tickets/TicketStatus'] = (200, STATUS_XML)
+        self.responses['/Tickets/TicketStatus/1/'] = (200, STATUS_XML)
+        api = KayakoAPI(self.API_URL, 'key', 'secret', cache=ResponseCache())
+        api.get_all(TicketStatus)
+        api._request('/Tickets/TicketStatus/1/', 'DELETE').read()
+        api.get_all(TicketStatus)
+        assert [request[0] for request in self.requests] == ['GET', 'DELETE', 'GET']
+
+    def test_uncached_controller(self):
+        from kayako.api import KayakoAPI
+        from kayako.core.cache import ResponseCache
+        self.responses['/Core/Test'] = (200, '<test>ok</test>')
+        api = KayakoAPI(self.API_URL, 'key', 'secret', cache=ResponseCache())
+        api._request('/Core/Test', 'GET').read()
+        api._request('/Core/Test', 'GET').read()
+        assert len(self.requests) == 2
+        assert len(api.cache) == 0
+
+    def test_write_during_get(self):
+        import threading
+        from kayako.api import KayakoAPI
+        from kayako.core.cache import ResponseCache
+        from kayako.objects import TicketStatus
+        sent = threading.Event()
+        saved = threading.Event()
+        def slow():
+            # The first GET answers with the old body once the save is done
+            if not sent.is_set():
+                sent.set()
+                saved.wait(5)
+                return (200, STATUS_XML)
+            return (200, STATUS_XML.replace('Open', 'Reopened'))
+        self.responses['/Tickets/TicketStatus'] = slow
+        self.responses['/Tickets/TicketStatus/1/'] = (200, STATUS_XML)
+        api = KayakoAPI(self.API_URL, 'key', 'secret', cache=ResponseCache())
+        results = []
+        reader = threading.Thread(target=lambda: results.append(api.get_all(TicketStatus)))
+        reader.start()
+        sent.wait(5)
+        api._request('/Tickets/TicketStatus/1/', 'POST').read()
+        saved.set()
+        reader.join(5)
+        assert results[0][0].title == 'Open'
+        # The old body was not cached, the next get sees the save
+        assert len(api.cache) == 0
+        assert api.get_all(TicketStatus)[0].title == 'Reopened'
+        assert api.get_all(TicketStatus)[0].title == 'Reopened'
+        assert [request[0] for request in self.requests] == ['GET', 'POST', 'GET']
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+
+STATUS_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<ticketstatuses>
+    <ticketstatus>
+        <id>1</id>
+        <title>Open</title>
+        <displayorder>1</displayorder>
+        <departmentid>0</departmentid>
+        <displayicon></displayicon>
+        <type>public</type>
+        <displayinmainlist>1</displayinmainlist>
+        <markasresolved>0</markasresolved>
+        <displaycount>1</displaycount>
+        <statuscolor>#000000</statuscolor>
+        <statusbgcolor>#ffffff</statusbgcolor>
+        <resetduetime>0</resetduetime>
+        <triggersurvey>0</triggersurvey>
+        <staffvisibilitycustom>0</staffvisibilitycustom>
+    </ticketstatus>
+</ticketstatuses>'''
+
+class TestSingleFlight(KayakoTest):
+
+    def _concurrently(self, count, function):
+        import threading
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(function())) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_coalesce(self):
+        import threading
+        from kayako.core.flight import SingleFlight
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return object()
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = self._concurrently(5, lambda: flight.do('key', slow))
+        assert len(calls) == 1
+        assert len(set(id(result) for result in results)) == 1
+        assert flight.coalesced == 4
+
+    def test_sequential_calls_not_coalesced(self):
+        from kayako.core.flight import SingleFlight
+        flight = SingleFlight()
+        assert flight.do('key', lambda: 1) == 1
+        assert flight.do('key', lambda: 2) == 2
+        assert flight.calls == 2
+
+    def test_exception_shared(self):
+        from kayako.core.flight import SingleFlight
+        flight = SingleFlight()
+        self.assertRaises(ValueError, flight.do, 'key', int, 'abc')
+        assert not flight._in_flight
+
+class TestAPICoalescing(KayakoServerTest):
+
+    def test_get_all_coalesced(self):
+        import threading
+        import time
+        from kayako.api import KayakoAPI
+        from kayako.objects import TicketStatus
+        def respond():
+            time.sleep(0.2)
+            return (200, STATUS_XML)
+        self.responses['/Tickets/TicketStatus'] = respond
+        api = KayakoAPI(self.API_URL, 'key', 'secret', coalesce=True)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(api.first(TicketStatus, title='Open'))) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(self.requests) == 1, len(self.requests)
+        assert len(set(id(result) for result in results)) == 1
+        assert results[0].title == 'Open'
+
+    def test_different_arguments_not_coalesced(self):
+        from kayako.api import KayakoAPI
+        api = KayakoAPI(self.API_URL, 'key', 'secret', coalesce=True)
+        assert api._flight_key('GET', object, (1, [2, 3]), {}) == api._flight_key('GET', object, (1, (2, 3)), {})
+        assert api._flight_key('GET', object, (1,), {}) != api._flight_key('GET', object, (2,), {})
+        assert api._flight_key('GET', object, (1,), {}) != api._flight_key('GET ALL', object, (1,), {})
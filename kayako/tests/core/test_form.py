@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+
+class TestFormData(KayakoTest):
+
+    def test_matches_urlencode(self):
+        import urllib
+        import urlparse
+        from kayako.core.form import FormData
+        parameters = {'subject': 'a b&c=d/e', 'contents': '+\x00\xff\n' * 10, 'tags[]': 'x'}
+        body = str(FormData(parameters))
+        assert sorted(urlparse.parse_qsl(body)) == sorted(parameters.items())
+        assert len(FormData(parameters)) == len(body)
+        assert 'subject=%s' % urllib.quote(parameters['subject']) in body
+
+    def test_lists(self):
+        from kayako.core.form import FormData
+        assert str(FormData({'data': ['abc', '123']})) == 'data[]=abc&data[]=123'
+        assert str(FormData({'data': []})) == 'data[]='
+        assert len(FormData({})) == 0
+
+    def test_chunks(self):
+        from kayako.core.form import FormData
+        value = 'ab /+' * 10000
+        form = FormData({'contents': value})
+        chunks = list(form)
+        assert len(chunks) > 2
+        assert max(len(chunk) for chunk in chunks) <= 3 * form.CHUNK_SIZE
+        assert ''.join(chunks) == 'contents=' + __import__('urllib').quote(value)
+        assert len(form) == len(''.join(chunks))
+
+class TestFormDataStreaming(KayakoServerTest):
+
+    def test_streamed_post(self):
+        import urlparse
+        from kayako.core.form import FormData
+        self.responses['/Base/Department'] = (200, '<departments />')
+        contents = 'x&y ' * FormData.STREAM_SIZE
+        data = self.api._form_data(contents=contents, title='Big')
+        assert isinstance(data, FormData)
+        self.api._request('/Base/Department', 'POST', contents=contents, title='Big')
+        command, controller, headers, body = self.requests[0]
+        assert command == 'POST'
+        assert int(headers['Content-Length']) == len(body)
+        fields = dict(urlparse.parse_qsl(body))
+        assert fields['contents'] == contents
+        assert fields['title'] == 'Big'
+
+    def test_small_body_is_joined(self):
+        api = self.api
+        assert api._form_data(title='Small') == 'title=Small'
+        assert api._form_data() is None
+
+ATTACHMENT_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<attachments>
+    <attachment>
+        <id>7</id>
+        <ticketid>1</ticketid>
+        <ticketpostid>2</ticketpostid>
+        <filename>patch.diff</filename>
+        <filesize>200000</filesize>
+        <filetype>text/x-diff</filetype>
+        <dateline>1305125000</dateline>
+    </attachment>
+</attachments>'''
+
+class TestBase64File(KayakoTest):
+
+    def test_encoding(self):
+        import base64
+        import urllib
+        from StringIO import StringIO
+        from kayako.core.form import Base64File, FormData
+        data = ''.join(chr(i % 256) for i in xrange(200000))
+        fileobj = StringIO('header' + data)
+        fileobj.seek(6)
+        value = Base64File(fileobj)
+        assert value.size() == len(data)
+        assert len(value) == len(base64.b64encode(data))
+        assert str(value) == base64.b64encode(data)
+        assert value.read() == data
+        form = FormData({'contents': value})
+        body = ''.join(form)
+        assert body == 'contents=%s' % urllib.quote(base64.b64encode(data))
+        assert len(form) == len(body)
+        assert max(len(chunk) for chunk in form) <= 3 * 4 * value.CHUNK_SIZE // 3
+
+class TestTicketAttachmentUpload(KayakoServerTest):
+
+    def test_add_from_file(self):
+        import base64
+        import tempfile
+        import urlparse
+        from kayako.objects import TicketAttachment
+        self.responses['/Tickets/TicketAttachment'] = (200, ATTACHMENT_XML)
+        data = ''.join(chr(i % 251) for i in xrange(200000))
+        with tempfile.TemporaryFile() as fileobj:
+            fileobj.write(data)
+            fileobj.seek(0)
+            attachment = self.api.create(TicketAttachment, ticketid=1, ticketpostid=2, filename='patch.diff')
+            attachment.set_contents_from_file(fileobj)
+            assert attachment.filesize == len(data)
+            assert attachment.get_contents() == data
+            attachment.add()
+        assert attachment.id == 7
+        command, controller, headers, body = self.requests[0]
+        assert int(headers['Content-Length']) == len(body)
+        fields = dict(urlparse.parse_qsl(body))
+        assert base64.b64decode(fields['contents']) == data
+        assert fields['filename'] == 'patch.diff'
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoTest
+
+class TestWorkerPool(KayakoTest):
+
+    def test_submit(self):
+        from kayako.core.futures import WorkerPool
+        pool = WorkerPool(2)
+        future = pool.submit(lambda x, y: x + y, 1, y=2)
+        assert future.result(5) == 3
+        assert future.done()
+        pool.shutdown()
+
+    def test_exception(self):
+        from kayako.core.futures import WorkerPool
+        pool = WorkerPool(1)
+        future = pool.submit(int, 'abc')
+        self.assertRaises(ValueError, future.result, 5)
+        assert isinstance(future.exception(), ValueError)
+        pool.shutdown()
+
+    def test_map_order(self):
+        import time
+        from kayako.core.futures import WorkerPool
+        pool = WorkerPool(4)
+        def slow(x):
+            time.sleep(0.01 * (5 - x))
+            return x
+        futures = pool.map(slow, range(5))
+        assert [future.result(5) for future in futures] == range(5)
+        pool.shutdown()
+
+    def test_bounded(self):
+        import threading
+        import time
+        from kayako.core.futures import WorkerPool, wait
+        pool = WorkerPool(2)
+        lock = threading.Lock()
+        running = [0, 0]
+        def work(x):
+            lock.acquire()
+            running[0] += 1
+            running[1] = max(running)
+            lock.release()
+            time.sleep(0.01)
+            lock.acquire()
+            running[0] -= 1
+            lock.release()
+        done, not_done = wait(pool.map(work, range(10)), 5)
+        assert not not_done
+        assert running[1] <= 2, running
+        pool.shutdown()
+
+    def test_cancel_and_callback(self):
+        import threading
+        from kayako.core.futures import WorkerPool
+        pool = WorkerPool(1)
+        event = threading.Event()
+        blocker = pool.submit(event.wait, 5)
+        pending = pool.submit(lambda: 1)
+        called = []
+        pending.add_done_callback(called.append)
+        assert pending.cancel()
+        assert called == [pending]
+        event.set()
+        blocker.result(5)
+        assert pending.cancelled()
+        pool.shutdown()
+
+    def test_result_timeout(self):
+        import threading
+        from kayako.core.futures import WorkerPool
+        from kayako.exception import KayakoRequestError
+        pool = WorkerPool(1)
+        event = threading.Event()
+        future = pool.submit(event.wait, 5)
+        self.assertRaises(KayakoRequestError, future.result, 0.01)
+        event.set()
+        pool.shutdown()
+
+class TestPrefetched(KayakoTest):
+
+    def test_order(self):
+        from kayako.core.futures import prefetched
+        assert list(prefetched(iter(range(100)), 3)) == range(100)
+        assert list(prefetched([])) == []
+
+    def test_ahead(self):
+        import time
+        from kayako.core.futures import prefetched
+        produced = []
+        def items():
+            for item in range(10):
+                produced.append(item)
+                yield item
+        iterator = prefetched(items(), 2)
+        assert iterator.next() == 0
+        deadline = time.time() + 5
+        while len(produced) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        # Two items queued, and one more produced waiting for room
+        assert len(produced) == 4
+        assert list(iterator) == range(1, 10)
+
+    def test_exception(self):
+        from kayako.core.futures import prefetched
+        def items():
+            yield 1
+            raise ValueError('broken')
+        iterator = prefetched(items())
+        assert iterator.next() == 1
+        self.assertRaises(ValueError, iterator.next)
+
+    def test_close(self):
+        import threading
+        import time
+        from kayako.core.futures import prefetched
+        before = threading.active_count()
+        def items():
+            item = 0
+            while True:
+                yield item
+                item += 1
+        iterator = prefetched(items())
+        assert iterator.next() == 0
+        iterator.close()
+        deadline = time.time() + 5
+        while threading.active_count() > before and time.time() < deadline:
+            time.sleep(0.01)
+        assert threading.active_count() == before
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+
+class TestLatencyTracker(KayakoTest):
+
+    def test_controller_key(self):
+        from kayako.core.hedge import controller_key
+        assert controller_key('/Tickets/Ticket/123/') == '/Tickets/Ticket/*/'
+        assert controller_key('/Tickets/Ticket/ListAll/1,2/-1/-1/-1/') == '/Tickets/Ticket/ListAll/*/*/*/*/'
+        assert controller_key('/Base/Department') == '/Base/Department'
+
+    def test_percentile(self):
+        from kayako.core.hedge import LatencyTracker
+        tracker = LatencyTracker(window=100)
+        for i in range(1, 101):
+            tracker.record('/Tickets/Ticket/%s/' % i, i / 100.0)
+        assert tracker.count('/Tickets/Ticket/1/') == 100
+        assert tracker.percentile('/Tickets/Ticket/1/', 50) == 0.5, tracker.percentile('/Tickets/Ticket/1/', 50)
+        assert tracker.percentile('/Tickets/Ticket/1/', 99) == 0.99
+        assert tracker.percentile('/Base/Department', 50) is None
+        assert tracker.stats()['/Tickets/Ticket/*/']['count'] == 100
+
+    def test_window(self):
+        from kayako.core.hedge import LatencyTracker
+        tracker = LatencyTracker(window=10)
+        for i in range(100):
+            tracker.record('/Base/Department', i)
+        assert tracker.count('/Base/Department') == 10
+        assert tracker.percentile('/Base/Department', 0) == 90
+
+class TestHedgePolicy(KayakoServerTest):
+
+    def test_delay(self):
+        from kayako.core.hedge import HedgePolicy
+        policy = HedgePolicy(percentile=50, min_samples=3, initial_delay=2.0, max_delay=1.0)
+        assert policy.delay('/Base/Department') == 1.0
+        for seconds in (0.1, 0.2, 0.3):
+            policy.tracker.record('/Base/Department', seconds)
+        assert policy.delay('/Base/Department') == 0.2
+
+    def test_hedged_request_wins(self):
+        import time
+        from kayako.api import KayakoAPI
+        from kayako.core.hedge import HedgePolicy
+        calls = []
+        def respond():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(1)
+                return (200, '<test>slow</test>')
+            return (200, '<test>fast</test>')
+        self.responses['/Core/Test'] = respond
+        api = KayakoAPI(self.API_URL, 'key', 'secret', hedge=HedgePolicy(initial_delay=0.05))
+        started = time.time()
+        assert api._request('/Core/Test', 'GET').read() == '<test>fast</test>'
+        assert time.time() - started < 0.9
+        assert api.hedge.hedged == 1
+        assert api.hedge.wins == 1
+        # The cancelled original counts with the time it had run for
+        assert api.hedge.tracker.count('/Core/Test') == 1
+        assert api.hedge.tracker.percentile('/Core/Test', 50) >= 0.05
+        # and its connection is shut down instead of waiting for the response
+        deadline = time.time() + 0.5
+        while api.pool._in_flight and time.time() < deadline:
+            time.sleep(0.01)
+        assert not api.pool._in_flight
+
+    def test_loser_recorded(self):
+        import time
+        from kayako.api import KayakoAPI
+        from kayako.core.hedge import HedgePolicy
+        from kayako.core.transport import UrllibTransport
+        calls = []
+        def respond():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.5)
+            return (200, '<test>ok</test>')
+        self.responses['/Core/Test'] = respond
+        api = KayakoAPI(self.API_URL, 'key', 'secret', hedge=HedgePolicy(initial_delay=0.05), transport=UrllibTransport())
+        api._request('/Core/Test', 'GET').read()
+        assert api.hedge.wins == 1
+        # UrllibTransport cannot cancel, the original's time is recorded once it arrives
+        deadline = time.time() + 5
+        while not api.hedge.tracker.count('/Core/Test') and time.time() < deadline:
+            time.sleep(0.01)
+        assert api.hedge.tracker.percentile('/Core/Test', 50) >= 0.5
+
+    def test_fast_request_not_hedged(self):
+        from kayako.api import KayakoAPI
+        from kayako.core.hedge import HedgePolicy
+        self.responses['/Core/Test'] = (200, '<test>ok</test>')
+        api = KayakoAPI(self.API_URL, 'key', 'secret', hedge=HedgePolicy(initial_delay=1))
+        assert api._request('/Core/Test', 'GET').read() == '<test>ok</test>'
+        api._request('/Core/Test', 'POST').read()
+        assert api.hedge.hedged == 0
+        assert len(self.requests) == 2
+
+    def test_error(self):
+        from kayako.api import KayakoAPI
+        from kayako.core.hedge import HedgePolicy
+        from kayako.exception import KayakoResponseError
+        api = KayakoAPI(self.API_URL, 'key', 'secret', hedge=HedgePolicy(initial_delay=1))
+        self.assertRaises(KayakoResponseError, api._request, '/Core/Test', 'GET')
@@ -32,6 +32,93 @@ class TestKayakoObject(KayakoTest):
         from kayako.exception import KayakoMethodNotImplementedError
         self.assertRaises(KayakoMethodNotImplementedError, self.kayako_object.get, self.api, 123)
 
+    def test_kayko_iter_all(self):
+        from kayako.exception import KayakoMethodNotImplementedError
+        self.assertRaises(KayakoMethodNotImplementedError, self.kayako_object.iter_all, self.api)
+
+    def test_iterparse(self):
+        from StringIO import StringIO
+        from kayako.core.object import KayakoObject
+        xml = '<posts><post><id>1</id><post>nested</post></post><other /><post><id>2</id></post></posts>'
+        ids = []
+        posts = []
+        for post in KayakoObject._iterparse(self.api, StringIO(xml), 'post'):
+            if posts:
+                # The previous element is cleared before the next one is yielded
+                assert len(posts[-1]) == 0
+            ids.append(post.findtext('id'))
+            posts.append(post)
+        assert ids == ['1', '2']
+        # Processed elements are dropped from the root
+        assert posts[0].getparent() is None
+        assert len(posts[1].getparent()) == 1
+
+    def test_compact(self):
+        from kayako.core.lib import UnsetParameter
+        from kayako.objects import Department
+        Compact = Department.compact()
+        assert Compact is Department.compact()
+        assert Compact.compact() is Compact
+        assert issubclass(Compact, Department)
+        assert Compact.__name__ == 'Department'
+        department = Compact(self.api, id=1, title='Sales', module='tickets')
+        normal = Department(self.api, id=1, title='Sales', module='tickets')
+        # Parameters live in slots; unset ones are not stored at all
+        assert department.__dict__ == {}
+        assert department.parameters == normal.parameters
+        assert department.parentdepartmentid is UnsetParameter
+        department.parentdepartmentid = 2
+        assert department.parentdepartmentid == 2
+        department.extra = 'value'
+        assert department.__dict__ == {'extra': 'value'}
+        self.assertRaises(AttributeError, getattr, department, 'missing')
+
+    def test_compact_pickle(self):
+        import copy
+        import pickle
+        from kayako.core.lib import UnsetParameter
+        from kayako.objects import Department
+        department = Department.compact()(None, id=1, title='Sales', module='tickets')
+        department.extra = 'value'
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(department, protocol))
+            assert type(loaded) is Department.compact()
+            assert loaded.parameters == department.parameters
+            assert loaded.parentdepartmentid is UnsetParameter
+            assert loaded.extra == 'value'
+        assert copy.copy(department).title == 'Sales'
+
+    def test_pickle_with_api(self):
+        import copy
+        import pickle
+        from kayako.api import KayakoAPI
+        from kayako.core.cache import ResponseCache
+        from kayako.core.hedge import HedgePolicy
+        from kayako.core.limiter import AIMDLimiter
+        from kayako.core.pool import HTTPConnectionPool
+        from kayako.objects import Department
+        api = KayakoAPI('url', 'key', 'secret', transport=HTTPConnectionPool(timeout=5), hedge=HedgePolicy(percentile=90),
+                        limiter=AIMDLimiter(maximum=20), coalesce=True, cache=ResponseCache(), huge_tree=True)
+        api.cache.set(('/Base/Department', None), '<departments />')
+        for department in [Department(api, id=1, title='Sales'), Department.compact()(api, id=1, title='Sales')]:
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                for loaded in [pickle.loads(pickle.dumps(department, protocol)), copy.deepcopy(department)]:
+                    assert loaded.title == 'Sales'
+                    loaded_api = loaded.api
+                    assert loaded_api is not api
+                    assert (loaded_api.api_url, loaded_api.api_key, loaded_api.secret_key) == ('url', 'key', 'secret')
+                    assert loaded_api.pool.timeout == 5 and loaded_api.pool.misses == 0
+                    assert loaded_api.hedge.percentile == 90
+                    assert loaded_api.limiter.maximum == 20 and loaded_api.limiter.in_flight == 0
+                    assert loaded_api.flight is not None
+                    assert loaded_api.parsers.options['huge_tree']
+                    # Settings are kept, entries are not
+                    assert loaded_api.cache.ttl('/Base/Department') == 300
+                    assert len(loaded_api.cache) == 0
+        # The default timeout survives too
+        loaded_api = pickle.loads(pickle.dumps(KayakoAPI('url', 'key', 'secret')))
+        assert loaded_api.pool.timeout is HTTPConnectionPool().timeout
+
     def test_kayko_add(self):
         from kayako.exception import KayakoMethodNotImplementedError
         self.assertRaises(KayakoMethodNotImplementedError, self.kayako_object.add)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+
+class TestAIMDLimiter(KayakoTest):
+
+    def _saturate(self, limiter, latency, error=False):
+        slots = int(limiter.limit)
+        for i in range(slots):
+            limiter.acquire()
+        for i in range(slots):
+            limiter.release(latency, error)
+
+    def test_additive_increase(self):
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=4, maximum=6)
+        for i in range(20):
+            self._saturate(limiter, 0.1)
+        assert limiter.limit == 6, limiter.limit
+        assert limiter.in_flight == 0
+
+    def test_no_increase_when_idle(self):
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=4)
+        for i in range(20):
+            limiter.acquire()
+            limiter.release(0.1)
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_on_error(self):
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=8, minimum=2)
+        limiter.acquire()
+        limiter.release(0, error=True)
+        assert limiter.limit == 4
+        limiter._last_decrease = 0
+        limiter.acquire()
+        limiter.release(0, error=True)
+        limiter._last_decrease = 0
+        limiter.acquire()
+        limiter.release(0, error=True)
+        assert limiter.limit == 2
+
+    def test_decrease_on_latency_spike(self):
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=8, tolerance=2)
+        limiter.acquire()
+        limiter.release(0.001, controller='/Base/Department/1/')
+        limiter._last_decrease = 0
+        limiter.acquire()
+        limiter.release(0.01, controller='/Base/Department/2/')
+        assert limiter.limit == 4
+        assert limiter.baselines == {'/Base/Department/*/': 0.001}
+
+    def test_baseline_per_controller(self):
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=8, tolerance=2)
+        for i in range(10):
+            limiter.acquire()
+            limiter.release(0.001, controller='/Tickets/Ticket/%s/' % i)
+        # A slow listing is not a spike of the small GETs
+        limiter.acquire()
+        limiter.release(1.0, controller='/Tickets/Ticket/ListAll/1/-1/-1/-1/')
+        assert limiter.limit == 8
+        assert limiter.decreases == 0
+
+    def test_caps_in_flight(self):
+        import threading
+        import time
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=2, maximum=2)
+        lock = threading.Lock()
+        peak = [0]
+        def work():
+            limiter.acquire()
+            lock.acquire()
+            peak[0] = max(peak[0], limiter.in_flight)
+            lock.release()
+            time.sleep(0.01)
+            limiter.release(0.01)
+        threads = [threading.Thread(target=work) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak[0] == 2, peak
+
+    def test_nested_acquire(self):
+        import threading
+        from kayako.core.limiter import AIMDLimiter
+        limiter = AIMDLimiter(initial=1, maximum=1)
+        owner = limiter.acquire()
+        # The holder does not wait for itself, other threads do
+        limiter.acquire()
+        assert limiter.in_flight == 2
+        acquired = threading.Event()
+        def other():
+            limiter.acquire()
+            acquired.set()
+            limiter.release(0.01)
+        thread = threading.Thread(target=other)
+        thread.start()
+        limiter.release(0.01)
+        assert not acquired.wait(0.1)
+        # Freed from another thread on the holder's behalf
+        releaser = threading.Thread(target=limiter.release, args=(0.01, False, None, owner))
+        releaser.start()
+        releaser.join()
+        assert acquired.wait(5)
+        thread.join()
+        assert limiter.in_flight == 0
+
+class TestAPILimiter(KayakoServerTest):
+
+    @property
+    def api(self):
+        from kayako.api import KayakoAPI
+        return KayakoAPI(self.API_URL, 'key', 'secret', limiter=True)
+
+    def test_overload_backs_off(self):
+        from kayako.exception import KayakoResponseError
+        self.responses['/Core/Test'] = (503, 'Busy')
+        api = self.api
+        self.assertRaises(KayakoResponseError, api._request, '/Core/Test', 'GET')
+        assert api.limiter.decreases == 1
+        assert api.limiter.in_flight == 0
+
+    def test_not_found_is_not_overload(self):
+        from kayako.exception import KayakoResponseError
+        api = self.api
+        self.assertRaises(KayakoResponseError, api._request, '/Core/Test', 'GET')
+        assert api.limiter.decreases == 0
+
+    def test_slot_held_while_streaming(self):
+        self.responses['/Core/Test'] = (200, '<test>ok</test>')
+        api = self.api
+        response = api._request('/Core/Test', 'GET')
+        assert api.limiter.in_flight == 1
+        assert response.getcode() == 200
+        assert response.read(5) == '<test'
+        assert api.limiter.in_flight == 1
+        assert response.read() == '>ok</test>'
+        assert api.limiter.in_flight == 0
+        api._request('/Core/Test', 'GET').close()
+        api._request('/Core/Test', 'GET')
+        assert api.limiter.in_flight == 0
+        assert api.limiter.baselines.keys() == ['/Core/Test']
+
+    def test_disabled(self):
+        from kayako.api import KayakoAPI
+        self.responses['/Core/Test'] = (200, '<test>ok</test>')
+        assert KayakoAPI(self.API_URL, 'key', 'secret').limiter is None
+        api = KayakoAPI(self.API_URL, 'key', 'secret', limiter=False)
+        assert api.limiter is None
+        assert api._request('/Core/Test', 'GET').read() == '<test>ok</test>'
+
+    def test_request_while_streaming(self):
+        import threading
+        from kayako.api import KayakoAPI
+        from kayako.core.limiter import AIMDLimiter
+        from kayako.objects import Ticket
+        from kayako.tests.object.test_ticket import tickets_xml
+        xml = tickets_xml(range(1, 301))
+        posts_xml = xml[xml.index('<posts>'):xml.index('</posts>') + len('</posts>')]
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, xml.replace(posts_xml, ''))
+        self.responses['/Tickets/Ticket/5/'] = (200, tickets_xml([5]))
+        self.responses['/Tickets/TicketPost/ListAll/1'] = (200, '<?xml version="1.0" encoding="UTF-8"?>\n%s' % posts_xml)
+        api = KayakoAPI(self.API_URL, 'key', 'secret', limiter=AIMDLimiter(initial=1, maximum=1))
+        results = []
+        def iterate():
+            for ticket in api.iter_all(Ticket, 1):
+                if ticket.id == 1:
+                    # The listing is still being read
+                    assert api.limiter.in_flight == 1
+                    results.append(api.get(Ticket, 5).id)
+                    results.append(ticket.posts[0].contents)
+        thread = threading.Thread(target=iterate)
+        thread.daemon = True
+        thread.start()
+        thread.join(10)
+        assert not thread.is_alive(), 'Nested requests waited for the listing'
+        assert results == [5, 'First post'], results
+        assert api.limiter.in_flight == 0
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+
+DEPARTMENTS_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<departments>
+    <department>
+        <id>1</id>
+        <title>Sales</title>
+        <type>public</type>
+        <module>tickets</module>
+        <displayorder>1</displayorder>
+        <parentdepartmentid>0</parentdepartmentid>
+        <uservisibilitycustom>0</uservisibilitycustom>
+    </department>
+</departments>'''
+
+class TestPrefixSkippingReader(KayakoTest):
+
+    def _read(self, body, size=7):
+        from StringIO import StringIO
+        from kayako.core.parser import PrefixSkippingReader
+        reader = PrefixSkippingReader(StringIO(body))
+        chunks = []
+        while True:
+            chunk = reader.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return reader.prefix, ''.join(chunks)
+
+    def test_no_prefix(self):
+        body = '<?xml version="1.0"?>\n<a>text</a>'
+        assert self._read(body) == ('', body)
+        assert self._read('\n' + body) == ('', '\n' + body)
+        assert self._read('<a>text</a>') == ('', '<a>text</a>')
+
+    def test_prefix(self):
+        body = '<?xml version="1.0"?>\n<a>text</a>'
+        assert self._read('Notice: index\n<br />' + body) == ('Notice: index\n<br />', body)
+        assert self._read('<div>Notice</div>\n<a>text</a>') == ('<div>Notice</div>\n', '<a>text</a>')
+
+    def test_declaration_in_content(self):
+        body = '<tickets><ticket><contents><![CDATA[see <?xml version="1.0"?> attached]]></contents></ticket></tickets>'
+        assert self._read(body) == ('', body)
+        assert self._read('\n  ' + body) == ('', '\n  ' + body)
+        assert self._read('<div>Notice</div>\n' + body) == ('<div>Notice</div>\n', body)
+        assert self._read('<!-- comment -->' + body) == ('', '<!-- comment -->' + body)
+
+    def test_read_all(self):
+        from StringIO import StringIO
+        from kayako.core.parser import PrefixSkippingReader
+        reader = PrefixSkippingReader(StringIO('<div>Notice</div><?xml version="1.0"?><a />'))
+        assert reader.read() == '<?xml version="1.0"?><a />'
+        assert reader.read() == ''
+
+    def test_long_prefix(self):
+        from kayako.core.parser import PrefixSkippingReader
+        prefix = 'x' * (PrefixSkippingReader.PEEK_SIZE - 10)
+        body = '<?xml version="1.0"?><a />' * 1000
+        assert self._read(prefix + body, size=4096) == (prefix, body)
+
+class TestParserPool(KayakoTest):
+
+    def test_parse(self):
+        from StringIO import StringIO
+        from kayako.core.parser import ParserPool
+        pool = ParserPool()
+        tree = pool.parse(StringIO('<a>\n    <b> </b>\n    <c>text</c>\n</a>'), 'Test')
+        # Whitespace between nodes is dropped, text content is kept
+        assert tree.getroot().text is None
+        assert tree.find('b').text == ' '
+        assert tree.find('c').tail is None
+        assert pool.fromstring('<a><b>1</b></a>', 'Test').findtext('b') == '1'
+        assert pool.stats()['Test']['count'] == 2
+
+    def test_parse_prefix(self):
+        from StringIO import StringIO
+        from kayako.core.parser import ParserPool
+        body = '<div>Notice</div>\n<?xml version="1.0"?>\n<a><b>1</b></a>'
+        pool = ParserPool()
+        assert pool.parse(StringIO(body)).findtext('b') == '1'
+        assert [element.tag for event, element in pool.iterparse(StringIO(body))] == ['b', 'a']
+
+    def test_parsers_reused(self):
+        from StringIO import StringIO
+        from kayako.core.parser import ParserPool
+        pool = ParserPool(maxsize=1)
+        pool.parse(StringIO('<a />'))
+        parser = pool._idle[0]
+        pool.parse(StringIO('<a />'))
+        assert pool._idle == [parser]
+        # A parser in use is not handed out twice
+        assert pool._get_parser() is parser
+        assert pool._get_parser() is not parser
+
+    def test_iterparse_parsers_reused(self):
+        from StringIO import StringIO
+        from lxml import etree
+        from kayako.core.parser import ParserPool
+        pool = ParserPool()
+        pool.CHUNK_SIZE = 10
+        xml = '<a>%s</a>' % ('<b>text</b>' * 100)
+        assert len(list(pool.iterparse(StringIO(xml)))) == 101
+        parser = pool._idle_pull[('end',)][0]
+        assert len(list(pool.iterparse(StringIO(xml)))) == 101
+        assert pool._idle_pull[('end',)] == [parser]
+        # A parser that failed, or was left mid-document, is dropped
+        self.assertRaises(etree.XMLSyntaxError, list, pool.iterparse(StringIO('<a><b></a>')))
+        events = pool.iterparse(StringIO(xml))
+        events.next()
+        events.close()
+        assert pool._idle_pull[('end',)] == []
+        assert [element.tag for event, element in pool.iterparse(StringIO('<c />'))] == ['c']
+
+    def test_no_entities(self):
+        from StringIO import StringIO
+        from kayako.core.parser import ParserPool
+        xml = '<!DOCTYPE a [<!ENTITY secret SYSTEM "file:///etc/passwd">]><a>&secret;</a>'
+        tree = ParserPool().parse(StringIO(xml))
+        assert not tree.getroot().text
+
+    def test_iterparse_stats(self):
+        from StringIO import StringIO
+        from kayako.core.parser import ParserPool
+        pool = ParserPool()
+        tags = [element.tag for event, element in pool.iterparse(StringIO('<a> <b /> <c /> </a>'), 'Test')]
+        assert tags == ['b', 'c', 'a']
+        stats = pool.stats()
+        assert stats['Test']['count'] == 1
+        assert stats['Test']['seconds'] >= 0
+        pool.reset_stats()
+        assert pool.stats() == {}
+
+class TestParserPoolAPI(KayakoServerTest):
+
+    def test_stats_per_class(self):
+        from kayako.objects import Department
+        self.responses['/Base/Department'] = (200, DEPARTMENTS_XML)
+        self.responses['/Base/Department/1/'] = (200, DEPARTMENTS_XML)
+        api = self.api
+        assert len(api.get_all(Department)) == 1
+        assert api.get(Department, 1).title == 'Sales'
+        assert api.parsers.stats()['Department']['count'] == 2
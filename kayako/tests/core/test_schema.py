@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoTest
+
+class TestSchema(KayakoTest):
+
+    @property
+    def schema(self):
+        from kayako.core.schema import Field, Schema
+        return Schema([
+            Field('id', 'int'),
+            Field('title'),
+            Field('priorityid', 'int', tag='priority', required=False),
+            Field('created', 'date'),
+            Field('expires', 'date', required=False),
+            Field('enabled', 'bool'),
+            Field('email', 'list'),
+        ])
+
+    def test_parse(self):
+        from datetime import datetime
+        from lxml import etree
+        from kayako.core.lib import FOREVER
+        node = etree.fromstring('<user><id>3</id><title>A</title><title>B</title><priority></priority><created>1306000000</created><expires>0</expires><enabled>1</enabled><email>a</email><email>b</email></user>')
+        params = self.schema.parse(node)
+        assert params == dict(id=3, title='A', priorityid=None, created=datetime.fromtimestamp(1306000000), expires=FOREVER, enabled=True, email=['a', 'b'])
+
+    def test_missing(self):
+        from lxml import etree
+        from kayako.exception import KayakoResponseError
+        node = etree.fromstring('<user><id>3</id><created>1</created><enabled>0</enabled></user>')
+        params = self.schema.parse(node)
+        assert params['title'] is None
+        assert params['expires'] is None
+        assert params['email'] == []
+        self.assertRaises(KayakoResponseError, self.schema.parse, etree.fromstring('<user><created>1</created><enabled>0</enabled></user>'))
+
+    def test_errors(self):
+        from lxml import etree
+        from kayako.exception import KayakoResponseError
+        self.assertRaises(KayakoResponseError, self.schema.parse, etree.fromstring('<user><id>x</id><created>1</created><enabled>0</enabled></user>'))
+        self.assertRaises(KayakoResponseError, self.schema.parse, etree.fromstring('<user><id>1</id><created>1</created><enabled>2</enabled></user>'))
+        self.assertRaises(KayakoResponseError, self.schema.parse, etree.fromstring('<user><id>1</id><created>1</created><enabled>1</enabled><priority>x</priority></user>'))
+
+    def test_parse_field(self):
+        from lxml import etree
+        node = etree.fromstring('<user><id>3</id><priority>2</priority><email>a</email><email>b</email></user>')
+        assert self.schema.parse_field(node, 'priorityid') == 2
+        assert self.schema.parse_field(node, 'email') == ['a', 'b']
+        assert self.schema.parse_field(node, 'title') is None
+
+    def test_matches_node_parser(self):
+        from lxml import etree
+        from kayako.core.object import KayakoObject
+        from kayako.objects import User
+        xml = '<user><id>1</id><usergroupid>2</usergroupid><userrole>user</userrole><userorganizationid></userorganizationid><salutation/><userexpiry>0</userexpiry><fullname>F</fullname><email>a@b</email><email>c@d</email><designation/><phone/><dateline>1306000000</dateline><lastvisit>0</lastvisit><isenabled>1</isenabled><timezone/><enabledst>0</enabledst><slaplanid>0</slaplanid><slaplanexpiry>0</slaplanexpiry></user>'
+        node = etree.fromstring(xml)
+        expected = dict(email=[KayakoObject._get_string(email) for email in node.findall('email')])
+        getters = dict(int=KayakoObject._get_int, str=KayakoObject._get_string, date=KayakoObject._get_date, bool=KayakoObject._get_boolean)
+        for field in User.__schema__:
+            if field.kind == 'list':
+                continue
+            if field.kind == 'str':
+                expected[field.name] = KayakoObject._get_string(node.find(field.tag))
+            else:
+                expected[field.name] = getters[field.kind](node.find(field.tag), required=field.required, strict=field.strict)
+        assert User._parse_user(node) == expected
+
+    def test_unknown_kind(self):
+        from kayako.core.schema import Field
+        self.assertRaises(ValueError, Field, 'id', 'float')
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest, KayakoTest
+from kayako.tests.core.test_flight import STATUS_XML
+
+class TestTransport(KayakoTest):
+
+    def test_request_key_ignores_authentication(self):
+        import urllib2
+        from kayako.core.transport import request_key
+        first = urllib2.Request('http://example.com/api/index.php?e=/Base/User/Filter/1/10&apikey=key&salt=1&signature=a')
+        second = urllib2.Request('http://example.com/api/index.php?e=/Base/User/Filter/1/10&apikey=key&salt=2&signature=b')
+        assert request_key(first) == request_key(second) == 'GET /Base/User/Filter/1/10?'
+
+    def test_request_key_includes_body(self):
+        import urllib2
+        from kayako.core.transport import request_key
+        request = urllib2.Request('http://example.com/api/index.php?e=/Base/Department', data='title=b&module=a&salt=1')
+        assert request_key(request) == 'POST /Base/Department?module=a&title=b'
+
+    def test_abstract(self):
+        from kayako.core.transport import Transport
+        self.assertRaises(TypeError, Transport)
+
+    def test_replay_filename_sanitized(self):
+        from kayako.api import KayakoAPI
+        from kayako.core.transport import ReplayTransport, request_filename, request_key
+        from kayako.exception import KayakoResponseError
+        sent = []
+        class Sent(ReplayTransport):
+            def urlopen(self, request):
+                sent.append(request_filename(request_key(request)))
+                return ReplayTransport.urlopen(self, request)
+        api = KayakoAPI('http://example.com/api/index.php', 'key', 'secret', transport=Sent('/nonexistent'))
+        self.assertRaises(KayakoResponseError, api._request, '/Base/User', 'POST', isenabled=True, tags=['a', 'b'], designation=None)
+        assert sent == [ReplayTransport.filename('POST', '/Base/User', isenabled=True, tags=['a', 'b'], designation=None)]
+        assert ReplayTransport.filename('GET', '/Base/User', isenabled=True) == ReplayTransport.filename('GET', '/Base/User', isenabled='1')
+
+    def test_replay_not_recorded(self):
+        import tempfile
+        import shutil
+        from kayako.api import KayakoAPI
+        from kayako.core.transport import ReplayTransport
+        from kayako.exception import KayakoResponseError
+        from kayako.objects import TicketStatus
+        directory = tempfile.mkdtemp()
+        try:
+            api = KayakoAPI('http://example.com/api/index.php', 'key', 'secret', transport=ReplayTransport(directory))
+            self.assertRaises(KayakoResponseError, api.get_all, TicketStatus)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_replay_hand_written(self):
+        import os
+        import tempfile
+        import shutil
+        from kayako.api import KayakoAPI
+        from kayako.core.transport import ReplayTransport
+        from kayako.objects import TicketStatus
+        directory = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(directory, ReplayTransport.filename('GET', '/Tickets/TicketStatus')), 'wb') as recording:
+                recording.write(STATUS_XML)
+            transport = ReplayTransport(directory)
+            api = KayakoAPI('http://example.com/api/index.php', 'key', 'secret', transport=transport)
+            assert api.pool is None
+            statuses = api.get_all(TicketStatus)
+            assert [status.id for status in statuses] == [1]
+            assert api.get_all(TicketStatus)[0].title == statuses[0].title
+            assert transport.requests == ['GET /Tickets/TicketStatus?'] * 2
+        finally:
+            shutil.rmtree(directory)
+
+class TestRecordingTransport(KayakoServerTest):
+
+    def test_record_and_replay(self):
+        import tempfile
+        import shutil
+        from kayako.api import KayakoAPI
+        from kayako.core.pool import HTTPConnectionPool
+        from kayako.core.transport import RecordingTransport, ReplayTransport
+        from kayako.objects import TicketStatus
+        self.responses['/Tickets/TicketStatus'] = (200, STATUS_XML)
+        directory = tempfile.mkdtemp()
+        try:
+            recorder = RecordingTransport(HTTPConnectionPool(), directory)
+            recorded = KayakoAPI(self.API_URL, 'key', 'secret', transport=recorder).get_all(TicketStatus)
+            assert len(self.requests) == 1
+
+            replayed = KayakoAPI(self.API_URL, 'key', 'secret', transport=ReplayTransport(directory)).get_all(TicketStatus)
+            assert len(self.requests) == 1
+            assert [(status.id, status.title) for status in replayed] == [(status.id, status.title) for status in recorded]
+        finally:
+            shutil.rmtree(directory)
@@ -9,7 +9,7 @@ Created on May 9, 2011
 
 @author: evan
 '''
-from kayako.tests import KayakoAPITest
+from kayako.tests import KayakoAPITest, KayakoServerTest
 
 class TestTicket(KayakoAPITest):
 
@@ -415,3 +415,226 @@ class TestTicket(KayakoAPITest):
         ticket = self.api.create(Ticket)
         self.assertRaises(KayakoRequestError, ticket.delete)
 
+
+TICKET_XML = '''
+    <ticket id="%(id)s" flagtype="0">
+        <displayid>ABC-%(id)s</displayid>
+        <departmentid>%(departmentid)s</departmentid>
+        <statusid>%(statusid)s</statusid>
+        <priorityid>1</priorityid>
+        <typeid>1</typeid>
+        <userid>%(userid)s</userid>
+        <userorganization></userorganization>
+        <userorganizationid>0</userorganizationid>
+        <ownerstaffid>%(ownerstaffid)s</ownerstaffid>
+        <ownerstaffname>Owner</ownerstaffname>
+        <fullname>Unit Test</fullname>
+        <email>test@example.com</email>
+        <lastreplier>Unit Test</lastreplier>
+        <subject>Ticket %(id)s</subject>
+        <creationtime>%(creationtime)s</creationtime>
+        <lastactivity>1306000000</lastactivity>
+        <laststaffreply>0</laststaffreply>
+        <lastuserreply>1306000000</lastuserreply>
+        <slaplanid>0</slaplanid>
+        <nextreplydue>0</nextreplydue>
+        <resolutiondue>1307000000</resolutiondue>
+        <replies>%(replies)s</replies>
+        <ipaddress>127.0.0.1</ipaddress>
+        <creator>1</creator>
+        <creationmode>1</creationmode>
+        <creationtype>1</creationtype>
+        <isescalated>0</isescalated>
+        <escalationruleid>0</escalationruleid>
+        <tags>unit test</tags>
+        <watcher staffid="1" name="Owner" />
+        <workflow id="2" title="Close" />
+        <note type="ticket" id="3" staffid="1" forstaffid="0" notecolor="1" creatorstaffid="1" creatorstaffname="Owner" creationdate="1306000000">A note</note>
+        <posts>
+            <post>
+                <id>4</id>
+                <ticketpostid>4</ticketpostid>
+                <ticketid>%(id)s</ticketid>
+                <dateline>1306000000</dateline>
+                <userid>1</userid>
+                <fullname>Unit Test</fullname>
+                <email>test@example.com</email>
+                <emailto></emailto>
+                <ipaddress>127.0.0.1</ipaddress>
+                <hasattachments>0</hasattachments>
+                <creator>1</creator>
+                <isthirdparty>0</isthirdparty>
+                <ishtml>0</ishtml>
+                <isemailed>0</isemailed>
+                <staffid>0</staffid>
+                <contents>First post</contents>
+                <issurveycomment>0</issurveycomment>
+            </post>
+        </posts>
+    </ticket>'''
+
+def tickets_xml(ids, departmentid=1, statusid=1, ownerstaffid=1, userid=1):
+    ''' Returns a ticket listing response for the given ticket ids. '''
+    tickets = []
+    for id in ids:
+        tickets.append(TICKET_XML % dict(id=id, departmentid=departmentid, statusid=statusid, ownerstaffid=ownerstaffid, userid=userid, creationtime=1305000000 + id, replies=id % 7))
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<tickets>%s\n</tickets>' % ''.join(tickets)
+
+class TestLazyTicket(KayakoServerTest):
+
+    def test_lazy_matches_eager(self):
+        from kayako.objects import Ticket, LazyTicket
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml(range(1, 21)))
+        eager = self.api.get_all(Ticket, 1)
+        lazy = self.api.get_all(Ticket, 1, lazy=True)
+        assert all(isinstance(ticket, LazyTicket) for ticket in lazy)
+        for eager_ticket, lazy_ticket in zip(eager, lazy):
+            eager_parameters = eager_ticket.parameters
+            lazy_parameters = lazy_ticket.parameters
+            for parameter in ['notes', 'posts', 'timetracks']:
+                eager_value = eager_parameters.pop(parameter)
+                lazy_value = lazy_parameters.pop(parameter)
+                assert [item.parameters for item in eager_value] == [item.parameters for item in lazy_value]
+            assert eager_parameters == lazy_parameters
+
+    def test_fields_parsed_on_access(self):
+        from kayako.core.lib import UnsetParameter
+        from kayako.objects import Ticket
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml([5, 6]))
+        tickets = list(self.api.iter_all(Ticket, 1, lazy=True))
+        ticket = tickets[0]
+        assert ticket.id == 5
+        assert 'subject' not in ticket.__dict__
+        assert ticket.subject == 'Ticket 5'
+        assert 'subject' in ticket.__dict__
+        assert 'creationtime' not in ticket.__dict__
+        assert ticket.posts[0].contents == 'First post'
+        assert ticket.contents is UnsetParameter
+        ticket.subject = 'Changed'
+        assert ticket.subject == 'Changed'
+        assert str(tickets[1]) == '<Ticket (6): ABC-6 - Ticket 6>'
+        self.assertRaises(AttributeError, getattr, ticket, 'missing')
+
+    def test_compact(self):
+        from kayako.objects import Ticket, LazyTicket
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml(range(1, 4)))
+        eager = self.api.get_all(Ticket, 1)
+        compact = self.api.get_all(Ticket.compact(), 1)
+        lazy = self.api.get_all(Ticket.compact(), 1, lazy=True)
+        for eager_ticket, compact_ticket, lazy_ticket in zip(eager, compact, lazy):
+            assert type(compact_ticket) is Ticket.compact()
+            assert isinstance(lazy_ticket, LazyTicket)
+            assert compact_ticket.__dict__ == {}
+            assert compact_ticket.subject == lazy_ticket.subject == eager_ticket.subject
+            assert lazy_ticket.posts[0].contents == eager_ticket.posts[0].contents
+            assert lazy_ticket.parameters['creationtime'] == eager_ticket.creationtime
+            assert sorted(lazy_ticket.__dict__) == ['_ticket_tree']
+
+    def test_get_lazy(self):
+        from kayako.objects import Ticket, LazyTicket
+        self.responses['/Tickets/Ticket/7/'] = (200, tickets_xml([7]))
+        ticket = self.api.get(Ticket, 7, lazy=True)
+        assert isinstance(ticket, LazyTicket)
+        assert ticket.displayid == 'ABC-7'
+
+    def test_pickle(self):
+        import copy
+        import pickle
+        from kayako.objects import Ticket, LazyTicket
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml([7, 8]))
+        for cls in [Ticket, Ticket.compact()]:
+            tickets = self.api.get_all(cls, 1, lazy=True)
+            # One ticket with a field parsed already, one untouched
+            assert tickets[0].subject == 'Ticket 7'
+            for ticket in tickets:
+                for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                    for loaded in [pickle.loads(pickle.dumps(ticket, protocol)), copy.deepcopy(ticket)]:
+                        assert isinstance(loaded, LazyTicket)
+                        assert type(loaded) is type(ticket)
+                        assert loaded.subject == 'Ticket %s' % ticket.id
+                        assert loaded.displayid == 'ABC-%s' % ticket.id
+                        assert loaded.posts[0].contents == 'First post'
+                        assert loaded.id == ticket.id
+
+class TestTicketFrame(KayakoServerTest):
+
+    def test_get_all(self):
+        import time
+        from kayako.objects import Ticket, TicketFrame
+        self.responses['/Tickets/Ticket/ListAll/1/-1/2/-1/'] = (200, tickets_xml(range(1, 51), ownerstaffid=2))
+        tickets = self.api.get_all(Ticket, 1, ownerstaffid=2)
+        frame = self.api.get_all(TicketFrame, 1, ownerstaffid=2)
+        assert len(frame) == 50
+        assert str(frame) == '<TicketFrame: 50 tickets>'
+        assert list(frame.id) == [ticket.id for ticket in tickets]
+        assert list(frame['ownerstaffid']) == [2] * 50
+        assert list(frame.replies) == [ticket.replies for ticket in tickets]
+        assert list(frame.creationtime) == [int(time.mktime(ticket.creationtime.timetuple())) for ticket in tickets]
+        assert list(frame.nextreplydue) == [0] * 50
+        self.assertRaises(AttributeError, getattr, frame, 'subject')
+
+    def test_bad_response(self):
+        from kayako.exception import KayakoResponseError
+        from kayako.objects import TicketFrame
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml([1]).replace('<replies>1</replies>', '<replies>many</replies>'))
+        self.assertRaises(KayakoResponseError, self.api.get_all, TicketFrame, 1)
+
+class TestTicketChildren(KayakoServerTest):
+
+    TIMETRACK = '<note type="timetrack" id="8" creatorstaffid="1" creatorstaffname="Owner" workdate="1306000000" billdate="1306000000" timeworked="60" timebillable="30" workerstaffid="1" workerstaffname="Owner" notecolor="1">Worked</note>'
+
+    def test_parsed_on_access(self):
+        from kayako.objects import Ticket
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml([1, 2]).replace('<posts>', self.TIMETRACK + '<posts>'))
+        tickets = self.api.get_all(Ticket, 1)
+        ticket = tickets[0]
+        assert not ticket.posts.loaded
+        assert len(ticket.posts) == 1
+        assert ticket.posts.loaded
+        assert ticket.posts[0].contents == 'First post'
+        assert [note.contents for note in ticket.notes] == ['A note']
+        # Timetracks come from the notes of type timetrack, not ticket notes
+        assert [timetrack.timespent for timetrack in ticket.timetracks] == [60]
+        assert not tickets[1].posts.loaded
+        ticket.posts.append('post')
+        assert len(ticket.posts) == 2
+
+    def test_posts_requested(self):
+        from kayako.objects import Ticket
+        xml = tickets_xml([3])
+        posts_xml = xml[xml.index('<posts>'):xml.index('</posts>') + len('</posts>')]
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, xml.replace(posts_xml, ''))
+        self.responses['/Tickets/TicketPost/ListAll/3'] = (200, '<?xml version="1.0" encoding="UTF-8"?>\n%s' % posts_xml)
+        ticket = self.api.get_all(Ticket, 1)[0]
+        assert len(self.requests) == 1
+        assert ticket.posts[0].contents == 'First post'
+        assert ticket.posts[0].ticketid == 3
+        assert len(self.requests) == 2
+        assert self.requests[1][1] == '/Tickets/TicketPost/ListAll/3'
+
+    def test_posts_not_requested_by_pickle(self):
+        import copy
+        import pickle
+        from kayako.core.lib import LazyList
+        from kayako.objects import Ticket
+        xml = tickets_xml([3])
+        posts_xml = xml[xml.index('<posts>'):xml.index('</posts>') + len('</posts>')]
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, xml.replace(posts_xml, ''))
+        self.responses['/Tickets/TicketPost/ListAll/3'] = (200, '<?xml version="1.0" encoding="UTF-8"?>\n%s' % posts_xml)
+        ticket = self.api.get_all(Ticket, 1)[0]
+        loaded = pickle.loads(pickle.dumps(ticket, pickle.HIGHEST_PROTOCOL))
+        copied = copy.deepcopy(ticket)
+        assert ticket.posts != None
+        assert not ticket.posts == 'posts'
+        assert len(self.requests) == 1
+        for other in [loaded, copied]:
+            assert isinstance(other.posts, LazyList) and not other.posts.loaded
+            # Parsed from their nodes, notes are pickled as a list
+            assert [note.contents for note in other.notes] == ['A note']
+        # The copies request the posts when they are used
+        assert loaded.posts[0].contents == 'First post'
+        assert len(self.requests) == 2
+        assert not ticket.posts.loaded
+        # Comparing with a list still loads them
+        assert ticket.posts != []
+        assert len(self.requests) == 3
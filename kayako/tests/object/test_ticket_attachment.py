@@ -5,7 +5,7 @@ Created on May 10, 2011
 @author: evan
 '''
 
-from kayako.tests import KayakoAPITest
+from kayako.tests import KayakoAPITest, KayakoServerTest
 
 class TestTicketAttachment(KayakoAPITest):
 
@@ -296,3 +296,89 @@ class TestTicketAttachment(KayakoAPITest):
         ticket_attachment.id = 1
         ticket_attachment.ticketid = UnsetParameter
         self.assertRaises(KayakoRequestError, ticket_attachment.delete)
+
+ATTACHMENT_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<attachments>
+    <attachment>
+        <id>7</id>
+        <ticketid>1</ticketid>
+        <ticketpostid>2</ticketpostid>
+        <filename>archive.bin</filename>
+        <filesize>%s</filesize>
+        <filetype>application/octet-stream</filetype>
+        <dateline>1305125000</dateline>
+        <contents><![CDATA[%s]]></contents>
+    </attachment>
+</attachments>'''
+
+class TestTicketAttachmentDownload(KayakoServerTest):
+
+    def test_download_attachment(self):
+        import base64
+        from StringIO import StringIO
+        data = ''.join(chr(i % 253) for i in xrange(300000))
+        encoded = base64.encodestring(data)
+        self.responses['/Tickets/TicketAttachment/1/7/'] = (200, ATTACHMENT_XML % (len(data), encoded))
+        sink = StringIO()
+        attachment = self.api.download_attachment(1, 7, sink)
+        assert sink.getvalue() == data
+        assert attachment.id == 7
+        assert attachment.filename == 'archive.bin'
+        assert attachment.filesize == len(data)
+        assert attachment.dateline.year == 2011
+        assert attachment.contents is None
+
+    def test_download_attachment_nonexistant(self):
+        from StringIO import StringIO
+        sink = StringIO()
+        assert self.api.download_attachment(1, 8, sink) is None
+        assert sink.getvalue() == ''
+
+    def test_get_lazy(self):
+        import base64
+        import mmap
+        from kayako.objects import TicketAttachment
+        data = ''.join(chr(i % 253) for i in xrange(300000))
+        self.responses['/Tickets/TicketAttachment/1/7/'] = (200, ATTACHMENT_XML % (len(data), base64.encodestring(data)))
+        attachment = self.api.get(TicketAttachment, 1, 7, lazy=True)
+        assert attachment.contents is None
+        contents = attachment.get_contents()
+        assert isinstance(contents, mmap.mmap)
+        assert contents[:] == data
+        assert attachment.payload.size == len(data)
+        contents.close()
+        attachment.payload.close()
+
+    def test_get_lazy_small(self):
+        import base64
+        from kayako.objects import TicketAttachment
+        self.responses['/Tickets/TicketAttachment/1/7/'] = (200, ATTACHMENT_XML % (5, base64.b64encode('hello')))
+        attachment = self.api.get(TicketAttachment, 1, 7, lazy=True)
+        contents = attachment.get_contents()
+        assert isinstance(contents, memoryview)
+        assert contents.tobytes() == 'hello'
+        assert self.api.get(TicketAttachment, 1, 8, lazy=True) is None
+
+    def test_get_lazy_many(self):
+        import base64
+        import copy
+        import os
+        import pickle
+        from kayako.objects import TicketAttachment
+        data = ''.join(chr(i % 251) for i in xrange(100000))
+        self.responses['/Tickets/TicketAttachment/1/7/'] = (200, ATTACHMENT_XML % (len(data), base64.encodestring(data)))
+        attachments = [self.api.get(TicketAttachment, 1, 7, lazy=True) for i in range(5)]
+        for attachment in attachments:
+            # Spilled to disk, but no file is left open
+            assert os.path.exists(attachment.payload.path)
+            assert attachment.payload._file is None
+        assert attachments[0].get_contents()[:] == data
+        assert attachments[1].payload.read() == data
+        loaded = pickle.loads(pickle.dumps(attachments[2]))
+        copied = copy.deepcopy(attachments[3])
+        for other in [loaded, copied]:
+            assert other.payload.path != attachments[2].payload.path
+            assert other.get_contents()[:] == data
+        path = attachments[4].payload.path
+        attachments[4].payload.close()
+        assert not os.path.exists(path)
@@ -10,7 +10,7 @@ Created on May 10, 2011
 @author: evan
 '''
 
-from kayako.tests import KayakoAPITest
+from kayako.tests import KayakoAPITest, KayakoServerTest
 
 class TestTicketNote(KayakoAPITest):
 
@@ -68,3 +68,28 @@ class TestTicketNote(KayakoAPITest):
         assert custom_field.title, custom_field.title
         assert custom_field.value is not UnsetParameter, custom_field.value
         assert str(custom_field), str(custom_field)
+
+CUSTOM_FIELDS_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<customfields>
+    <group id="1" title="Details">
+        <field id="2" type="1" title="Serial">ABC123</field>
+        <field id="3" type="4" title="Urgent">1</field>
+    </group>
+</customfields>'''
+
+class TestTicketCustomFieldPrefix(KayakoServerTest):
+
+    def _fields(self, body):
+        from kayako.objects import TicketCustomField
+        self.responses['/Tickets/TicketCustomField/5'] = (200, body)
+        groups = self.api.get_all(TicketCustomField, 5)
+        return [(field.title, field.type, field.value) for group in groups for field in group.fields]
+
+    def test_plain(self):
+        assert self._fields(CUSTOM_FIELDS_XML) == [('Serial', 'TEXT', 'ABC123'), ('Urgent', 'CHECKBOX', '1')]
+
+    def test_notice_prefix(self):
+        notice = '<div style="border: 1px solid">Notice: Undefined index: x in /var/www/index.php on line 3</div>\n'
+        assert self._fields(notice + CUSTOM_FIELDS_XML) == self._fields(CUSTOM_FIELDS_XML)
+        without_declaration = CUSTOM_FIELDS_XML.split('\n', 1)[1]
+        assert self._fields(notice + without_declaration) == self._fields(CUSTOM_FIELDS_XML)
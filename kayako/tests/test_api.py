@@ -10,7 +10,7 @@ Created on May 5, 2011
 @author: evan
 '''
 
-from kayako.tests import KayakoAPITest
+from kayako.tests import KayakoAPITest, KayakoServerTest
 
 class TestKayakoAPI(KayakoAPITest):
 
@@ -187,7 +187,181 @@ class TestKayakoAPI(KayakoAPITest):
     def test_ticket_search_full(self):
         assert isinstance(self.api.ticket_search_full('testonly'), list)
 
+class TestKayakoAPIBulk(KayakoServerTest):
+
+    POST_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<posts>
+    <post>
+        <id>%s</id>
+        <ticketpostid>%s</ticketpostid>
+        <ticketid>7</ticketid>
+        <dateline>1306000000</dateline>
+        <userid>1</userid>
+        <fullname>Test</fullname>
+        <email>test@example.com</email>
+        <emailto></emailto>
+        <ipaddress>127.0.0.1</ipaddress>
+        <hasattachments>0</hasattachments>
+        <creator>1</creator>
+        <isthirdparty>0</isthirdparty>
+        <ishtml>0</ishtml>
+        <isemailed>0</isemailed>
+        <staffid>0</staffid>
+        <contents>Post %s</contents>
+        <issurveycomment>0</issurveycomment>
+    </post>
+</posts>'''
+
+    def test_get_many_two_keys(self):
+        from kayako.objects import TicketPost
+        for id in range(1, 6):
+            self.responses['/Tickets/TicketPost/7/%s/' % id] = (200, self.POST_XML % (id, id, id))
+        posts = self.api.get_many(TicketPost, [(7, id) for id in range(5, 0, -1)], workers=3)
+        assert [post.id for post in posts] == range(5, 0, -1)
+        assert all(post.ticketid == 7 for post in posts)
+
+    def test_get_many_not_found(self):
+        from kayako.objects import TicketPost
+        self.responses['/Tickets/TicketPost/7/1/'] = (200, self.POST_XML % (1, 1, 1))
+        posts = self.api.get_many(TicketPost, [(7, 1), (7, 2)])
+        assert posts[0].id == 1
+        assert posts[1] is None
+
+    def test_get_many_errors(self):
+        from kayako.objects import Department
+        from kayako.exception import KayakoBulkRequestError, KayakoResponseError
+        try:
+            self.api.get_many(Department, [1, 2])
+        except KayakoBulkRequestError, error:
+            assert error.results == [None, None]
+            assert sorted(error.errors) == [1, 2]
+            assert isinstance(error.errors[1], KayakoResponseError)
+        else:
+            self.fail('KayakoBulkRequestError not raised')
+
+    def test_get_many_deadline(self):
+        import time
+        from kayako.exception import KayakoBulkRequestError
 
+        class Slow(object):
+            __name__ = 'Slow'
+            @staticmethod
+            def get(api, id):
+                time.sleep(0.5 if id == 2 else 0)
+                return id
 
-
-
+        try:
+            self.api.get_many(Slow, [1, 2], workers=2, timeout=0.1)
+        except KayakoBulkRequestError, error:
+            assert error.results == [1, None]
+            assert 2 in error.errors
+        else:
+            self.fail('KayakoBulkRequestError not raised')
+
+class TestKayakoAPIStreaming(KayakoServerTest):
+
+    def posts_xml(self, count):
+        post = TestKayakoAPIBulk.POST_XML.split('<post>', 1)[1].rsplit('</post>', 1)[0]
+        posts = ''.join('<post>%s</post>' % (post % (id, id, id)) for id in range(1, count + 1))
+        return '<?xml version="1.0" encoding="UTF-8"?>\n<posts>%s</posts>' % posts
+
+    def test_iter_all(self):
+        import types
+        from kayako.objects import TicketPost
+        self.responses['/Tickets/TicketPost/ListAll/7'] = (200, self.posts_xml(500))
+        posts = self.api.iter_all(TicketPost, 7)
+        assert isinstance(posts, types.GeneratorType)
+        assert not self.requests
+        first = posts.next()
+        assert first.id == 1 and first.contents == 'Post 1'
+        assert [post.id for post in posts] == range(2, 501)
+        listed = self.api.get_all(TicketPost, 7)
+        assert [(post.id, post.contents) for post in listed] == [(id, 'Post %s' % id) for id in range(1, 501)]
+
+USER_XML = '<user><id>%(id)s</id><usergroupid>2</usergroupid><userrole>user</userrole><userorganizationid>0</userorganizationid><salutation /><userexpiry>0</userexpiry><fullname>User %(id)s</fullname><email>user%(id)s@example.com</email><designation /><phone /><dateline>1306000000</dateline><lastvisit>0</lastvisit><isenabled>1</isenabled><timezone /><enabledst>0</enabledst><slaplanid>0</slaplanid><slaplanexpiry>0</slaplanexpiry></user>'
+
+def users_xml(ids):
+    ''' Returns a user listing response for the given user ids. '''
+    users = ''.join(USER_XML % dict(id=id) for id in ids)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<users>%s</users>' % users
+
+class TestKayakoAPIUsers(KayakoServerTest):
+
+    def _serve(self, pages, page_size):
+        for marker, ids in pages:
+            self.responses['/Base/User/Filter/%s/%s/' % (marker, page_size)] = (200, users_xml(ids))
+
+    def test_iter_users(self):
+        self._serve([(1, [1, 2, 3]), (4, [5, 8, 9]), (10, [10]), (11, [])], 3)
+        for prefetch in [0, 1, 2]:
+            del self.requests[:]
+            users = self.api.iter_users(page_size=3, prefetch=prefetch)
+            assert [user.id for user in users] == [1, 2, 3, 5, 8, 9, 10]
+            assert [request[1] for request in self.requests] == ['/Base/User/Filter/%s/3/' % marker for marker in [1, 4, 10, 11]]
+
+    def test_iter_users_start(self):
+        self._serve([(5, [5, 8]), (9, [])], 1000)
+        assert [user.fullname for user in self.api.iter_users(start=5)] == ['User 5', 'User 8']
+
+    def test_iter_users_error(self):
+        from kayako.exception import KayakoResponseError
+        self._serve([(1, [1, 2])], 2)
+        self.responses['/Base/User/Filter/3/2/'] = (404, 'Not Found')
+        users = self.api.iter_users(page_size=2)
+        assert [users.next().id, users.next().id] == [1, 2]
+        self.assertRaises(KayakoResponseError, users.next)
+
+class TestKayakoAPIFilterPushdown(KayakoServerTest):
+
+    def test_filter(self):
+        from kayako.objects import Ticket
+        from kayako.tests.object.test_ticket import tickets_xml
+        self.responses['/Tickets/Ticket/ListAll/1/1,2/3/-1/'] = (200, tickets_xml([4, 5], ownerstaffid=3))
+        tickets = self.api.filter(Ticket, departmentid=1, statusid=[1, 2], ownerstaffid=3, replies=5)
+        assert [ticket.id for ticket in tickets] == [5]
+        assert [request[1] for request in self.requests] == ['/Tickets/Ticket/ListAll/1/1,2/3/-1/']
+        assert self.api.first(Ticket, departmentid=1, ticketstatusid=(1, 2), ownerstaffid=3).id == 4
+
+    def test_arguments_given(self):
+        from kayako.objects import Ticket
+        from kayako.tests.object.test_ticket import tickets_xml
+        self.responses['/Tickets/Ticket/ListAll/1/-1/2/-1/'] = (200, tickets_xml([4, 5], ownerstaffid=2))
+        # Given arguments are sent as they are, and the filter is matched on the client
+        assert self.api.filter(Ticket, args=(1,), kwargs=dict(ownerstaffid=2), ownerstaffid=3) == []
+        assert self.api.first(Ticket, args=(1,), departmentid=2, ownerstaffid=2) is None
+        assert [request[1] for request in self.requests] == ['/Tickets/Ticket/ListAll/1/-1/2/-1/'] * 2
+
+    def test_list_values(self):
+        from kayako.objects import Ticket
+        from kayako.tests.object.test_ticket import tickets_xml
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml([4, 5], statusid=2))
+        self.responses['/Tickets/Ticket/ListAll/1/1,2/-1/-1/'] = (200, tickets_xml([4, 5], statusid=2))
+        # A list means any of its items, whether it is pushed down or not
+        assert [ticket.id for ticket in self.api.filter(Ticket, args=(1,), kwargs=dict(ticketstatusid=-1), statusid=[1, 2])] == [4, 5]
+        assert [ticket.id for ticket in self.api.filter(Ticket, departmentid=1, statusid=[1, 2])] == [4, 5]
+        assert self.api.filter(Ticket, args=(1,), replies=(1, 3)) == []
+        # Sets and generators are sent in the comma form
+        assert self.api.first(Ticket, departmentid=1, statusid=set([2, 1])).id == 4
+        assert self.api.first(Ticket, departmentid=1, statusid=(id for id in [1, 2])).id == 4
+        assert self.api.first(Ticket, args=(1,), replies=iter([5])).id == 5
+        assert [request[1] for request in self.requests if '1,2' in request[1]] == ['/Tickets/Ticket/ListAll/1/1,2/-1/-1/'] * 3
+
+    def test_empty_values(self):
+        from kayako.objects import Department, Ticket
+        # An empty any-of value matches nothing, so nothing is requested
+        assert self.api.filter(Ticket, departmentid=1, ownerstaffid=[]) == []
+        assert self.api.filter(Ticket, args=(1,), replies=()) == []
+        assert self.api.first(Ticket, departmentid=1, statusid=set()) is None
+        assert self.api.first(Department, id=iter([])) is None
+        assert self.requests == []
+
+    def test_lazy_child_lists(self):
+        from kayako.objects import Ticket
+        from kayako.tests.object.test_ticket import tickets_xml
+        self.responses['/Tickets/Ticket/ListAll/1/-1/-1/-1/'] = (200, tickets_xml([4, 5]))
+        ticket = self.api.get_all(Ticket, 1)[1]
+        post = ticket.posts[0]
+        # Child lists are LazyLists, matched as lists
+        assert self.api._match_filter(ticket, posts=post)
+        assert self.api._match_filter(ticket, posts=[None, post])
+        assert not self.api._match_filter(ticket, posts=None)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest
+
+DEPARTMENT_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<departments>
+    <department>
+        <id>%s</id>
+        <title>Department %s</title>
+        <type>public</type>
+        <module>tickets</module>
+        <displayorder>1</displayorder>
+        <parentdepartmentid>0</parentdepartmentid>
+        <uservisibilitycustom>0</uservisibilitycustom>
+        <usergroups></usergroups>
+    </department>
+</departments>'''
+
+class TestAsyncKayakoAPI(KayakoServerTest):
+
+    @property
+    def async_api(self):
+        from kayako.async_api import AsyncKayakoAPI
+        return AsyncKayakoAPI(self.API_URL, 'key', 'secret', workers=4)
+
+    def test_get(self):
+        from kayako.objects import Department
+        for id in range(1, 9):
+            self.responses['/Base/Department/%s/' % id] = (200, DEPARTMENT_XML % (id, id))
+        api = self.async_api
+        futures = [api.get(Department, id) for id in range(1, 9)]
+        departments = [future.result(10) for future in futures]
+        assert [department.id for department in departments] == range(1, 9)
+        assert departments[0].api is api.api
+        api.close()
+
+    def test_get_all_filter_first(self):
+        from kayako.objects import Department
+        self.responses['/Base/Department'] = (200, DEPARTMENT_XML % (3, 3))
+        api = self.async_api
+        assert len(api.get_all(Department).result(10)) == 1
+        assert len(api.filter(Department, module='tickets').result(10)) == 1
+        assert api.first(Department, module='livechat').result(10) is None
+        api.close()
+
+    def test_error(self):
+        from kayako.objects import Department
+        from kayako.exception import KayakoResponseError
+        api = self.async_api
+        future = api.get_all(Department)
+        self.assertRaises(KayakoResponseError, future.result, 10)
+        api.close()
+
+    def test_create(self):
+        from kayako.objects import Department
+        api = self.async_api
+        department = api.create(Department, title='test')
+        assert department.title == 'test'
+        assert department.api is api.api
+        api.close()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# Copyright (c) 2011, Evan Leis
+#
+# Distributed under the terms of the Lesser GNU General Public License (LGPL)
+#-----------------------------------------------------------------------------
+'''
+Created on Oct 18, 2026
+'''
+
+from kayako.tests import KayakoServerTest
+
+class UserDirectory(dict):
+    ''' Serves /Base/User/Filter/marker/maxitems/ for any marker from a list of userids. '''
+
+    def __init__(self, ids):
+        dict.__init__(self)
+        self.ids = sorted(ids)
+
+    def get(self, controller, default=None):
+        from kayako.tests.test_api import users_xml
+        parts = controller.strip('/').split('/')
+        if parts[:3] != ['Base', 'User', 'Filter']:
+            return dict.get(self, controller, default)
+        marker, maxitems = int(parts[3]), int(parts[4])
+        ids = [id for id in self.ids if id >= marker][:maxitems]
+        return (200, users_xml(ids))
+
+class TestUserExport(KayakoServerTest):
+
+    IDS = [1, 2, 3, 7, 8, 20, 21, 22, 40, 95, 96, 97, 98, 99, 150]
+
+    def setUp(self):
+        super(TestUserExport, self).setUp()
+        self.responses = UserDirectory(self.IDS)
+
+    def test_probe_end(self):
+        from kayako.export import UserExport
+        assert UserExport(self.api).probe_end() == 151
+        assert UserExport(self.api, start=151).probe_end() == 151
+        self.responses.ids = [5]
+        assert UserExport(self.api).probe_end() == 6
+
+    def test_windows(self):
+        from kayako.export import UserExport
+        export = UserExport(self.api, partitions=4)
+        assert export.windows() == [(1, 39), (39, 77), (77, 115), (115, 151)]
+        assert UserExport(self.api, end=3, partitions=4).windows() == [(1, 2), (2, 3)]
+
+    def test_ordered(self):
+        export = self.api.export_users(partitions=5, workers=3, page_size=2)
+        assert [user.id for user in export] == self.IDS
+        assert sorted(export.stats) == range(5)
+        assert sum(stats['users'] for stats in export.stats.values()) == len(self.IDS)
+        for stats in export.stats.values():
+            assert stats['pages'] >= 1
+            assert stats['start'] < stats['end']
+
+    def test_unordered(self):
+        export = self.api.export_users(end=100, partitions=7, workers=7, ordered=False)
+        assert sorted(user.id for user in export) == self.IDS[:-1]
+
+    def test_bounded(self):
+        import time
+        export = self.api.export_users(end=151, partitions=3, workers=3, page_size=1, prefetch=1)
+        users = iter(export)
+        assert users.next().id == 1
+        time.sleep(0.3)
+        # Each window waits with one page queued and one more fetched
+        assert len(self.requests) <= 3 * 3, len(self.requests)
+        assert [user.id for user in users] == self.IDS[1:]
+
+    def test_close(self):
+        import time
+        import kayako.export
+        from kayako.core.futures import WorkerPool
+        pools = []
+        class RecordingPool(WorkerPool):
+            def __init__(self, *args, **kwargs):
+                WorkerPool.__init__(self, *args, **kwargs)
+                pools.append(self)
+        kayako.export.WorkerPool = RecordingPool
+        try:
+            users = iter(self.api.export_users(end=151, partitions=3, workers=3, page_size=1, prefetch=1))
+            users.next()
+            users.close()
+        finally:
+            kayako.export.WorkerPool = WorkerPool
+        # Only the export's own workers count, not the test server's threads
+        threads = pools[0]._threads
+        assert threads
+        deadline = time.time() + 5
+        while any(thread.is_alive() for thread in threads) and time.time() < deadline:
+            time.sleep(0.01)
+        assert not any(thread.is_alive() for thread in threads)
+
+    def test_error(self):
+        from kayako.exception import KayakoResponseError
+        self.responses.ids = []
+        export = self.api.export_users()
+        assert list(export) == []
+        export = self.api.export_users(end=10)
+        self.responses.get = lambda controller, default=None: (500, 'Error')
+        self.assertRaises(KayakoResponseError, list, export)
+
+class TestTicketFanOut(KayakoServerTest):
+
+    COUNTS = {
+        # departmentid: (statuses, owners, unassigned)
+        1: ({1: 3, 2: 4}, {1: 2, 2: 3}, 2),
+        2: ({1: 1, 3: 2}, {1: 3}, 0),
+    }
+
+    def setUp(self):
+        super(TestTicketFanOut, self).setUp()
+        self._counts(self.COUNTS)
+
+    def _counts(self, counts, total=None):
+        ''' Serves a TicketCount; ``total`` overrides each department's total. '''
+        item = '<%s id="%s" lastactivity="1306000000" totalitems="%s" totalunresolveditems="0" />'
+        departments = []
+        unassigned = []
+        for departmentid, (statuses, owners, unassigned_count) in sorted(counts.items()):
+            children = [item % ('ticketstatus', id, count) for id, count in sorted(statuses.items())]
+            children.extend(item % ('ownerstaff', id, count) for id, count in sorted(owners.items()))
+            departments.append('<department id="%s"><totalitems>%s</totalitems><lastactivity>1306000000</lastactivity><totalunresolveditems>0</totalunresolveditems>%s</department>' % (departmentid, total or sum(statuses.values()), ''.join(children)))
+            unassigned.append(item % ('department', departmentid, unassigned_count))
+        self.responses['/Tickets/TicketCount'] = (200, '<?xml version="1.0" encoding="UTF-8"?>\n<ticketcount><departments>%s</departments><unassigned>%s</unassigned></ticketcount>' % (''.join(departments), ''.join(unassigned)))
+
+    def _list(self, departmentid, ticketstatusid, ownerstaffid, response):
+        if isinstance(response, list):
+            from kayako.tests.object.test_ticket import tickets_xml
+            response = (200, tickets_xml(response, departmentid=departmentid))
+        self.responses['/Tickets/Ticket/ListAll/%s/%s/%s/-1/' % (departmentid, ticketstatusid, ownerstaffid)] = response
+
+    def _listed(self):
+        return sorted(request[1] for request in self.requests if '/ListAll/' in request[1])
+
+    def test_departments(self):
+        self._list(1, -1, -1, [1, 2, 5])
+        self._list(2, -1, -1, [3, 5])
+        fan_out = self.api.ticket_fan_out([1, 2])
+        assert [ticket.id for ticket in fan_out.run()] == [1, 2, 3, 5]
+        assert sorted((stats['call'], stats['tickets']) for stats in fan_out.stats) == [((1, -1, -1), 3), ((2, -1, -1), 2)]
+        assert sorted(fan_out.plan) == [(1, -1, -1), (2, -1, -1)]
+
+    def test_split_on_error(self):
+        self._list(1, -1, -1, (500, 'Timed out'))
+        self._list(1, 1, -1, [1, 2])
+        self._list(1, 2, -1, (500, 'Timed out'))
+        self._list(1, 2, 0, [3])
+        self._list(1, 2, 1, [4, 2])
+        self._list(1, 2, 2, [])
+        fan_out = self.api.ticket_fan_out([1], workers=3)
+        assert [ticket.id for ticket in fan_out.run()] == [1, 2, 3, 4]
+        assert sorted(fan_out.plan) == [(1, 1, -1), (1, 2, 0), (1, 2, 1), (1, 2, 2)]
+        errors = sorted((stats['call'], stats['split']) for stats in fan_out.stats if stats['error'])
+        assert errors == [((1, -1, -1), 2), ((1, 2, -1), 3)]
+        # The next run lists with the split plan straight away
+        del self.requests[:]
+        assert [ticket.id for ticket in fan_out.run()] == [1, 2, 3, 4]
+        assert self._listed() == ['/Tickets/Ticket/ListAll/1/1/-1/-1/', '/Tickets/Ticket/ListAll/1/2/0/-1/', '/Tickets/Ticket/ListAll/1/2/1/-1/', '/Tickets/Ticket/ListAll/1/2/2/-1/']
+
+    def test_split_large(self):
+        self._list(2, -1, -1, [1, 2, 3])
+        fan_out = self.api.ticket_fan_out([2], max_tickets=2)
+        assert len(fan_out.run()) == 3
+        assert fan_out.plan == [(2, 1, -1), (2, 3, -1)]
+
+    def test_unsplittable(self):
+        from kayako.exception import KayakoResponseError
+        self._list(1, 2, 1, (500, 'Timed out'))
+        fan_out = self.api.ticket_fan_out([1], ticketstatusid=[2], ownerstaffid=[1])
+        self.assertRaises(KayakoResponseError, fan_out.run)
+
+    def test_split_on_read_error(self):
+        import socket
+        from kayako.export import TicketFanOut
+        class TimingOut(TicketFanOut):
+            def _list(self, call):
+                if call == (1, -1, -1):
+                    # The listing timed out while it was being read
+                    raise socket.timeout('timed out')
+                return TicketFanOut._list(self, call)
+        self._list(1, 1, -1, [1])
+        self._list(1, 2, -1, [2])
+        fan_out = TimingOut(self.api, [1])
+        assert [ticket.id for ticket in fan_out.run()] == [1, 2]
+        assert sorted(fan_out.plan) == [(1, 1, -1), (1, 2, -1)]
+
+    def test_split_on_too_many_requests(self):
+        self._list(1, -1, -1, (429, 'Slow down'))
+        self._list(1, 1, -1, [1])
+        self._list(1, 2, -1, [2])
+        fan_out = self.api.ticket_fan_out([1])
+        assert [ticket.id for ticket in fan_out.run()] == [1, 2]
+
+    def test_no_split_on_client_error(self):
+        from kayako.exception import KayakoResponseError
+        for response in [(403, 'Forbidden'), (200, '<tickets><ticket id="x" /></tickets>')]:
+            del self.requests[:]
+            self._list(1, -1, -1, response)
+            self._list(2, -1, -1, [1])
+            fan_out = self.api.ticket_fan_out([1, 2])
+            self.assertRaises(KayakoResponseError, fan_out.run)
+            # Neither statuses nor staff were listed to split the call
+            assert len(self._listed()) <= 2, self._listed()
+            assert [request for request in self.requests if '/ListAll/' not in request[1]] == []
+
+    def test_pending_cancelled(self):
+        import time
+        from kayako.exception import KayakoResponseError
+        self._list(1, -1, -1, (403, 'Forbidden'))
+        for departmentid in range(2, 6):
+            self._list(departmentid, -1, -1, [departmentid])
+        fan_out = self.api.ticket_fan_out(range(1, 6), workers=1)
+        self.assertRaises(KayakoResponseError, fan_out.run)
+        time.sleep(0.2)
+        # Only the call running when the error arrived may still have been sent
+        assert len(self._listed()) <= 2, self._listed()
+
+    def test_split_by_counted_ids(self):
+        # A status of another department and an owner no longer on the staff
+        self._counts({1: ({1: 1, 7: 2}, {1: 1, 9: 2}, 0)})
+        self._list(1, -1, -1, (500, 'Timed out'))
+        self._list(1, 1, -1, [1])
+        self._list(1, 7, -1, (500, 'Timed out'))
+        self._list(1, 7, 0, [])
+        self._list(1, 7, 1, [])
+        self._list(1, 7, 9, [2, 3])
+        fan_out = self.api.ticket_fan_out([1])
+        assert [ticket.id for ticket in fan_out.run()] == [1, 2, 3]
+        assert sorted(fan_out.plan) == [(1, 1, -1), (1, 7, 0), (1, 7, 1), (1, 7, 9)]
+
+    def test_uncovered_split(self):
+        from kayako.exception import KayakoResponseError
+        # The counted statuses and owners leave tickets out
+        self._counts({1: ({1: 1, 2: 2}, {1: 3}, 0)}, total=5)
+        self._list(1, -1, -1, (500, 'Timed out'))
+        fan_out = self.api.ticket_fan_out([1])
+        self.assertRaises(KayakoResponseError, fan_out.run)
+        assert self._listed() == ['/Tickets/Ticket/ListAll/1/-1/-1/-1/']
+        self._list(1, -1, -1, [1, 2, 3])
+        fan_out = self.api.ticket_fan_out([1], max_tickets=2)
+        assert len(fan_out.run()) == 3
+        assert fan_out.plan == [(1, -1, -1)]